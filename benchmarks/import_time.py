@@ -0,0 +1,82 @@
+"""Guard the cold-import cost of the goggles package.
+
+Importing goggles must not load any of the heavy optional backends, and must not take longer
+than importing its scientific core (NumPy, pandas and SciPy's stats) by more than the budget.
+Exits with a non-zero status when either check fails.
+
+Run from the repository root with ``python -m benchmarks.import_time [--budget SECONDS]``.
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+HEAVY_BACKENDS = (
+    'matplotlib',
+    'plotly',
+    'pingouin',
+    'scikit_posthocs',
+    'statsmodels',
+    'rpy2',
+)
+
+CORE_IMPORT = 'import numpy, pandas, scipy.stats'
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'elapsed': elapsed, 'modules': sorted(sys.modules)}}))
+"""
+
+
+def _cold_import(statement: str, repeat: int) -> tuple[float, list[str]]:
+    root = Path(__file__).parents[1]
+    best, modules = float('inf'), []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-c', _PROBE.format(statement=statement)],
+            cwd=root,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout
+        result = json.loads(output.splitlines()[-1])
+        if result['elapsed'] < best:
+            best, modules = result['elapsed'], result['modules']
+    return best, modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--budget',
+        type=float,
+        default=0.3,
+        help='Allowed import time of goggles on top of its scientific core, in seconds.',
+    )
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    core, _ = _cold_import(CORE_IMPORT, args.repeat)
+    package, modules = _cold_import('import goggles', args.repeat)
+    overhead = package - core
+    print(f'core {core:.3f}s, goggles {package:.3f}s, overhead {overhead:.3f}s')
+
+    failed = False
+    loaded = sorted({
+        module.split('.')[0] for module in modules if module.split('.')[0] in HEAVY_BACKENDS
+    })
+    if loaded:
+        print(f'FAIL: importing goggles loads {", ".join(loaded)}')
+        failed = True
+    if overhead > args.budget:
+        print(f'FAIL: import overhead exceeds the budget of {args.budget:.3f}s')
+        failed = True
+    return int(failed)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""Guard the scaling of the analysis of variance to many groups.
+
+Times the analysis of one column, and its post hoc tests (Tukey's HSD, Games-Howell, Dunn and the
+linear contrasts of trimmed means) of all pairs, for synthetic samples of an increasing number of
+groups. The number of pairs grows quadratically with the number of groups; the time must not, so
+the benchmark fails when the time grows faster than ``k ** max_exponent`` between the smallest
+and the largest number of groups.
+
+Run from the repository root with
+``python -m benchmarks.many_groups [--groups 10 25 50] [--max-exponent 1.5] [--scipy]``.
+"""
+import argparse
+import io
+import logging
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from goggles import analysis_of_variance, nonparametric, parametric, posthoc, results
+from goggles.group_stats import GroupStats
+from goggles.plotting import PlotQueue
+from goggles.results import ResultsStore
+from goggles.trimmed_means import lincon
+
+logger = logging.getLogger('colour')
+
+
+def synthetic_samples(k: int, size: int = 20, seed: int = 0) -> dict[str, pd.Series]:
+    """Normal samples of k conditions whose means increase by 0.05 standard deviations."""
+    rng = np.random.default_rng(seed)
+    return {f'Condition {i:02d}': pd.Series(rng.normal(0.05 * i, 1, size)) for i in range(k)}
+
+
+def post_hoc(samples: dict[str, pd.Series], stats: GroupStats) -> None:
+    parametric.pairwise_comparisons(samples, stats=stats)
+    nonparametric.mean_equality_between_groups(samples, marginal_alpha=1, stats=stats)
+    nonparametric.pairwise_comparisons_dunn(samples, stats=stats)
+    lincon(samples)
+
+
+def _time(function, repeat: int) -> float:
+    function()  # Warm up the imports and the caches of the number of groups.
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--groups', type=int, nargs='+', default=[10, 25, 50])
+    parser.add_argument(
+        '--max-exponent',
+        type=float,
+        default=1.5,
+        help='Allowed growth of the time with the number of groups, 2 being quadratic.',
+    )
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument(
+        '--scipy',
+        action='store_true',
+        help="Compare the p-values of Tukey's HSD of the largest number of groups with scipy.",
+    )
+    args = parser.parse_args()
+
+    # The tables are formatted as when they are logged, but not written anywhere.
+    logger.handlers = [logging.StreamHandler(io.StringIO())]
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+
+    timings = {}
+    with tempfile.TemporaryDirectory() as folder, results.collecting(ResultsStore()):
+        for k in args.groups:
+            samples = synthetic_samples(k)
+            stats = GroupStats.from_samples(samples)
+            timings[k] = (
+                _time(lambda: post_hoc(samples, stats), args.repeat),
+                _time(
+                    lambda: analysis_of_variance(
+                        'Synthetic', samples, Path(folder), 'x', n_bootstrap=1000, seed=0,
+                        plots=PlotQueue(False),
+                    ),
+                    args.repeat,
+                ),
+            )
+            pairs = k * (k - 1) // 2
+            print(
+                f'k={k} ({pairs} pairs): post hoc {timings[k][0]:.3f}s '
+                f'({timings[k][0] / pairs * 1e6:.0f} us per pair), analysis {timings[k][1]:.3f}s'
+            )
+
+    if args.scipy:
+        from scipy.stats import studentized_range
+
+        samples = synthetic_samples(max(args.groups))
+        stats = GroupStats.from_samples(samples)
+        first, second = posthoc.pairs(stats.k)
+        df = stats.n - stats.k
+        se = np.sqrt(stats.ss_within / df / 2 * (1 / stats.sizes[first] + 1 / stats.sizes[second]))
+        q = np.abs(stats.means[first] - stats.means[second]) / se
+        scipy_time = _time(lambda: studentized_range.sf(q, stats.k, df), 1)
+        difference = np.abs(
+            posthoc.studentized_range_sf(q, stats.k, df) - studentized_range.sf(q, stats.k, df)
+        ).max()
+        print(
+            f'scipy studentized range of {len(q)} pairs: {scipy_time:.3f}s, '
+            f'largest difference of the p-values {difference:.1e}'
+        )
+
+    smallest, largest = min(timings), max(timings)
+    failed = False
+    for stage, name in enumerate(('post hoc', 'analysis')):
+        exponent = np.log(timings[largest][stage] / timings[smallest][stage]) / np.log(
+            largest / smallest
+        )
+        print(f'{name} time grows as k ** {exponent:.2f}')
+        if exponent > args.max_exponent:
+            print(f'FAIL: {name} time grows faster than k ** {args.max_exponent}')
+            failed = True
+    return int(failed)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
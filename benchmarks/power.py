@@ -0,0 +1,63 @@
+"""Compare the batched power simulation with testing every synthetic dataset separately.
+
+Both engines test the same datasets, drawn once, so their powers of the F and Kruskal-Wallis
+tests are identical and only their speeds differ.
+
+Run from the repository root with ``python -m benchmarks.power``.
+"""
+import timeit
+
+import numpy as np
+from scipy.stats import f_oneway, kruskal
+
+from goggles.power import calculate_anova_power, group_means, p_values
+
+
+def draw_datasets(n_per_group, effect_size, n_simulations=2000, seed=0):
+    """Datasets of three normal groups of unit variance, one per row, and the group sizes."""
+    sizes = np.full(3, n_per_group)
+    locations = np.repeat(group_means(effect_size, sizes, np.ones(len(sizes))), sizes)
+    rng = np.random.default_rng(seed)
+    return rng.normal(locations, 1, (n_simulations, sizes.sum())), sizes
+
+
+def loop_power(x, sizes, alpha=0.05):
+    """Power of the F and Kruskal-Wallis tests, testing every dataset with scipy."""
+    bounds = np.cumsum(sizes)[:-1]
+    rejections = {'f': 0, 'kruskal': 0}
+    for row in x:
+        groups = np.split(row, bounds)
+        rejections['f'] += f_oneway(*groups).pvalue < alpha
+        rejections['kruskal'] += kruskal(*groups).pvalue < alpha
+    return {test: count / len(x) for test, count in rejections.items()}
+
+
+def batched_power(x, sizes, alpha=0.05):
+    """Power of the F, Welch F, Kruskal-Wallis and trimmed means tests, testing all datasets
+    at once.
+    """
+    return {test: float((p < alpha).mean()) for test, p in p_values(x, sizes).items()}
+
+
+def main():
+    for size in (20, 67):
+        effect_size = 0.25
+        x, sizes = draw_datasets(size, effect_size)
+        loop = min(timeit.repeat(lambda: loop_power(x, sizes), number=1, repeat=3))
+        batched = min(timeit.repeat(lambda: batched_power(x, sizes), number=1, repeat=3))
+        loop_powers = loop_power(x, sizes)
+        power = batched_power(x, sizes)
+        analytic = calculate_anova_power(effect_size, *[range(size)] * 3)
+        print(
+            f'n={size} per group, f={effect_size}, {len(x)} datasets: '
+            f'analytic F power {analytic:.3f}; '
+            f'loop (F, Kruskal) {loop:.3f}s '
+            f"(power {loop_powers['f']:.3f}, {loop_powers['kruskal']:.3f}); "
+            f'batched (F, Welch, Kruskal, trimmed) {batched:.3f}s '
+            f"(power {power['f']:.3f}, {power['welch']:.3f}, {power['kruskal']:.3f}, "
+            f"{power['trimmed']:.3f}); speed-up {loop / batched:.1f}x"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Check the NumPy robust ANOVA against WRS2 on the repository's data and compare timings.
+
+Requires R with WRS2 and rpy2. Run from the repository root with
+``python -m benchmarks.robust_anova``.
+"""
+import timeit
+from pathlib import Path
+
+import numpy as np
+
+from goggles import collate_samples, read_data, robust_anova
+
+COLUMNS = ['R jacket', 'R helmet + face', 'R bucket', 'Y bucket', 'Y bag', 'Y helmet + face']
+SHEETS = {
+    'Transparent': 'TFD_T_Total_Fixation_Duration',
+    'Yellow': 'TFD_Y_Total_Fixation_Duration',
+    'Red': 'TFD_R_Total_Fixation_Duration',
+}
+
+
+def main():
+    data_file_path = Path(__file__).parents[1].joinpath('data', '20241217', 'data.ods')
+    dfs = read_data(data_file_path, SHEETS)
+    for col in COLUMNS:
+        samples = collate_samples(dfs, col, 'TFD')
+        for tr in (0.0, 0.2):
+            r = robust_anova.one_way_anova(samples, tr=tr, backend='r')
+            python = robust_anova.one_way_anova(samples, tr=tr, backend='python')
+            # WRS2 orders the groups alphabetically, so contrasts are compared by group pair.
+            r_p = {
+                frozenset((row['Group 1'], row['Group 2'])): row['p-value']
+                for _, row in r.comparisons.iterrows()
+            }
+            python_p = {
+                frozenset((row['Group 1'], row['Group 2'])): row['p-value']
+                for _, row in python.comparisons.iterrows()
+            }
+            matches = (
+                np.allclose(r[:4], python[:4])
+                and all(np.isclose(r_p[pair], python_p[pair]) for pair in r_p)
+            )
+            r_time = min(timeit.repeat(
+                lambda: robust_anova.one_way_anova(samples, tr=tr, backend='r'),
+                number=1,
+                repeat=3,
+            ))
+            python_time = min(timeit.repeat(
+                lambda: robust_anova.one_way_anova(samples, tr=tr, backend='python'),
+                number=1,
+                repeat=3,
+            ))
+            print(
+                f'{col}, tr={tr}: {"match" if matches else "MISMATCH"}, '
+                f'effect size R {r.effect_size:.4f} / Python {python.effect_size:.4f}, '
+                f'R {r_time:.3f}s, Python {python_time:.3f}s'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,441 @@
+"""Time every statistical entry point on synthetic eye-tracking data, tracking regressions.
+
+Every benchmark is registered with ``@benchmark`` and runs for each combination of the number of
+observations per group and the number of groups. Its setup receives the synthetic ``Dataset`` of
+the combination and returns the call that is timed, so that preparing the inputs is not timed.
+Combinations of more observations in total than a benchmark's ``max_observations`` are skipped.
+
+The samples mimic total fixation durations: log-normal, in seconds rounded to milliseconds, with
+some participants who never fixated the AOI and some missing values.
+
+The timings of a run are compared with the last saved time of every case in the machine's
+baseline file, by default ``benchmarks/baselines/<host name>.json``, and the suite fails when any
+case is slower than its baseline by more than the threshold. Saved runs are kept, so the file
+records the timings over time. Timings are only comparable on the machine that measured them, so
+no baseline is shipped: the first run with ``--save`` on a machine creates its baseline file.
+
+Run from the repository root with
+``python -m benchmarks.suite [--filter REGEX] [--sizes 50 500 50000] [--groups 3 10 50] [--save]``
+or print the saved runs with ``python -m benchmarks.suite --history``.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import timeit
+import warnings
+from collections import namedtuple
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from goggles import (
+    assumptions,
+    collate_matrix,
+    collate_samples,
+    evaluate_differences_in_means,
+    posthoc,
+    read_data,
+    workbook,
+)
+from goggles.bootstrap import bootstrap_anova
+from goggles.effect_size import anova_eta_squared
+from goggles.group_stats import GroupStats
+from goggles.results import ResultsStore
+from goggles.trimmed_means import lincon
+from goggles.utils import trim_data
+
+logger = logging.getLogger('colour')
+
+ROOT = Path(__file__).parents[1]
+BASELINES_FOLDER = Path(__file__).parent.joinpath('baselines')
+WORKBOOKS_FOLDER = Path(__file__).parent.joinpath('.workbooks.cache')
+
+SIZES = (50, 500, 50_000)
+GROUPS = (3, 10, 50)
+
+AOI_COLUMNS = ['R jacket', 'R helmet + face', 'R bucket', 'Y bucket', 'Y bag', 'Y helmet + face']
+SUBJECT_COLUMN = 'Participant nr'
+FACTOR = 'TFD'
+
+# Fractions of the participants who never fixated an AOI, and of missing values.
+ZERO_FRACTION = 0.1
+MISSING_FRACTION = 0.02
+
+Benchmark = namedtuple('Benchmark', ('name', 'setup', 'max_observations'))
+
+BENCHMARKS: dict[str, Benchmark] = {}
+
+
+def benchmark(max_observations: int | None = None):
+    """Register the setup of a benchmark, named after the function.
+
+    :param max_observations: Largest total number of observations the benchmark runs for.
+    """
+
+    def decorator(setup):
+        BENCHMARKS[setup.__name__] = Benchmark(setup.__name__, setup, max_observations)
+        return setup
+
+    return decorator
+
+
+def eye_tracking_frames(size: int, k: int, seed: int = 0) -> dict[str, pd.DataFrame]:
+    """Frames of k groups of participants, with a column of fixation durations of every AOI.
+
+    The durations of the groups are log-normal, whose medians increase by 5% from group to group.
+    """
+    rng = np.random.default_rng(seed)
+    frames = {}
+    for i in range(k):
+        durations = rng.lognormal(-0.5 + 0.05 * i, 0.8, (size, len(AOI_COLUMNS))).round(3)
+        durations[rng.random(durations.shape) < ZERO_FRACTION] = 0
+        durations[rng.random(durations.shape) < MISSING_FRACTION] = np.nan
+        frame = pd.DataFrame(durations, columns=AOI_COLUMNS)
+        frame.insert(0, SUBJECT_COLUMN, np.arange(i * size, (i + 1) * size) + 1)
+        frames[f'Goggles {i:02d}'] = frame
+    return frames
+
+
+class Dataset:
+    """Synthetic data of one combination, the collated samples of its first AOI and their
+    statistics.
+    """
+
+    def __init__(self, size: int, k: int, folder: Path):
+        self.size = size
+        self.k = k
+        self.folder = folder
+        self.frames = eye_tracking_frames(size, k)
+        self.column = AOI_COLUMNS[0]
+        self.samples = collate_samples(self.frames, self.column, FACTOR)
+        self.stats = GroupStats.from_samples(self.samples)
+
+    @property
+    def observations(self) -> int:
+        return self.size * self.k
+
+    def workbook(self) -> tuple[Path, dict[str, str]]:
+        """ODS workbook of the frames, laid out as the studies' workbooks, and its sheets.
+
+        Writing a large workbook takes minutes, so every workbook is written once per machine, in
+        ``WORKBOOKS_FOLDER``, and named by a digest of its frames.
+        """
+        sheets = {name: f'{FACTOR}_{name}' for name in self.frames}
+        digest = hashlib.sha256()
+        for name, frame in self.frames.items():
+            digest.update(sheets[name].encode())
+            digest.update(frame.to_numpy().tobytes())
+        path = WORKBOOKS_FOLDER.joinpath(f'n{self.size}_k{self.k}_{digest.hexdigest()[:16]}.ods')
+        if not path.exists():
+            WORKBOOKS_FOLDER.mkdir(exist_ok=True)
+            temporary_path = path.with_suffix('.tmp')
+            with pd.ExcelWriter(temporary_path, engine='odf') as writer:
+                for name, frame in self.frames.items():
+                    # A title row and an index column, as read by DEFAULT_READ_OPTIONS.
+                    frame.to_excel(writer, sheet_name=sheets[name], startrow=1)
+            os.replace(temporary_path, path)
+        return path, sheets
+
+
+@benchmark()
+def collate(data: Dataset):
+    return lambda: collate_matrix(data.frames, AOI_COLUMNS, FACTOR)
+
+
+@benchmark()
+def collate_column(data: Dataset):
+    return lambda: collate_samples(data.frames, data.column, FACTOR)
+
+
+@benchmark()
+def trim(data: Dataset):
+    return lambda: [trim_data(sample, 0.2) for sample in data.samples.values()]
+
+
+@benchmark()
+def group_stats(data: Dataset):
+    return lambda: GroupStats.from_samples(data.samples)
+
+
+@benchmark()
+def normality(data: Dataset):
+    return lambda: assumptions.normality(data.samples)
+
+
+@benchmark()
+def equal_variances(data: Dataset):
+    return lambda: assumptions.equal_variances(stats=data.stats)
+
+
+@benchmark()
+def eta_squared(data: Dataset):
+    return lambda: anova_eta_squared(stats=data.stats)
+
+
+@benchmark(max_observations=200_000)
+def bootstrap(data: Dataset):
+    groups = data.stats.groups()
+    return lambda: bootstrap_anova(groups, n_bootstrap=1000, seed=0)
+
+
+@benchmark()
+def tukey_hsd(data: Dataset):
+    return lambda: posthoc.tukey_hsd(data.stats)
+
+
+@benchmark()
+def games_howell(data: Dataset):
+    return lambda: posthoc.games_howell(data.stats)
+
+
+@benchmark()
+def dunn(data: Dataset):
+    return lambda: posthoc.dunn(data.stats)
+
+
+@benchmark()
+def conover(data: Dataset):
+    return lambda: posthoc.conover(data.stats)
+
+
+@benchmark()
+def trimmed_means_lincon(data: Dataset):
+    return lambda: lincon(data.samples, tr=0.2)
+
+
+# For 3 groups of 50000 observations, writing the ODS workbook takes about 20 minutes with a peak
+# RSS of 2.5 GB, once per machine, and parsing it 1 to 2 minutes with a peak RSS of 3.2 GB. The
+# workbooks are parsed for every size of 3 groups, but not for 500000 observations and more.
+@benchmark(max_observations=150_000)
+def parse_workbook(data: Dataset):
+    path, sheets = data.workbook()
+
+    def read():
+        workbook.clear_cache()
+        return read_data(path, sheets)
+
+    return read
+
+
+@benchmark(max_observations=150_000)
+def load_persisted_workbook(data: Dataset):
+    path, sheets = data.workbook()
+    workbook.clear_cache()
+    read_data(path, sheets, persist='feather')
+
+    def read():
+        workbook.clear_cache()
+        return read_data(path, sheets, persist='feather')
+
+    return read
+
+
+# A full analysis of 3 groups of 50000 observations takes about 40 s, with a peak RSS of 300 MB, so
+# it runs for every size of 3 groups, but not for 500000 observations and more.
+@benchmark(max_observations=150_000)
+def evaluate(data: Dataset):
+    results_folder = data.folder.joinpath(f'results_n{data.size}_k{data.k}')
+    return lambda: evaluate_differences_in_means(
+        data.frames,
+        AOI_COLUMNS[:2],
+        FACTOR,
+        trim_fraction=0.2,
+        calculate_boxcox=True,
+        n_bootstrap=1000,
+        seed=0,
+        render_plots=False,
+        reuse_results=False,
+        results_folder=results_folder,
+        store=ResultsStore(),
+    )
+
+
+def case_name(name: str, size: int, k: int) -> str:
+    return f'{name}[n={size},k={k}]'
+
+
+def _time(function, repeat: int) -> float:
+    """Best time of one call, calling fast functions enough times to last at least 0.2 s."""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+class _FormattingHandler(logging.Handler):
+    """Format the records, as when they are logged, without writing them anywhere."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.format(record)
+
+
+def run(pattern: str, sizes, groups, repeat: int) -> dict[str, float]:
+    """Time the benchmarks whose case name matches the pattern.
+
+    :return: A case name - best time of one call, in seconds, dictionary.
+    """
+    selected = re.compile(pattern)
+    timings = {}
+    with tempfile.TemporaryDirectory() as folder:
+        for size in sizes:
+            for k in groups:
+                cases = [
+                    bench for bench in BENCHMARKS.values()
+                    if selected.search(case_name(bench.name, size, k))
+                    and (bench.max_observations is None or size * k <= bench.max_observations)
+                ]
+                if not cases:
+                    continue
+                data = Dataset(size, k, Path(folder))
+                for bench in cases:
+                    name = case_name(bench.name, size, k)
+                    timings[name] = _time(bench.setup(data), repeat)
+                    print(f'{name}: {timings[name] * 1e3:.3f} ms', flush=True)
+    return timings
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_runs(path: Path) -> list[dict]:
+    """Saved runs of the baseline file, the oldest first."""
+    if not path.exists():
+        return []
+    return json.loads(path.read_text())['runs']
+
+
+def save_run(path: Path, timings: dict[str, float]) -> None:
+    """Append the run's timings to the baseline file."""
+    runs = load_runs(path)
+    runs.append({
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'commit': _commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'scipy': __import__('scipy').__version__,
+        'pandas': pd.__version__,
+        'timings': timings,
+    })
+    path.parent.mkdir(exist_ok=True, parents=True)
+    path.write_text(json.dumps({'machine': platform.node(), 'runs': runs}, indent=1))
+
+
+def latest_timings(runs: list[dict]) -> dict[str, float]:
+    """Time of every case in the last saved run that timed it."""
+    timings = {}
+    for run in runs:
+        timings.update(run['timings'])
+    return timings
+
+
+def compare(
+    timings: dict[str, float],
+    baseline: dict[str, float],
+    threshold: float,
+) -> pd.DataFrame:
+    """Ratio of every case's time to its baseline, for the cases of both.
+
+    :param threshold: Ratio above which a case has regressed.
+    """
+    cases = [name for name in timings if name in baseline]
+    table = pd.DataFrame({
+        'case': cases,
+        'baseline [ms]': [baseline[name] * 1e3 for name in cases],
+        'time [ms]': [timings[name] * 1e3 for name in cases],
+    })
+    table['ratio'] = table['time [ms]'] / table['baseline [ms]']
+    table['regressed'] = table['ratio'] > threshold
+    return table
+
+
+def history(runs: list[dict], pattern: str) -> pd.DataFrame:
+    """Times in ms of the cases matching the pattern, with a column of every saved run."""
+    selected = re.compile(pattern)
+    return pd.DataFrame({
+        f"{run['date']} {run['commit'] or ''}".strip(): {
+            name: seconds * 1e3 for name, seconds in run['timings'].items()
+            if selected.search(name)
+        }
+        for run in runs
+    })
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--filter', default='', help='Regular expression of the cases to run')
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=SIZES, help='Observations per group'
+    )
+    parser.add_argument('--groups', type=int, nargs='+', default=GROUPS, help='Numbers of groups')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument(
+        '--baseline',
+        type=Path,
+        default=BASELINES_FOLDER.joinpath(f'{platform.node()}.json'),
+        help='JSON file of the saved runs of this machine',
+    )
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=1.3,
+        help='Ratio of the time to the baseline above which a case has regressed',
+    )
+    parser.add_argument('--save', action='store_true', help='Append the run to the baseline file')
+    parser.add_argument(
+        '--history', action='store_true', help='Print the saved runs instead of running'
+    )
+    args = parser.parse_args()
+
+    runs = load_runs(args.baseline)
+    if args.history:
+        if not runs:
+            print(f'No saved runs in {args.baseline}')
+        else:
+            print(history(runs, args.filter).to_string(float_format='{:.3f}'.format))
+        return 0
+
+    # The tables are formatted as when they are logged, but not written anywhere, and the
+    # warnings of large samples, e.g. of Shapiro-Wilk's p-value above 5000 observations, ignored.
+    logger.handlers = [_FormattingHandler()]
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    warnings.simplefilter('ignore')
+
+    timings = run(args.filter, args.sizes, args.groups, args.repeat)
+
+    failed = False
+    table = compare(timings, latest_timings(runs), args.threshold)
+    if table.empty:
+        print(f'\nNo baseline of these cases in {args.baseline}, save one with --save')
+    else:
+        print('\nCompared with the last saved time of every case:')
+        print(table.to_string(index=False, float_format='{:.3f}'.format))
+        for name in table.loc[table['regressed'], 'case']:
+            print(f'FAIL: {name} is slower than the baseline by more than {args.threshold}x')
+            failed = True
+    if args.save:
+        save_run(args.baseline, timings)
+        print(f'Saved the run to {args.baseline}')
+    return int(failed)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,166 +1,435 @@
 import logging
-from collections.abc import Sequence
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
 
-import numpy as np
 import pandas as pd
-import scipy.stats
-from scipy.stats import median_test
 
-from goggles import assumptions, descriptive, effect_size, nonparametric, parametric, robust_anova
+from goggles import (
+    assumptions,
+    column_cache,
+    descriptive,
+    effect_size,
+    nonparametric,
+    parametric,
+    permutation,
+    profiling,
+    results,
+    robust_anova,
+)
+from goggles.bootstrap import bootstrap_anova
+from goggles.column_cache import ColumnOutcome
+from goggles.group_stats import GroupStats
+from goggles.plotting import PlotQueue
+from goggles.results import ResultsStore
+from goggles.samples import SampleMatrix
+from goggles.stats import MARGINAL_ALPHA, MAX_REPORTED_PAIRS
 from goggles.power import calculate_anova_power
-from goggles.utils import trim_data
+from goggles.preprocessing import Preprocessing
+from goggles.transforms import TransformCache
+from goggles.utils import capture_log_records, replay_log_records
+from goggles.workbook import read_sheets
 
 logger = logging.getLogger("colour")
 
+RESULTS_FOLDER = Path(__file__).parents[1].joinpath('results')
 
-def bootstrap_anova(groups, n_bootstrap=10000):
-    observed_means = [np.mean(group) for group in groups]
-    observed_stat = np.var(observed_means)
-
-    combined = np.concatenate(groups)
-    bootstrap_stats = []
-
-    for _ in range(n_bootstrap):
-        resampled = [np.random.choice(combined, size=len(group), replace=True) for group in groups]
-        bootstrap_means = [np.mean(resampled_group) for resampled_group in resampled]
-        bootstrap_stats.append(np.var(bootstrap_means))
-
-    p_value = np.mean(np.array(bootstrap_stats) >= observed_stat)
-    return observed_stat, p_value
-
-
-def analysis_of_variance(factor, samples, output_folder, col):
-    logger.debug('Descriptive statistics')
-    descriptive.describe(samples)
-    logger.debug('ANOVA Assumptions')
-    assumptions_passed = True
-    logger.debug('\n1. Equal cell sizes')
-    equal_cell_sizes = assumptions.equal_size_samples(*samples.values())
-    assumptions_passed &= equal_cell_sizes
-    logger.debug('\n2. Normality')
-    normality = assumptions.normality(samples, output_folder)
-    assumptions_passed &= normality
-    logger.debug('\n3. Homoscedasticity')
-    homoscedasticity = assumptions.equal_variances(*samples.values())
-    assumptions_passed &= homoscedasticity
-    logger.debug('\nKruskal-Wallis Test Assumptions')
-    logger.debug('4. Similarity of shape')
-    logger.debug('Shape should be verified manually in the associated distribution plots.')
-    assumptions.similarity_of_shape(factor, col, samples, output_folder)
-
-    stat, p_value, _, _ = median_test(*samples.values())
-    logger.debug(f"\nMood's Median Test statistic: {stat}, P-value: {p_value}")
-
-    stat, p_val = bootstrap_anova([*samples.values()])
-    logger.debug(f"\nBootstrap ANOVA statistic: {stat}, P-value: {p_val}")
-
-    if assumptions_passed:
-        logger.debug('\nAll ANOVA assumptions have passed.')
-        if parametric.mean_equality_between_groups(*samples.values()):
-            result = parametric.pairwise_comparisons(samples)
-            if result:
-                logger.debug('At least one pair has significantly different means by ANOVA.')
-            else:
-                logger.debug('No significant differences in pairs\' means by ANOVA.')
-        logger.debug(f'Effect size: {effect_size.anova_eta_squared(*samples.values())}')
-    elif not homoscedasticity and normality:
-        logger.debug('\nNot all ANOVA assumptions have passed. Switching to Welch\'s ANOVA.')
-        nonparametric.mean_equality_between_groups(samples)
-    elif not normality and homoscedasticity:
+# TTFF bucket observations at or above the cutoff are excluded from the analysis.
+TTFF_BUCKET_CUTOFF = 11
+
+COLUMN_SEPARATOR = "--------------------------------------------------------------------------\n"
+
+PERMUTATION_TEST_NAMES = {
+    'f': 'ANOVA F',
+    'welch': "Welch's ANOVA F",
+    'kruskal': 'Kruskal-Wallis H',
+    'median': "Mood's median chi-squared",
+}
+
+
+def analysis_of_variance(
+    factor,
+    samples,
+    output_folder,
+    col,
+    n_bootstrap=10000,
+    seed=None,
+    plots: PlotQueue | None = None,
+    alpha: float = 0.05,
+    max_pairs: int | None = MAX_REPORTED_PAIRS,
+):
+    with results.scope(factor=factor, column=col), profiling.stage('analysis_of_variance'):
+        with profiling.stage('group_stats'):
+            stats = GroupStats.from_samples(samples)
+        logger.debug('Descriptive statistics')
+        with profiling.stage('describe'):
+            descriptive.describe(samples, stats)
+        logger.debug('ANOVA Assumptions')
+        assumptions_passed = True
+        logger.debug('\n1. Equal cell sizes')
+        with profiling.stage('equal_size_samples'):
+            sizes_record = assumptions.equal_size_samples(alpha=alpha, stats=stats)
+        results.add(sizes_record)
+        assumptions_passed &= sizes_record.pvalue > alpha
+        logger.debug('\n2. Normality')
+        with profiling.stage('normality'):
+            normality_records = assumptions.normality(samples, output_folder, alpha, plots)
+        results.add(*normality_records)
+        normality = not any(record.pvalue < alpha for record in normality_records)
+        assumptions_passed &= normality
+        logger.debug('\n3. Homoscedasticity')
+        with profiling.stage('equal_variances'):
+            variances_record = assumptions.equal_variances(alpha=alpha, stats=stats)
+        results.add(variances_record)
+        homoscedasticity = variances_record.pvalue > alpha
+        assumptions_passed &= homoscedasticity
+        logger.debug('\nKruskal-Wallis Test Assumptions')
+        logger.debug('4. Similarity of shape')
+        logger.debug('Shape should be verified manually in the associated distribution plots.')
+        with profiling.stage('similarity_of_shape'):
+            assumptions.similarity_of_shape(factor, col, samples, output_folder, plots)
+
+        with profiling.stage('median_test'):
+            stat, p_value = nonparametric.median_test(stats)
+        results.record('median_test', stat, p_value)
+        logger.debug(f"\nMood's Median Test statistic: {stat}, P-value: {p_value}")
+
+        with profiling.stage('bootstrap_anova'):
+            stat, p_val, (ci_low, ci_high) = bootstrap_anova(
+                stats.groups(), n_bootstrap=n_bootstrap, seed=seed
+            )
+        results.record('bootstrap_anova', stat, p_val, ci_low=ci_low, ci_high=ci_high)
         logger.debug(
-            '\nNormality not passed, but variance roughly equal. Switching to Kruskal-Wallis test'
+            f"\nBootstrap ANOVA statistic: {stat}, P-value: {p_val}, 95% CI: [{ci_low}, {ci_high}]"
         )
-        if nonparametric.kruskal_wallis_nonparametric_anova(*samples.values()):
-            nonparametric.pairwise_comparisons_dunn(samples)
-            logger.debug(f'Effect size: {effect_size.kruskal_wallis_eta_squared(*samples.values())}')
-    else:
-        logger.debug('Neither normality nor homoscedasticity')
 
-    logger.debug('Running Robust ANOVA')
-    robust_anova.one_way_anova(samples)
+        logger.debug('\nPermutation tests')
+        with profiling.stage('permutation_anova'):
+            permuted = permutation.permutation_anova(stats=stats, alpha=alpha, seed=seed)
+        for test, res in permuted.items():
+            kind = 'exact' if res.exact else 'Monte Carlo'
+            results.record(f'permutation_{test}', res.statistic, res.pvalue)
+            logger.debug(
+                f"{PERMUTATION_TEST_NAMES[test]} statistic: {res.statistic}, P-value: {res.pvalue} "
+                f"({kind}, {res.n_permutations} permutations)"
+            )
 
+        if assumptions_passed:
+            logger.debug('\nAll ANOVA assumptions have passed.')
+            with profiling.stage('anova'):
+                anova_record = parametric.mean_equality_between_groups(alpha=alpha, stats=stats)
+            results.add(anova_record)
+            if anova_record.pvalue <= MARGINAL_ALPHA:
+                with profiling.stage('tukey_hsd'):
+                    pair_records = parametric.pairwise_comparisons(
+                        samples, alpha, stats, max_pairs
+                    )
+                results.add(*pair_records)
+                if any(record.pvalue <= alpha for record in pair_records):
+                    logger.debug('At least one pair has significantly different means by ANOVA.')
+                else:
+                    logger.debug('No significant differences in pairs\' means by ANOVA.')
+            eta_squared = effect_size.anova_eta_squared(stats=stats)
+            results.record('eta_squared', effect_size=eta_squared)
+            logger.debug(f'Effect size: {eta_squared}')
+        elif not homoscedasticity and normality:
+            logger.debug('\nNot all ANOVA assumptions have passed. Switching to Welch\'s ANOVA.')
+            with profiling.stage('welch_anova'):
+                welch_records = nonparametric.mean_equality_between_groups(
+                    samples, alpha, stats=stats, max_pairs=max_pairs
+                )
+            results.add(*welch_records)
+        elif not normality and homoscedasticity:
+            logger.debug(
+                '\nNormality not passed, but variance roughly equal. '
+                'Switching to Kruskal-Wallis test'
+            )
+            with profiling.stage('kruskal_wallis'):
+                kruskal_record = nonparametric.kruskal_wallis_nonparametric_anova(
+                    alpha=alpha, stats=stats
+                )
+            results.add(kruskal_record)
+            if kruskal_record.pvalue <= MARGINAL_ALPHA:
+                with profiling.stage('dunn'):
+                    dunn_records = nonparametric.pairwise_comparisons_dunn(
+                        samples, alpha, stats=stats, max_pairs=max_pairs
+                    )
+                results.add(*dunn_records)
+                eta_squared = effect_size.kruskal_wallis_eta_squared(stats=stats)
+                results.record('rank_eta_squared', effect_size=eta_squared)
+                logger.debug(f'Effect size: {eta_squared}')
+        else:
+            logger.debug('Neither normality nor homoscedasticity')
 
-def read_data(file_path: Path, sheets: dict[str, str]):
-    return {
-        group_name: pd.read_excel(
-            file_path,
-            sheet_name=sheet_name,
-            usecols=range(1, 8),
-            engine='odf',
-            skiprows=1,
-        )
-        for group_name, sheet_name in sheets.items()
-    }
+        logger.debug('Running Robust ANOVA')
+        with profiling.stage('robust_anova'):
+            robust_anova.one_way_anova(samples, alpha=alpha, seed=seed, max_pairs=max_pairs)
+
+
+DEFAULT_READ_OPTIONS = {'usecols': range(1, 8), 'skiprows': 1}
+
+
+def read_data(
+    file_path: Path,
+    sheets: dict[str, str],
+    persist: str | None = None,
+    read_options: dict | None = None,
+):
+    """Read the sheet of every group.
+
+    :param read_options: Keyword arguments of ``pandas.read_excel``, by default
+    ``DEFAULT_READ_OPTIONS``.
+    """
+    if read_options is None:
+        read_options = DEFAULT_READ_OPTIONS
+    frames = read_sheets(file_path, sheets.values(), persist=persist, **read_options)
+    return {group_name: frames[sheet_name] for group_name, sheet_name in sheets.items()}
 
 
-def calculate_boxcox_lambdas(dfs, columns, factor):
-    lambdas_ = []
-    for col in columns:
-        samples = collate_samples(dfs, col, factor)
-        all_samples = pd.concat(samples.values())
-        _, lambda_ = scipy.stats.yeojohnson(all_samples)
-        lambdas_.append(lambda_)
+def calculate_boxcox_lambdas(
+    matrix: SampleMatrix,
+    columns,
+    transforms: TransformCache | None = None,
+):
+    """Fit the lambdas of all columns at once, by default of the Yeo-Johnson transformation.
+
+    :param matrix: Collated samples of the columns, see ``collate_matrix``.
+    :param transforms: Cache that keeps the lambdas and the transformed samples of the columns.
+    """
+    if transforms is None:
+        transforms = TransformCache()
+    lambdas_ = transforms.fit({col: matrix.samples(col) for col in columns})
     logger.debug(f'Calculated lambdas: {lambdas_}')
     return lambdas_
 
 
+def collate_matrix(dfs, columns, factor) -> SampleMatrix:
+    """Collate the columns of the groups' frames, excluding the observations filtered out for the
+    factor. The frames are not modified.
+    """
+    matrix = SampleMatrix(dfs, columns)
+    if factor == 'TTFF':
+        for col in columns:
+            if 'bucket' in col:
+                matrix.exclude(col, matrix.column(col) >= TTFF_BUCKET_CUTOFF)
+    return matrix
+
+
 def collate_samples(dfs, col, factor):
-    for df_name, df in dfs.items():
-        if factor == 'TTFF' and 'bucket' in col:
-            dfs[df_name].loc[df[col] >= 11] = np.nan
+    return collate_matrix(dfs, [col], factor).samples(col)
+
+
+def _prepare_samples(
+    col,
+    samples,
+    col_lambda,
+    preprocessing: Preprocessing,
+    transforms: TransformCache,
+):
+    masks = {sample_name: slice(None) for sample_name in samples}
+    if not preprocessing.enabled:
+        logger.debug(f"Trim fraction {preprocessing.fraction} outside of (0,1), not trimming")
+    elif preprocessing.method == 'trim':
+        logger.debug(preprocessing.description)
+        with profiling.stage('trim'):
+            logger.debug(f"Observations trimmed: {preprocessing.counts(col)}")
+            masks = preprocessing.masks(col)
+    else:
+        logger.debug(preprocessing.description)
+        with profiling.stage('winsorize'):
+            logger.debug(f"Observations winsorized: {preprocessing.counts(col)}")
+            samples = preprocessing.winsorized(col)
+    # Yeo-Johnson and Box-Cox transform every observation on its own, so selecting the trimmed
+    # observations of the transformed samples is the same as transforming the trimmed samples.
+    # Ranks depend on all observations of the column, so only the trimmed samples are ranked.
+    if transforms.method == 'rank-inverse-normal':
+        samples = {name: sample[masks[name]] for name, sample in samples.items()}
+        masks = {sample_name: slice(None) for sample_name in samples}
+    with profiling.stage('transform'):
+        transformed = transforms.transform(col, samples, col_lambda)
 
-    samples = {
-        df_name: df[col].dropna()
-        for df_name, df in dfs.items()
+    if transforms.method == 'rank-inverse-normal':
+        logger.debug(f"Performing {transforms.title} transformation")
+    else:
+        logger.debug(f"Performing {transforms.title} transformation with lambda={col_lambda}")
+    return {
+        sample_name: pd.Series(
+            transformed[sample_name].to_numpy()[masks[sample_name]],
+            name=sample_data.name,
+        )
+        for sample_name, sample_data in samples.items()
     }
-    return samples
+
+
+def _buffered_analysis_of_variance(*args, render_plots: bool, **options) -> ColumnOutcome:
+    plots = PlotQueue(render_plots)
+    store = ResultsStore()
+    with capture_log_records(logger) as records, results.collecting(store):
+        analysis_of_variance(*args, plots=plots, **options)
+    return ColumnOutcome(records, plots.jobs, store.records)
 
 
 def evaluate_differences_in_means(
-    data_file_path: Path,
+    data_file_path: Path | Mapping[str, pd.DataFrame],
     columns: Sequence[str],
     factor: str,
-    sheets: dict[str, str],
+    sheets: dict[str, str] | None = None,
     lambda_: float | list[float] = 1,
     trim_fraction: float = 0.0,
     calculate_boxcox: bool = False,
-) -> None:
-    dfs = read_data(data_file_path, sheets)
-    results_folder = Path(__file__).parents[1].joinpath('results', factor)
+    n_bootstrap: int = 10000,
+    seed: int | None = None,
+    workers: int | None = None,
+    persist: str | None = None,
+    render_plots: bool = True,
+    plot_workers: int | None = None,
+    alpha: float = 0.05,
+    reuse_results: bool = True,
+    transform: str = 'yeo-johnson',
+    trim_method: str = 'trim',
+    trim_pooled: bool = False,
+    read_options: dict | None = None,
+    results_folder: Path | None = None,
+    store: ResultsStore | None = None,
+    max_pairs: int | None = MAX_REPORTED_PAIRS,
+) -> ResultsStore:
+    """Analyse the differences in means of every column between the sheets' groups.
 
-    if not isinstance(lambda_, float):
-        lambda_ = [lambda_] * len(columns)
-    if calculate_boxcox:
-        lambda_ = calculate_boxcox_lambdas(dfs, columns, factor)
+    The results of all tests are appended to the Parquet dataset in ``results/records``.
 
-    for col, col_lambda in zip(columns, lambda_):
-        logger.debug(f"Variable: {col}")
-        output_folder = results_folder.joinpath(col)
-        output_folder.mkdir(exist_ok=True, parents=True)
+    :param data_file_path: Workbook with a sheet of every group, or a group name - data frame
+    dictionary, e.g. aggregated from an eye-tracker export by ``goggles.ingest.read_fixations``.
+    :param sheets: Group name - sheet name dictionary of the workbook, unused for data frames.
 
-        samples = collate_samples(dfs, col, factor)
+    :param workers: If given, the analyses of variance of the columns run in a pool of that many
+    processes. Every worker buffers its log records, which are then emitted in column order, so
+    the log is the same as the one of a serial run.
+    :param persist: Format in which the parsed sheets are stored next to the data file, see
+    ``goggles.workbook.read_sheets``.
+    :param render_plots: Whether to render the probability and distribution plots. They are
+    rendered after all columns are analysed, in a pool of ``plot_workers`` processes, or in this
+    process with 0 or 1, see ``PlotQueue.render``.
+    :param alpha: Significance level of the tests.
+    :param reuse_results: Whether to replay the stored log, results and plots of a column whose
+    samples, analysis parameters and package code are the same as in the previous run, instead of
+    analysing it again.
+    :param transform: Transformation of the samples, one of ``goggles.transforms.METHODS``. Every
+    column is fitted and transformed once, after which trimming selects from the transformed
+    samples, except for the rank-based transformation, which ranks the trimmed samples.
+    :param trim_method: 'trim' to remove the ``trim_fraction`` of extreme observations, or
+    'winsorize' to clip them to the quantile limits, see ``goggles.preprocessing``.
+    :param trim_pooled: Whether the limits are the quantiles of a column's pooled groups, instead
+    of the quantiles of every group.
+    :param read_options: Keyword arguments of ``pandas.read_excel``, see ``read_data``.
+    :param results_folder: Folder of the plots of the columns, by default ``results/<factor>``.
+    :param store: Store that collects the results. If given, the caller is responsible for
+    writing it, otherwise the results are written to ``results/records``.
+    :param max_pairs: Number of pairs of a post hoc test above which only its most significant
+    pairs are logged, see ``goggles.stats.top_pairs``. All pairs are recorded in the results.
+    :return: The results of all tests.
+    """
+    if isinstance(data_file_path, Mapping):
+        dfs = data_file_path
+    else:
+        with profiling.stage('read_data'):
+            dfs = read_data(data_file_path, sheets, persist, read_options)
+    if results_folder is None:
+        results_folder = RESULTS_FOLDER.joinpath(factor)
 
-        if 0 < trim_fraction < 1:
-            logger.debug(
-                f"Trimming data to [{trim_fraction / 2}, {1 - trim_fraction / 2}] quantiles"
-            )
-            samples = {
-                sample_name: trim_data(sample_data, trim_fraction)
-                for sample_name, sample_data in samples.items()
-            }
-        else:
-            logger.debug(f"Trim fraction {trim_fraction} outside of (0,1), not trimming")
+    with profiling.stage('collate'):
+        matrix = collate_matrix(dfs, columns, factor)
+    with profiling.stage('preprocessing'):
+        preprocessing = Preprocessing(matrix, trim_fraction, trim_method, trim_pooled)
+    transforms = TransformCache(transform)
+    if not isinstance(lambda_, Sequence):
+        lambda_ = [lambda_] * len(columns)
+    if calculate_boxcox:
+        with profiling.stage('fit_lambdas'):
+            lambda_ = calculate_boxcox_lambdas(matrix, columns, transforms)
+    plots = PlotQueue(render_plots)
+    write_records = store is None
+    if write_records:
+        store = ResultsStore()
 
-        logger.debug(f"Performing Yeo-Johnson transformation with lambda={col_lambda}")
-        samples = {
-            sample_name: pd.Series(
-                scipy.stats.yeojohnson(sample_data, col_lambda),
-                name=sample_data.name,
+    pool = ProcessPoolExecutor(max_workers=workers) if workers is not None else nullcontext()
+    with pool as executor:
+        jobs = []
+        for col, col_lambda in zip(columns, lambda_):
+            output_folder = results_folder.joinpath(col)
+            output_folder.mkdir(exist_ok=True, parents=True)
+            samples = matrix.samples(col)
+            key = column_cache.column_key(
+                samples,
+                factor=factor,
+                column=col,
+                lambda_=col_lambda,
+                transform=transform,
+                trim_fraction=trim_fraction,
+                trim_method=trim_method,
+                trim_pooled=trim_pooled,
+                alpha=alpha,
+                n_bootstrap=n_bootstrap,
+                seed=seed,
+                render_plots=render_plots,
+                max_pairs=max_pairs,
             )
-            for sample_name, sample_data in samples.items()
-        }
+            outcome = None
+            if reuse_results:
+                with profiling.stage('load_cached'):
+                    outcome = column_cache.load(output_folder, key)
+            if outcome is not None:
+                jobs.append((output_folder, key, True, outcome))
+                continue
+
+            with (
+                capture_log_records(logger) as preparation_records,
+                results.scope(factor=factor, column=col),
+                profiling.stage('prepare_samples'),
+            ):
+                logger.debug(f"Variable: {col}")
+                samples = _prepare_samples(
+                    col, samples, col_lambda, preprocessing, transforms
+                )
+            args = (factor, samples, output_folder, col, n_bootstrap, seed)
+            if executor is None:
+                analysis = _buffered_analysis_of_variance(
+                    *args, render_plots=render_plots, alpha=alpha, max_pairs=max_pairs
+                )
+            else:
+                analysis = profiling.submit(
+                    executor,
+                    _buffered_analysis_of_variance,
+                    *args,
+                    render_plots=render_plots,
+                    alpha=alpha,
+                    max_pairs=max_pairs,
+                )
+            jobs.append((output_folder, key, False, (preparation_records, analysis)))
 
+        outcomes = []
+        for output_folder, key, cached, outcome in jobs:
+            if not cached:
+                preparation_records, analysis = outcome
+                if executor is not None:
+                    analysis = analysis.result()
+                outcome = ColumnOutcome(
+                    preparation_records + analysis.log_records,
+                    analysis.plot_jobs,
+                    analysis.test_records,
+                )
+                plots.extend(outcome.plot_jobs)
+                outcomes.append((output_folder, key, outcome))
+            replay_log_records(logger, outcome.log_records)
+            logger.debug(COLUMN_SEPARATOR)
+            store.records.extend(outcome.test_records)
 
-        analysis_of_variance(factor, samples, output_folder, col)
-        logger.debug("--------------------------------------------------------------------------\n")
+    with profiling.stage('render_plots'):
+        plots.render(plot_workers)
+    with profiling.stage('save_cached'):
+        for output_folder, key, outcome in outcomes:
+            column_cache.save(output_folder, key, outcome)
+    if write_records:
+        with profiling.stage('write_records'):
+            store.write(RESULTS_FOLDER.joinpath('records'))
+    return store
@@ -0,0 +1,5 @@
+import sys
+
+from goggles.cli import main
+
+sys.exit(main())
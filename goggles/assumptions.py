@@ -1,54 +1,69 @@
-import itertools
 import logging
+from collections.abc import Mapping
 from pathlib import Path
 
-import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
-import plotly.colors
-import plotly.express as px
-from scipy.stats import chisquare, levene, probplot, shapiro
+from scipy.stats import chisquare, f, shapiro
 
+from goggles import plotting, results
+from goggles.group_stats import GroupStats
+from goggles.plotting import PlotQueue
+from goggles.results import TestRecord
 from goggles.stats import TestResult
 
 logger = logging.getLogger("colour")
 
 
-def equal_size_samples(*groups, alpha=0.05) -> bool:
-    observed = [len(group) for group in groups]
-    num_groups = len(groups)
-    total_count = sum(observed)
-    expected = [total_count / num_groups] * num_groups
+def equal_size_samples(*groups, alpha=0.05, stats: GroupStats | None = None) -> TestRecord:
+    """Chi-squared test of equal group sizes.
+
+    :return: The test's record. The sizes are roughly equal if its p-value is above ``alpha``.
+    """
+    if stats is None:
+        observed = np.fromiter((len(group) for group in groups), dtype=int, count=len(groups))
+    else:
+        observed = stats.sizes
+    expected = np.full(len(observed), observed.sum() / len(observed))
 
     res = TestResult._make(chisquare(f_obs=observed, f_exp=expected))
     logger.debug('Chi-Squared Test for Equal Samples\' Sizes')
     if res.pvalue <= alpha:
         logger.debug(
-            f"Reject the null hypothesis: The counts {observed} are not evenly distributed."
+            f"Reject the null hypothesis: "
+            f"The counts {observed.tolist()} are not evenly distributed."
         )
     else:
         logger.debug(
             f"Fail to reject the null hypothesis: "
-            f"The counts {observed} are roughly evenly distributed."
+            f"The counts {observed.tolist()} are roughly evenly distributed."
         )
     logger.debug(f"Chi-squared Statistic: {res.statistic:.4f}, P-value: {res.pvalue:.4f}")
-    return res.pvalue > alpha
+    return results.create('equal_sizes_chi2', *res)
 
 
 def normality(
     groups: dict[str, pd.Series],
     output_folder: Path | None = None,
     alpha: float = 0.05,
-) -> bool:
-    results = {}
-    normality_pass = True
+    plots: PlotQueue | None = None,
+) -> list[TestRecord]:
+    """Shapiro-Wilk test of every group.
+
+    :param output_folder: If given, a probability plot of every group is saved in that folder.
+    :param plots: Queue that defers the plots' rendering, by default they are rendered at once.
+    :return: The records of the groups' tests. The groups are roughly normal if none of their
+    p-values is below ``alpha``.
+    """
+    records = []
     logger.debug('Shapiro-Wilk Test for Normality')
     for g_name, group in groups.items():
-        results[g_name] = res = TestResult._make(shapiro(group))
+        res = TestResult._make(shapiro(group))
+        records.append(results.create('shapiro', *res, group1=g_name))
         if res.pvalue < alpha:
             logger.debug(
                 f"Reject the null hypothesis: The sample {g_name} is not normally distributed."
             )
-            normality_pass = False
             """if len(group) >= 30:
                 logger.debug(
                     'Sample size is equal or greater than 30 and can be considered sufficient for '
@@ -63,16 +78,42 @@ def normality(
             )
         logger.debug(f"{g_name}: W Statistic: {res.statistic:.4f}, P-value: {res.pvalue:.4f}")
         if output_folder is not None:
-            probplot(group, dist="norm", plot=plt)
-            plt.title(f'Probability Plot - {g_name} Goggles')
-            plt.savefig(output_folder.joinpath(f'{g_name}.png'), bbox_inches='tight', dpi=300)
-            plt.close()
+            job = plotting.probability_plot(
+                output_folder.joinpath(f'{g_name}.png'),
+                group,
+                f'Probability Plot - {g_name} Goggles',
+            )
+            if plots is None:
+                plotting.render(job)
+            else:
+                plots.add(job)
+
+    return records
 
-    return normality_pass
 
+def levene_median(stats: GroupStats) -> TestResult:
+    """Levene's test centered at the group medians, equivalent to ``scipy.stats.levene``."""
+    deviations = np.abs(stats.values - stats.medians[stats.labels])
+    group_means = np.add.reduceat(deviations, stats.offsets) / stats.sizes
+    between = (stats.sizes * (group_means - deviations.mean()) ** 2).sum()
+    within = ((deviations - group_means[stats.labels]) ** 2).sum()
+    df_between, df_within = stats.k - 1, stats.n - stats.k
+    statistic = df_within / df_between * between / within
+    return TestResult(statistic, f.sf(statistic, df_between, df_within))
 
-def equal_variances(*groups: pd.Series, alpha: float = 0.05) -> bool:
-    res = TestResult._make(levene(*groups))
+
+def equal_variances(
+    *groups: pd.Series,
+    alpha: float = 0.05,
+    stats: GroupStats | None = None,
+) -> TestRecord:
+    """Levene's test of equal variances, centered at the group medians.
+
+    :return: The test's record. The variances are roughly equal if its p-value is above ``alpha``.
+    """
+    if stats is None:
+        stats = GroupStats(groups)
+    res = levene_median(stats)
     logger.debug('Levene Test for Homoscedasticity')
     if res.pvalue <= alpha:
         logger.debug(
@@ -83,31 +124,85 @@ def equal_variances(*groups: pd.Series, alpha: float = 0.05) -> bool:
             f"Fail to reject the null hypothesis: Samples' variances are roughly equal."
         )
     logger.debug(f"Test Statistic: {res.statistic:.4f}, P-value: {res.pvalue:.4f}")
-    return res.pvalue > alpha
+    # Named as the median-centred test of ``check_assumptions``, not its mean-centred 'levene'.
+    return results.create('brown_forsythe', *res)
 
 
 def similarity_of_shape(
     factor: str,
     variable_name: str,
     groups: dict[str, pd.Series],
-    output_folder: Path
+    output_folder: Path,
+    plots: PlotQueue | None = None,
 ) -> None:
-    goggles = 'Goggles'
-    data = {
-        factor: pd.concat(groups.values()),
-        goggles: list(
-            itertools.chain.from_iterable(
-                [g_name] * len(group) for g_name, group in groups.items()
-            )
-        )
-    }
-    df = pd.DataFrame(data)
-    colors = {
-        'Transparent': plotly.colors.qualitative.Plotly[0],
-        'Yellow': plotly.colors.qualitative.Plotly[9],
-        'Red': plotly.colors.qualitative.Plotly[1],
-    }
-    fig = px.histogram(df, x=factor, color=goggles, marginal='box', color_discrete_map=colors)
-    fig.update_layout(template='plotly_white')
-    # fig.write_image(output_folder.joinpath(f"distplot_{variable_name}.png"), scale=3)
-    fig.show()
+    """Histograms and box plots of the groups, saved as HTML and PNG distribution plots.
+
+    :param plots: Queue that defers the plot's rendering, by default it is rendered at once.
+    """
+    job = plotting.distribution_plot(
+        output_folder.joinpath(f"distplot_{variable_name}"),
+        groups,
+        factor,
+        plotting.palette(groups),
+    )
+    if plots is None:
+        plotting.render(job)
+    else:
+        plots.add(job)
+
+
+def long_format(columns: Mapping[str, dict[str, pd.Series]]) -> pd.DataFrame:
+    """Stack the samples of many columns into a column - group - value table."""
+    frames = [
+        pd.DataFrame({'column': col, 'group': group_name, 'value': np.asarray(group, dtype=float)})
+        for col, samples in columns.items()
+        for group_name, group in samples.items()
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+
+def _variance_tests(data: pd.DataFrame) -> pd.DataFrame:
+    keys = [data['column'], data['group']]
+    cells = data['value'].groupby(keys, sort=False)
+    centers = {'levene': cells.transform('mean'), 'brown_forsythe': cells.transform('median')}
+    sizes = cells.size()
+    columns = sizes.index.get_level_values('column')
+    n = sizes.groupby(columns, sort=False).sum()
+    k = sizes.groupby(columns, sort=False).size()
+
+    rows = []
+    for test, center in centers.items():
+        deviations = (data['value'] - center).abs()
+        cell_means = deviations.groupby(keys, sort=False).transform('mean')
+        column_means = deviations.groupby(data['column'], sort=False).transform('mean')
+        between = ((cell_means - column_means) ** 2).groupby(data['column'], sort=False).sum()
+        within = ((deviations - cell_means) ** 2).groupby(data['column'], sort=False).sum()
+        statistic = (n - k) / (k - 1) * between / within
+        rows.append(pd.DataFrame({
+            'column': statistic.index,
+            'group': None,
+            'test': test,
+            'statistic': statistic.to_numpy(),
+            'pvalue': f.sf(statistic, k - 1, n - k),
+        }))
+    return pd.concat(rows, ignore_index=True)
+
+
+def check_assumptions(data: pd.DataFrame) -> pd.DataFrame:
+    """Shapiro-Wilk, Levene and Brown-Forsythe tests of every column of a long-format table.
+
+    :param data: A table with 'column', 'group' and 'value' columns, see ``long_format``. Missing
+    values are left out, as the single-column tests leave them out of their samples.
+    :return: A table with 'column', 'group', 'test', 'statistic' and 'pvalue' columns. The group
+    is empty for the tests of equal variances, which concern all groups of a column.
+    """
+    data = data.dropna(subset=['value'])
+    shapiro_rows = [
+        (col, group_name, 'shapiro', *shapiro(values))
+        for (col, group_name), values in data.groupby(['column', 'group'], sort=False)['value']
+    ]
+    normality_tests = pd.DataFrame(
+        shapiro_rows,
+        columns=['column', 'group', 'test', 'statistic', 'pvalue'],
+    )
+    return pd.concat([normality_tests, _variance_tests(data)], ignore_index=True)
@@ -0,0 +1,93 @@
+from collections import namedtuple
+from collections.abc import Sequence
+
+import numpy as np
+
+BootstrapResult = namedtuple(
+    'BootstrapResult',
+    ('statistic', 'pvalue', 'confidence_interval'),
+)
+
+# Upper bound on the memory of one chunk of resamples, in bytes.
+DEFAULT_MAX_CHUNK_BYTES = 64 * 2 ** 20
+
+
+def _group_offsets(sizes: np.ndarray) -> np.ndarray:
+    return np.concatenate(([0], np.cumsum(sizes)[:-1]))
+
+
+def _between_group_variance(resampled: np.ndarray, offsets: np.ndarray, sizes: np.ndarray):
+    """Population variance of the group means of every row of a resampled matrix.
+
+    Groups are laid out contiguously along the second axis, so the means are computed with a
+    single segmented reduction instead of one reduction per group.
+    """
+    means = np.add.reduceat(resampled, offsets, axis=1) / sizes
+    return means.var(axis=1)
+
+
+def _null_resamples(rng, combined, offsets, sizes, rows: int) -> np.ndarray:
+    """Statistics of rows of resamples of every group from the pooled data."""
+    n = len(combined)
+    indices = np.minimum((rng.random((rows, n)) * n).astype(np.int64), n - 1)
+    return _between_group_variance(combined[indices], offsets, sizes)
+
+
+def _own_resamples(rng, combined, offsets, sizes, rows: int) -> np.ndarray:
+    """Statistics of rows of resamples of every group from itself."""
+    starts, lengths = np.repeat(offsets, sizes), np.repeat(sizes, sizes)
+    indices = (rng.random((rows, len(combined))) * lengths).astype(np.int64)
+    indices = np.minimum(indices, lengths - 1) + starts
+    return _between_group_variance(combined[indices], offsets, sizes)
+
+
+def bootstrap_anova(
+    groups: Sequence[Sequence[float]],
+    n_bootstrap: int = 10000,
+    seed: int | np.random.Generator | None = None,
+    confidence_level: float = 0.95,
+    max_chunk_bytes: int = DEFAULT_MAX_CHUNK_BYTES,
+) -> BootstrapResult:
+    """Bootstrap test for the equality of group means.
+
+    The statistic is the variance of the group means. Its null distribution is obtained by
+    resampling every group with replacement from the pooled data, and the p-value is the fraction
+    of bootstrap statistics at least as large as the observed one. The confidence interval is the
+    percentile interval of the statistic when each group is resampled from itself.
+
+    :param groups: Observations of every group.
+    :param n_bootstrap: Number of bootstrap resamples.
+    :param seed: Seed or generator used to draw the resamples, for reproducible results.
+    :param confidence_level: Confidence level of the reported interval.
+    :param max_chunk_bytes: Memory budget of one chunk of resamples: the uniform variates, the
+    int64 indices and the float64 values of its resampled observations, and its group means. The
+    resamples are the same whatever the budget.
+    :return: Observed statistic, p-value and confidence interval of the statistic.
+    """
+    rng = np.random.default_rng(seed)
+    arrays = [np.asarray(group, dtype=float) for group in groups]
+    sizes = np.array([len(array) for array in arrays])
+    offsets = _group_offsets(sizes)
+    combined = np.concatenate(arrays)
+    n_total = len(combined)
+
+    observed_stat = np.var([array.mean() for array in arrays])
+
+    # The null and the own resamples are drawn from streams of their own, as one uniform variate
+    # per resampled observation, row after row, so the draws do not depend on the chunks. A row
+    # holds the variates, the indices and the values of its resampled observations, and its group
+    # means.
+    null_rng, own_rng = rng.spawn(2)
+    row_bytes = 8 * (3 * n_total + len(sizes))
+    chunk_size = max(1, min(n_bootstrap, max_chunk_bytes // row_bytes))
+    null_stats = np.empty(n_bootstrap)
+    own_stats = np.empty(n_bootstrap)
+    for start in range(0, n_bootstrap, chunk_size):
+        stop = min(start + chunk_size, n_bootstrap)
+        null_stats[start:stop] = _null_resamples(null_rng, combined, offsets, sizes, stop - start)
+        own_stats[start:stop] = _own_resamples(own_rng, combined, offsets, sizes, stop - start)
+
+    p_value = np.mean(null_stats >= observed_stat)
+    tail = (1 - confidence_level) / 2
+    low, high = np.quantile(own_stats, [tail, 1 - tail])
+    return BootstrapResult(observed_stat, p_value, (low, high))
@@ -0,0 +1,378 @@
+"""Batch runner of the studies listed in a manifest.
+
+The manifest is a TOML file, or a YAML file if PyYAML is installed, with a ``studies`` list and
+optional ``defaults`` shared by all studies. A study lists its data file, relative to the
+manifest, its factor, columns and sheets, and the parameters of its analysis::
+
+    [defaults]
+    persist = "feather"
+
+    [[studies]]
+    name = "tfd"
+    data = "data/20241217/data.ods"
+    factor = "TFD"
+    columns = ["R jacket", "R bucket"]
+    sheets = { Transparent = "TFD_T", Yellow = "TFD_Y", Red = "TFD_R" }
+    parameters = { trim_fraction = 0.2 }
+
+Studies of ``kind = "experience"`` compare experienced and inexperienced participants instead, with
+a ``sheets`` table of factor - sheet name and an ``experience_column``. Studies of
+``kind = "repeated"`` analyse all their columns in one repeated measures or mixed ANOVA, see
+``goggles.repeated``, with an optional ``subject_column``.
+
+Every (study, factor, column) is a job of a process pool, and every repeated measures study is a
+single job. The workbooks are parsed once, before
+the jobs start, and persisted so that the workers read the parsed sheets. Every study has its own
+log file in ``results``, written in column order once all its columns are done, with the records
+at or above the level of the ``colour`` logger, ``--log-level``. A failing column
+is logged and skipped. With ``--profile``, the time of every stage of every job is written to a
+trace, see ``goggles.profiling``.
+"""
+import argparse
+import logging
+import sys
+import time
+import tomllib
+import traceback
+from collections import namedtuple
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from datetime import datetime
+from pathlib import Path
+
+from goggles import (
+    DEFAULT_READ_OPTIONS,
+    evaluate_differences_in_means,
+    experience,
+    profiling,
+    read_data,
+    repeated,
+    results,
+)
+from goggles.results import ResultsStore
+from goggles.utils import capture_log_records
+from goggles.workbook import read_sheets
+
+logger = logging.getLogger("colour")
+
+KINDS = ('anova', 'experience', 'repeated')
+
+# Column of the single job of a repeated measures study.
+ALL_COLUMNS = 'all columns'
+
+Job = namedtuple('Job', ('study', 'factor', 'column'))
+JobOutcome = namedtuple('JobOutcome', ('log_records', 'test_records'))
+
+
+def load_manifest(path: Path) -> list[dict]:
+    """Studies of the manifest, with the defaults applied and the data paths resolved."""
+    if path.suffix in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError(
+                'Reading a YAML manifest requires PyYAML, or use a TOML manifest'
+            ) from None
+        with path.open() as f:
+            manifest = yaml.safe_load(f)
+    else:
+        with path.open('rb') as f:
+            manifest = tomllib.load(f)
+
+    defaults = manifest.get('defaults', {})
+    studies = []
+    for study in manifest.get('studies', []):
+        study = {'kind': 'anova', 'parameters': {}, 'read_options': None, **defaults, **study}
+        if study['kind'] not in KINDS:
+            raise ValueError(f"Study {study.get('name')} has unknown kind {study['kind']}")
+        missing = {'name', 'data', 'columns', 'sheets'} - study.keys()
+        if study['kind'] in ('anova', 'repeated'):
+            missing |= {'factor'} - study.keys()
+        else:
+            missing |= {'experience_column'} - study.keys()
+        if missing:
+            raise ValueError(f"Study {study.get('name')} misses {sorted(missing)}")
+        study['data'] = path.parent.joinpath(study['data'])
+        study['results'] = path.parent.joinpath('results')
+        studies.append(study)
+    return studies
+
+
+def _jobs(study: dict) -> list[Job]:
+    if study['kind'] == 'repeated':
+        return [Job(study['name'], study['factor'], ALL_COLUMNS)]
+    factors = [study['factor']] if study['kind'] == 'anova' else list(study['sheets'])
+    return [Job(study['name'], factor, col) for factor in factors for col in study['columns']]
+
+
+def _read_options(study: dict) -> dict:
+    if study['read_options'] is not None:
+        return study['read_options']
+    return DEFAULT_READ_OPTIONS if study['kind'] in ('anova', 'repeated') else {}
+
+
+def _parse(study: dict) -> None:
+    """Parse the study's sheets, persisting them for the workers."""
+    read_sheets(
+        study['data'],
+        study['sheets'].values(),
+        persist=study.get('persist'),
+        **_read_options(study),
+    )
+
+
+def run_job(study: dict, job: Job, render_plots: bool = True, reuse_results: bool = True):
+    """Analyse one column of a study, buffering its log records and test results."""
+    store = ResultsStore()
+    with capture_log_records(logger) as records:
+        if study['kind'] == 'anova':
+            evaluate_differences_in_means(
+                study['data'],
+                [job.column],
+                job.factor,
+                study['sheets'],
+                persist=study.get('persist'),
+                read_options=_read_options(study),
+                results_folder=study['results'].joinpath(job.factor),
+                store=store,
+                render_plots=render_plots,
+                # The jobs already run in parallel, so each renders its plots in its own process.
+                plot_workers=0,
+                reuse_results=reuse_results,
+                **study['parameters'],
+            )
+        elif study['kind'] == 'repeated':
+            with profiling.stage('read_data'):
+                frames = read_data(
+                    study['data'],
+                    study['sheets'],
+                    persist=study.get('persist'),
+                    read_options=_read_options(study),
+                )
+            with results.collecting(store), profiling.stage('repeated_measures'):
+                repeated.evaluate(
+                    frames,
+                    study['columns'],
+                    job.factor,
+                    subject_column=study.get('subject_column'),
+                    **study['parameters'],
+                )
+        else:
+            sheet_name = study['sheets'][job.factor]
+            frames = read_sheets(
+                study['data'],
+                [sheet_name],
+                persist=study.get('persist'),
+                **_read_options(study),
+            )
+            with (
+                results.collecting(store),
+                results.scope(factor=job.factor, column=job.column),
+                profiling.stage('compare_experience'),
+            ):
+                experience.compare_column(
+                    frames[sheet_name],
+                    study['experience_column'],
+                    job.column,
+                    study['results'].joinpath(f'{job.factor}_experience', job.column),
+                )
+    return JobOutcome(records, store.records)
+
+
+def _failure_record(job: Job, error: BaseException) -> logging.LogRecord:
+    message = f"Variable: {job.column} failed\n{''.join(traceback.format_exception(error))}"
+    return logging.makeLogRecord({
+        'name': logger.name,
+        'levelno': logging.ERROR,
+        'levelname': 'ERROR',
+        'msg': message,
+    })
+
+
+def _progress(done: int, total: int, job: Job, status: str, started: float) -> None:
+    elapsed = time.perf_counter() - started
+    eta = elapsed / done * (total - done)
+    print(
+        f'[{done}/{total}] {job.study} {job.factor} {job.column}: {status}, '
+        f'elapsed {elapsed:.0f} s, ETA {eta:.0f} s',
+        file=sys.stderr,
+    )
+
+
+def _submit(pool: ProcessPoolExecutor | None, *args) -> Future:
+    if pool is not None:
+        return profiling.submit(pool, run_job, *args)
+    future = Future()
+    try:
+        future.set_result(run_job(*args))
+    except Exception as error:
+        future.set_exception(error)
+    return future
+
+
+def _completed(pool: ProcessPoolExecutor | None, studies: list[dict], jobs: dict, *args):
+    """Study, job and finished future of every job, in the order the jobs finish.
+
+    Without a pool, every job runs when the previous one has been reported.
+    """
+    if pool is None:
+        for study in studies:
+            for job in jobs[study['name']]:
+                yield study, job, _submit(None, study, job, *args)
+        return
+    futures = {
+        _submit(pool, study, job, *args): (study, job)
+        for study in studies
+        for job in jobs[study['name']]
+    }
+    for future in as_completed(futures):
+        yield *futures[future], future
+
+
+def _write_log(path: Path, records: list[logging.LogRecord]) -> None:
+    """Write the records of a study that the logger is enabled for to its log file."""
+    handler = logging.FileHandler(path)
+    try:
+        for record in records:
+            if logger.isEnabledFor(record.levelno):
+                handler.handle(record)
+    finally:
+        handler.close()
+
+
+def _write_study(
+    study: dict,
+    study_jobs: list[Job],
+    outcomes: dict[Job, JobOutcome | BaseException],
+    store: ResultsStore,
+    now: str,
+) -> None:
+    """Write the log of a study whose jobs all finished, and collect their test results."""
+    records = []
+    for study_job in study_jobs:
+        outcome = outcomes[study_job]
+        if isinstance(outcome, BaseException):
+            records.append(_failure_record(study_job, outcome))
+        else:
+            records.extend(outcome.log_records)
+            store.records.extend(outcome.test_records)
+    study['results'].mkdir(exist_ok=True, parents=True)
+    _write_log(study['results'].joinpath(f"{study['name']}_{now}.log"), records)
+
+
+def run(
+    studies: list[dict],
+    workers: int | None = None,
+    render_plots: bool = True,
+    reuse_results: bool = True,
+) -> tuple[ResultsStore, int]:
+    """Run the jobs of all studies in a pool of processes.
+
+    A study whose sheets cannot be read fails all of its jobs, and the other studies still run.
+
+    :param workers: Number of processes, defaults to the number of processors. With 0, the jobs
+    run in this process.
+    :return: The results of all jobs, and the number of failed jobs, whose results are missing.
+    """
+    now = datetime.now().strftime("%Y%m%d_%H%M%S")
+    store = ResultsStore()
+    jobs = {study['name']: _jobs(study) for study in studies}
+    total = sum(len(study_jobs) for study_jobs in jobs.values())
+    outcomes: dict[Job, JobOutcome | BaseException] = {}
+
+    started = time.perf_counter()
+    parsed = []
+    for study in studies:
+        try:
+            _parse(study)
+        except Exception as error:
+            logger.error(f"Study {study['name']}: could not read {study['data']}: {error}")
+            for job in jobs[study['name']]:
+                outcomes[job] = error
+                _progress(len(outcomes), total, job, 'failed (unreadable data)', started)
+            _write_study(study, jobs[study['name']], outcomes, store, now)
+        else:
+            parsed.append(study)
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers != 0 and parsed else None
+    try:
+        for study, job, future in _completed(pool, parsed, jobs, render_plots, reuse_results):
+            error = future.exception()
+            outcomes[job] = future.result() if error is None else error
+            status = 'done' if error is None else f'failed ({type(error).__name__}: {error})'
+            _progress(len(outcomes), total, job, status, started)
+
+            study_jobs = jobs[study['name']]
+            if all(study_job in outcomes for study_job in study_jobs):
+                _write_study(study, study_jobs, outcomes, store, now)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    if studies:
+        store.write(studies[0]['results'].joinpath('records'))
+    failures = sum(isinstance(outcome, BaseException) for outcome in outcomes.values())
+    return store, failures
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='goggles',
+        description='Analyse the studies listed in a manifest.',
+    )
+    parser.add_argument('manifest', type=Path, help='TOML or YAML manifest of the studies')
+    parser.add_argument(
+        '--study',
+        action='append',
+        help='Name of a study to run, may be repeated. By default, all studies run.',
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of processes, 0 to run in this process. Defaults to the number of processors.',
+    )
+    parser.add_argument('--no-plots', action='store_true', help='Do not render the plots')
+    parser.add_argument(
+        '--profile',
+        type=Path,
+        help='Write the time of every stage of the analysis to this .csv, .json or, for '
+        'chrome://tracing, .trace.json file',
+    )
+    parser.add_argument(
+        '--profile-memory',
+        action='store_true',
+        help='Also trace the peak memory of every stage, which slows down the analysis',
+    )
+    parser.add_argument(
+        '--log-level',
+        default='DEBUG',
+        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+        help='Lowest level of the records written to the log files of the studies',
+    )
+    parser.add_argument(
+        '--fresh',
+        action='store_true',
+        help='Analyse every column again, instead of reusing the results of unchanged columns',
+    )
+    args = parser.parse_args(argv)
+    logger.setLevel(args.log_level)
+
+    studies = load_manifest(args.manifest)
+    if args.study:
+        unknown = set(args.study) - {study['name'] for study in studies}
+        if unknown:
+            parser.error(f'Unknown studies: {sorted(unknown)}')
+        studies = [study for study in studies if study['name'] in args.study]
+
+    profile = nullcontext()
+    if args.profile is not None:
+        profile = profiling.profiling(memory=args.profile_memory)
+    with profile as stages:
+        _, failures = run(studies, args.workers, not args.no_plots, not args.fresh)
+    if stages is not None:
+        stages.write(args.profile)
+        print(stages.summary().to_string(), file=sys.stderr)
+    if failures:
+        print(f'{failures} columns failed, see the logs', file=sys.stderr)
+    return 1 if failures else 0
@@ -0,0 +1,91 @@
+"""Stored outcomes of the analyses of columns, reused when neither the data nor the parameters
+of a column, nor the code of the package have changed.
+"""
+import functools
+import hashlib
+import logging
+import os
+import pickle
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from goggles.plotting import PlotJob
+
+logger = logging.getLogger("colour")
+
+CACHE_FOLDER = '.cache'
+
+PACKAGE_FOLDER = Path(__file__).parent
+
+ColumnOutcome = namedtuple('ColumnOutcome', ('log_records', 'plot_jobs', 'test_records'))
+
+
+@functools.cache
+def source_digest(folder: Path) -> str:
+    """Hash of the names and contents of the source files of the package in the folder."""
+    digest = hashlib.sha256()
+    for path in sorted(folder.rglob('*.py')):
+        digest.update(path.relative_to(folder).as_posix().encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def column_key(samples: dict[str, pd.Series], **parameters) -> str:
+    """Content hash of a column's samples, the parameters of its analysis and the package's
+    source, so that any change of the code invalidates the stored outcomes.
+    """
+    digest = hashlib.sha256(source_digest(PACKAGE_FOLDER).encode())
+    for name, sample in samples.items():
+        digest.update(repr(name).encode())
+        digest.update(np.ascontiguousarray(sample, dtype=float).tobytes())
+    digest.update(repr(sorted(parameters.items())).encode())
+    return digest.hexdigest()
+
+
+def load(output_folder: Path, key: str) -> ColumnOutcome | None:
+    """Stored outcome of the column, if its key matches, it can be read and all its plots still
+    exist.
+    """
+    path = output_folder.joinpath(CACHE_FOLDER, f'{key}.pickle')
+    if not path.exists():
+        return None
+    try:
+        with path.open('rb') as f:
+            outcome: ColumnOutcome = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError) as e:
+        logger.debug(f'Could not read the stored outcome {path.name}: {e}')
+        return None
+    if not all(_rendered(job) for job in outcome.plot_jobs):
+        return None
+    return outcome
+
+
+def save(output_folder: Path, key: str, outcome: ColumnOutcome) -> None:
+    """Store the outcome of the column, replacing any outcome stored under another key.
+
+    The outcome is written to a temporary file of this process, and moved into place atomically,
+    so that an interrupted run never leaves a partial file.
+    """
+    folder = output_folder.joinpath(CACHE_FOLDER)
+    folder.mkdir(exist_ok=True)
+    path = folder.joinpath(f'{key}.pickle')
+    temporary_path = path.with_suffix(f'.{os.getpid()}.tmp')
+    try:
+        with temporary_path.open('wb') as f:
+            pickle.dump(outcome, f)
+        os.replace(temporary_path, path)
+    finally:
+        temporary_path.unlink(missing_ok=True)
+    for stale in folder.glob('*.pickle'):
+        if stale != path:
+            stale.unlink()
+
+
+def _rendered(job: PlotJob) -> bool:
+    if job.kind == 'distribution':
+        return job.path.with_suffix('.html').exists() and job.path.with_suffix('.png').exists()
+    return job.path.exists()
+
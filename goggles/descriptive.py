@@ -1,14 +1,20 @@
 import logging
 
+import numpy as np
 import pandas as pd
 
+from goggles.group_stats import GroupStats
+
 logger = logging.getLogger("colour")
 
 
-def describe(samples: dict[str, pd.Series]) -> None:
-    for group_name, group in samples.items():
+def describe(samples: dict[str, pd.Series], stats: GroupStats | None = None) -> None:
+    if stats is None:
+        stats = GroupStats.from_samples(samples)
+    std = np.sqrt(stats.variances)
+    for i, group_name in enumerate(samples.keys()):
         logger.debug(group_name)
-        logger.debug(f'[{group.min()}, {group.max()}]')
-        logger.debug(f'{group.median()}')
-        logger.debug(f'{group.mean()} +- {group.std()}')
-        logger.debug(f'Kurtosis: {group.kurtosis()}, skewness: {group.skew()}')
+        logger.debug(f'[{stats.minima[i]}, {stats.maxima[i]}]')
+        logger.debug(f'{stats.medians[i]}')
+        logger.debug(f'{stats.means[i]} +- {std[i]}')
+        logger.debug(f'Kurtosis: {stats.kurtosis[i]}, skewness: {stats.skewness[i]}')
@@ -1,24 +1,70 @@
+from collections.abc import Mapping
+
 import numpy as np
 import pandas as pd
-from scipy.stats import kruskal
+
+from goggles.group_stats import GroupStats
+from goggles.nonparametric import kruskal_h
+
+
+def _group_stats(groups, stats: GroupStats | None) -> GroupStats:
+    return stats if stats is not None else GroupStats(groups)
+
+
+def anova_eta_squared(*groups, stats: GroupStats | None = None):
+    stats = _group_stats(groups, stats)
+    return stats.ss_between / stats.ss_total
+
+
+def anova_omega_squared(*groups, stats: GroupStats | None = None):
+    stats = _group_stats(groups, stats)
+    ms_within = stats.ss_within / (stats.n - stats.k)
+    return (stats.ss_between - (stats.k - 1) * ms_within) / (stats.ss_total + ms_within)
 
 
-def anova_eta_squared(*groups):
-    grand_mean = pd.concat(groups).mean()
-    ss_between = sum(len(group) * (np.mean(group) - grand_mean) ** 2 for group in groups)
-    ss_total = sum((x - grand_mean) ** 2 for group in groups for x in group)
-    eta_squared = ss_between / ss_total
-    return eta_squared
+def anova_epsilon_squared(*groups, stats: GroupStats | None = None):
+    stats = _group_stats(groups, stats)
+    ms_within = stats.ss_within / (stats.n - stats.k)
+    return (stats.ss_between - (stats.k - 1) * ms_within) / stats.ss_total
 
 
-def anova_cohen_f(*groups):
-    eta_squared = anova_eta_squared(*groups)
+def anova_cohen_f(*groups, stats: GroupStats | None = None):
+    eta_squared = anova_eta_squared(*groups, stats=stats)
     cohen_f = np.sqrt(eta_squared / (1 - eta_squared))
     return cohen_f
 
 
-def kruskal_wallis_eta_squared(*groups):
-    h_statistic, p_value = kruskal(*groups)
-    k = len(groups)
-    N = sum([len(group) for group in groups])
-    return (h_statistic - k + 1) / (N - k)
+def kruskal_wallis_eta_squared(*groups, stats: GroupStats | None = None):
+    stats = _group_stats(groups, stats)
+    h_statistic, p_value = kruskal_h(stats)
+    return (h_statistic - stats.k + 1) / (stats.n - stats.k)
+
+
+def kruskal_wallis_epsilon_squared(*groups, stats: GroupStats | None = None):
+    stats = _group_stats(groups, stats)
+    h_statistic, p_value = kruskal_h(stats)
+    return h_statistic / (stats.n - 1)
+
+
+EFFECT_SIZES = {
+    'eta_squared': anova_eta_squared,
+    'omega_squared': anova_omega_squared,
+    'epsilon_squared': anova_epsilon_squared,
+    'cohen_f': anova_cohen_f,
+    'rank_eta_squared': kruskal_wallis_eta_squared,
+    'rank_epsilon_squared': kruskal_wallis_epsilon_squared,
+}
+
+
+def effect_sizes(columns: Mapping[str, GroupStats | dict[str, pd.Series]]) -> pd.DataFrame:
+    """All effect sizes of many columns.
+
+    :param columns: A column - statistics or column - samples dictionary.
+    :return: A data frame with one row per column and one column per effect size.
+    """
+    rows = {}
+    for col, stats in columns.items():
+        if not isinstance(stats, GroupStats):
+            stats = GroupStats.from_samples(stats)
+        rows[col] = {name: function(stats=stats) for name, function in EFFECT_SIZES.items()}
+    return pd.DataFrame.from_dict(rows, orient='index')
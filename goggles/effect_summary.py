@@ -0,0 +1,94 @@
+"""Effect sizes and power of the one-way ANOVA of many dependent variables.
+
+All effect sizes are computed from the counts, means and variances of the groups, obtained with a
+single aggregation of the data. Run as a script to summarise a workbook::
+
+    python -m goggles.effect_summary data.xlsx --sheet Sheet2 --skiprows 1 \
+        --group "Total fixation duration in AOI [s]" --dvs "R bucket" "Y bag"
+"""
+import argparse
+from collections.abc import Sequence
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from goggles.power import achieved_power, required_nobs
+
+
+def group_moments(df: pd.DataFrame, dvs: Sequence[str], group: str) -> pd.DataFrame:
+    """Count, mean and variance of every group of every dependent variable.
+
+    :return: A table indexed by group, with a (dependent variable, statistic) column index.
+    """
+    return df.groupby(group, sort=False)[list(dvs)].agg(['count', 'mean', 'var'])
+
+
+def summarize(
+    df: pd.DataFrame,
+    dvs: Sequence[str],
+    group: str,
+    alpha: float = 0.05,
+    power: float = 0.8,
+    target_effect_size: float = 0.25,
+) -> pd.DataFrame:
+    """Effect sizes, achieved power and required sample size of every dependent variable.
+
+    :param df: Data with a column of every dependent variable and a group column.
+    :param alpha: Significance level of the F test.
+    :param power: Power of the F test the required sample size is computed for.
+    :param target_effect_size: Cohen's f the required sample size is computed for.
+    :return: A table with one row per dependent variable and the columns:
+
+        - np2: (partial) eta squared of the one-way ANOVA,
+        - f2: Cohen's f squared, ``np2 / (1 - np2)``,
+        - statsmodels_f2, statsmodels_f: Cohen's f squared and f, allowing unequal variances,
+        - statsmodels_anova: Cohen's f assuming equal variances,
+        - power: achieved power of the F test for statsmodels_f and the observations of the DV,
+        - required_nobs: total number of observations needed to detect the target effect size.
+    """
+    from statsmodels.stats.oneway import effectsize_oneway
+
+    moments = group_moments(df, dvs, group)
+    k_groups = len(moments)
+    rows = []
+    for dv in dvs:
+        counts = moments[dv, 'count'].to_numpy()
+        means = moments[dv, 'mean'].to_numpy()
+        variances = moments[dv, 'var'].to_numpy()
+        grand_mean = (counts * means).sum() / counts.sum()
+        ss_between = (counts * (means - grand_mean) ** 2).sum()
+        ss_within = ((counts - 1) * variances).sum()
+        np2 = ss_between / (ss_between + ss_within)
+        f2 = effectsize_oneway(means, variances, counts, use_var='unequal')
+        f = np.sqrt(f2)
+        rows.append({
+            'dv': dv,
+            'np2': np2,
+            'f2': np2 / (1 - np2),
+            'statsmodels_f2': f2,
+            'statsmodels_f': f,
+            'statsmodels_anova': np.sqrt(
+                effectsize_oneway(means, variances, counts, use_var='equal')
+            ),
+            'power': achieved_power(float(f), int(counts.sum()), alpha, k_groups),
+            'required_nobs': required_nobs(target_effect_size, alpha, power, k_groups),
+        })
+    return pd.DataFrame(rows)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', type=Path, help='Workbook with the data')
+    parser.add_argument('--sheet', default=0, help='Name of the sheet')
+    parser.add_argument('--skiprows', type=int, default=0, help='Rows skipped before the header')
+    parser.add_argument('--group', required=True, help='Column of the groups')
+    parser.add_argument('--dvs', nargs='+', required=True, help='Columns of the dependent variables')
+    args = parser.parse_args(argv)
+
+    df = pd.read_excel(args.path, sheet_name=args.sheet, skiprows=args.skiprows)
+    print(summarize(df, args.dvs, args.group).to_markdown())
+
+
+if __name__ == '__main__':
+    main()
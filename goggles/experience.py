@@ -0,0 +1,42 @@
+import logging
+from pathlib import Path
+
+import pandas as pd
+
+from goggles import COLUMN_SEPARATOR, assumptions, nonparametric, parametric, results
+
+logger = logging.getLogger("colour")
+
+EXPERIENCED = 'Tak'
+INEXPERIENCED = 'Nie'
+
+
+def compare_column(
+    df: pd.DataFrame,
+    experience_column: str,
+    col: str,
+    output_folder: Path,
+    alpha: float = 0.05,
+):
+    """Compare the column between the experienced and the inexperienced participants."""
+    with results.scope(column=col):
+        logger.debug(f"Variable: {col}")
+        output_folder.mkdir(exist_ok=True, parents=True)
+        exp = df.loc[df[experience_column] == EXPERIENCED, col].dropna()
+        inexp = df.loc[df[experience_column] == INEXPERIENCED, col].dropna()
+        normality_records = assumptions.normality({'exp': exp, 'inexp': inexp}, alpha=alpha)
+        variances_record = assumptions.equal_variances(exp, inexp, alpha=alpha)
+        results.add(*normality_records, variances_record)
+        logger.debug(f'Experienced mean: {exp.mean()}')
+        logger.debug(f'Inexperienced mean: {inexp.mean()}')
+        if not any(record.pvalue < alpha for record in normality_records):
+            equal_var = variances_record.pvalue > alpha
+            results.add(parametric.paired_t_test(exp, inexp, equal_var, alpha=alpha))
+        else:
+            results.add(nonparametric.mann_whitney_u_test(exp, inexp, alpha))
+        logger.debug(COLUMN_SEPARATOR)
+
+
+def evaluate(df: pd.DataFrame, experience_column: str, results_folder: Path, columns):
+    for col in columns:
+        compare_column(df, experience_column, col, results_folder.joinpath(col))
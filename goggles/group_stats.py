@@ -0,0 +1,102 @@
+from collections.abc import Sequence
+
+import numpy as np
+import pandas as pd
+from scipy.stats import rankdata
+
+
+class GroupStats:
+    """Sufficient statistics of a one-way layout, computed in a single pass over the data.
+
+    The observations of all groups are concatenated into one array, with the groups laid out
+    contiguously, so that every per-group statistic is a segmented reduction over that array.
+    The parametric, nonparametric, effect size and descriptive tests accept an instance of this
+    class in place of recomputing counts, moments, medians and ranks themselves.
+
+    :raises ValueError: If a group has no observations, e.g. after trimming or masking.
+    """
+
+    def __init__(self, groups: Sequence[Sequence[float]], names: Sequence[str] | None = None):
+        arrays = [np.asarray(group, dtype=float) for group in groups]
+        self.names = list(names) if names is not None else list(range(len(arrays)))
+        self.values = np.concatenate(arrays)
+        self.sizes = np.array([len(array) for array in arrays])
+        if not np.all(self.sizes > 0):
+            # Segmented reductions would take the next group's observations for an empty group.
+            empty = [name for name, size in zip(self.names, self.sizes) if size == 0]
+            raise ValueError(f'Groups {empty} have no observations')
+        self.offsets = np.concatenate(([0], np.cumsum(self.sizes)[:-1]))
+        self.labels = np.repeat(np.arange(len(arrays)), self.sizes)
+
+        self.sums = np.add.reduceat(self.values, self.offsets)
+        self.sums_of_squares = np.add.reduceat(self.values ** 2, self.offsets)
+        self.means = self.sums / self.sizes
+        self.deviations = self.values - self.means[self.labels]
+        self.central_moments = {
+            power: np.add.reduceat(self.deviations ** power, self.offsets) / self.sizes
+            for power in (2, 3, 4)
+        }
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.variances = self.central_moments[2] * self.sizes / (self.sizes - 1)
+
+        # Sorting by group, then by value, sorts every group within its own segment.
+        self.sorted = self.values[np.lexsort((self.values, self.labels))]
+        self.minima = self.sorted[self.offsets]
+        self.maxima = self.sorted[self.offsets + self.sizes - 1]
+        self.medians = (
+            self.sorted[self.offsets + (self.sizes - 1) // 2]
+            + self.sorted[self.offsets + self.sizes // 2]
+        ) / 2
+
+        self.ranks = rankdata(self.values)
+        self.rank_sums = np.add.reduceat(self.ranks, self.offsets)
+        _, tie_counts = np.unique(self.values, return_counts=True)
+        self.tie_sum = (tie_counts ** 3 - tie_counts).sum()
+
+    @classmethod
+    def from_samples(cls, samples: dict[str, pd.Series]) -> 'GroupStats':
+        return cls(list(samples.values()), list(samples.keys()))
+
+    @property
+    def k(self) -> int:
+        return len(self.sizes)
+
+    @property
+    def n(self) -> int:
+        return len(self.values)
+
+    @property
+    def grand_mean(self) -> float:
+        return self.sums.sum() / self.n
+
+    @property
+    def ss_between(self) -> float:
+        return (self.sizes * (self.means - self.grand_mean) ** 2).sum()
+
+    @property
+    def ss_within(self) -> float:
+        return (self.central_moments[2] * self.sizes).sum()
+
+    @property
+    def ss_total(self) -> float:
+        return self.ss_between + self.ss_within
+
+    @property
+    def skewness(self) -> np.ndarray:
+        """Adjusted Fisher-Pearson skewness of every group, as computed by pandas."""
+        n, m2, m3 = self.sizes, self.central_moments[2], self.central_moments[3]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.sqrt(n * (n - 1)) / (n - 2) * m3 / m2 ** 1.5
+
+    @property
+    def kurtosis(self) -> np.ndarray:
+        """Unbiased excess kurtosis of every group, as computed by pandas."""
+        n, m2, m4 = self.sizes, self.central_moments[2], self.central_moments[4]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return (n - 1) / ((n - 2) * (n - 3)) * ((n + 1) * m4 / m2 ** 2 - 3 * (n - 1))
+
+    def group(self, i: int) -> np.ndarray:
+        return self.values[self.offsets[i]:self.offsets[i] + self.sizes[i]]
+
+    def groups(self) -> list[np.ndarray]:
+        return [self.group(i) for i in range(self.k)]
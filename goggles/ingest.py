@@ -0,0 +1,140 @@
+"""Streaming ingestion of fixation-level eye-tracker exports.
+
+An export has one row per fixation, with the participant, the goggles condition, the area of
+interest (AOI) hit by the fixation, and the fixation's start and duration. The export is read in
+chunks, and every chunk is reduced to the total fixation duration (TFD) and the time to first
+fixation (TTFF) of every participant, AOI and condition, so memory is bounded by the number of
+those combinations rather than the number of fixations.
+
+The analyses expect seconds, e.g. ``TTFF_BUCKET_CUTOFF``, and a TTFF measured from the onset of
+the stimulus, whereas exports usually time fixations in milliseconds from the start of the
+recording. The export's unit is therefore always given, and the onsets of the stimulus of every
+condition and participant are subtracted from the TTFF.
+
+Usage::
+
+    onsets = pd.read_csv('onsets.csv', index_col=['Goggles', 'Participant'])['Onset']
+    aggregates = aggregate_fixations(Path('export.csv'), time_scale=1e-3, onsets=onsets)
+    evaluate_differences_in_means(frames(aggregates, 'TFD'), columns, 'TFD')
+"""
+import logging
+from collections import namedtuple
+from pathlib import Path
+
+import pandas as pd
+
+logger = logging.getLogger("colour")
+
+FixationColumns = namedtuple(
+    'FixationColumns',
+    ('participant', 'condition', 'aoi', 'start', 'duration'),
+    defaults=('Participant', 'Goggles', 'AOI', 'Start', 'Duration'),
+)
+
+METRICS = {'TFD': 'tfd', 'TTFF': 'ttff'}
+
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+
+def _aggregate(chunk: pd.DataFrame, columns: FixationColumns) -> pd.DataFrame:
+    # Fixations outside of all AOIs are kept as a missing AOI, so that every participant of a
+    # condition is listed even without a single fixation on an AOI.
+    keys = [columns.condition, columns.participant, columns.aoi]
+    return chunk.groupby(keys, sort=False, dropna=False).agg(
+        tfd=(columns.duration, 'sum'),
+        ttff=(columns.start, 'min'),
+    )
+
+
+def _combine(aggregates: pd.DataFrame, partial: pd.DataFrame) -> pd.DataFrame:
+    both = pd.concat([aggregates, partial])
+    combined = both.groupby(level=[0, 1, 2], sort=False, dropna=False)
+    return combined.agg({'tfd': 'sum', 'ttff': 'min'})
+
+
+def aggregate_fixations(
+    path: Path,
+    columns: FixationColumns = FixationColumns(),
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    *,
+    time_scale: float,
+    onsets: pd.Series | None = None,
+    event_column: str | None = None,
+    event_value: str = 'Fixation',
+    **read_kwargs,
+) -> pd.DataFrame:
+    """Total fixation duration and time to first fixation of every participant, AOI and condition.
+
+    :param path: CSV export with one row per fixation, possibly compressed.
+    :param columns: Names of the export's columns.
+    :param chunk_size: Number of rows read at once.
+    :param time_scale: Factor converting the export's times to seconds, e.g. 1e-3 for an export
+    in milliseconds.
+    :param onsets: Onset of the stimulus of every condition and participant, indexed by both, in
+    the export's unit. It is subtracted from the start of the first fixation. By default, the TTFF
+    is the start of the first fixation, i.e. from the start of the recording.
+    :param event_column: If given, only rows with ``event_value`` in this column are fixations.
+    :param read_kwargs: Keyword arguments of ``pandas.read_csv``, e.g. ``sep``.
+    :return: A table indexed by condition, participant and AOI, with 'tfd' and 'ttff' columns.
+    """
+    usecols = list(columns) + ([event_column] if event_column is not None else [])
+    aggregates = None
+    n_rows = 0
+    for chunk in pd.read_csv(path, usecols=usecols, chunksize=chunk_size, **read_kwargs):
+        n_rows += len(chunk)
+        if event_column is not None:
+            chunk = chunk[chunk[event_column] == event_value]
+        partial = _aggregate(chunk, columns)
+        aggregates = partial if aggregates is None else _combine(aggregates, partial)
+    logger.debug(f'Aggregated {n_rows} rows of {path.name}')
+    if aggregates is None:
+        raise ValueError(f'{path} has no rows')
+    aggregates.index.names = ['condition', 'participant', 'aoi']
+    if onsets is not None:
+        trials = aggregates.index.droplevel('aoi')
+        aligned = onsets.reindex(trials)
+        missing = trials[aligned.isna().to_numpy()].unique()
+        if len(missing):
+            raise ValueError(f'No onset of the conditions and participants {missing.tolist()}')
+        aggregates['ttff'] -= aligned.to_numpy()
+    return aggregates * time_scale
+
+
+def frames(
+    aggregates: pd.DataFrame,
+    factor: str,
+    conditions: dict[str, str] | None = None,
+) -> dict[str, pd.DataFrame]:
+    """Per-condition participant x AOI tables of a metric, as the sheets read by ``read_data``.
+
+    Participants without a fixation on an AOI have a TFD of 0 and a missing TTFF.
+
+    :param aggregates: Output of ``aggregate_fixations``.
+    :param factor: 'TFD' or 'TTFF'.
+    :param conditions: Condition value - group name dictionary, which also orders the groups. By
+    default, the groups are the conditions, in their order of appearance.
+    :return: A group name - data frame dictionary.
+    """
+    table = aggregates[METRICS[factor]].unstack('aoi')
+    table = table.loc[:, table.columns.notna()]
+    if factor == 'TFD':
+        table = table.fillna(0.0)
+    if conditions is None:
+        conditions = {condition: condition for condition in table.index.unique('condition')}
+    return {
+        group_name: table.xs(condition, level='condition')
+        for condition, group_name in conditions.items()
+    }
+
+
+def read_fixations(
+    path: Path,
+    factor: str,
+    conditions: dict[str, str] | None = None,
+    **options,
+) -> dict[str, pd.DataFrame]:
+    """Per-condition participant x AOI tables of a metric, read from a fixation-level export.
+
+    :param options: Keyword arguments of ``aggregate_fixations``.
+    """
+    return frames(aggregate_fixations(path, **options), factor, conditions)
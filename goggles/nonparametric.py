@@ -2,10 +2,13 @@ import logging
 
 import numpy as np
 import pandas as pd
-import scikit_posthocs as sp
-from scipy.stats import kruskal, mannwhitneyu
-import pingouin as pg
-from goggles.stats import TestResult, interpret_p_values
+from scipy.stats import chi2, chi2_contingency, mannwhitneyu
+
+from goggles import posthoc, results
+from goggles.group_stats import GroupStats
+from goggles.results import TestRecord
+from goggles.stats import MARGINAL_ALPHA, MAX_REPORTED_PAIRS, TestResult, interpret_p_values
+from goggles.utils import log_pairs
 
 logger = logging.getLogger("colour")
 
@@ -13,19 +16,26 @@ logger = logging.getLogger("colour")
 def mean_equality_between_groups(
     samples: dict[str, pd.Series],
     alpha: float = 0.05,
-    marginal_alpha: float = 0.1
-) -> bool:
-    groups_names = []
-    values = []
-    for sample_name, sample_values in samples.items():
-        groups_names.extend([sample_name] * len(sample_values))
-        values.extend(sample_values.to_list())
-    df = pd.DataFrame({'group': groups_names, 'value': values})
+    marginal_alpha: float = MARGINAL_ALPHA,
+    stats: GroupStats | None = None,
+    max_pairs: int | None = MAX_REPORTED_PAIRS,
+) -> list[TestRecord]:
+    """Welch's ANOVA, followed by the Games-Howell test if the means differ at least marginally.
 
-    welch_res = pg.welch_anova(dv='value', between='group', data=df).iloc[0]
+    :param max_pairs: Number of pairs above which only the most significant ones are logged, see
+    ``goggles.stats.top_pairs``. All pairs are recorded.
+    :return: The record of Welch's ANOVA, followed by those of the Games-Howell pairs if the means
+    differ at least marginally, i.e. if its p-value is at most ``marginal_alpha``.
+    """
+    if stats is None:
+        stats = GroupStats.from_samples(samples)
+    welch_res, eta_squared = posthoc.welch_anova(stats)
 
     logger.debug('\nWelch\'s ANOVA')
-    p_value = welch_res['p-unc']
+    p_value = welch_res.pvalue
+    records = [
+        results.create('welch_anova', welch_res.statistic, p_value, effect_size=eta_squared)
+    ]
     if p_value <= marginal_alpha:
         if p_value <= alpha:
             logger.debug(
@@ -35,20 +45,58 @@ def mean_equality_between_groups(
             logger.debug(
                 "Some of the groups' averages consider to be marginally not equal."
             )
-        gh_res = pg.pairwise_gameshowell(dv='value', between='group', data=df)
+        gh_res = posthoc.games_howell(stats)
+        records += results.create_table(
+            'games_howell',
+            gh_res,
+            statistic='T',
+            pvalue='pval',
+            group1='A',
+            group2='B',
+            effect_size='hedges',
+        )
         logger.debug('Games-Howell pairwise comparison')
-        logger.debug(gh_res.to_markdown())
+        log_pairs(gh_res, 'pval', alpha, max_pairs, markdown=True)
     else:
         logger.debug(
             f"Fail to reject the null hypothesis: The average of all groups assumed to be equal."
         )
-    logger.debug(f"F Statistic: {welch_res['F']:.4f}, P-value: {p_value:.4f}")
-    logger.debug(f"Observed effect size {welch_res['np2']}")
-    return welch_res['p-unc'] <= marginal_alpha
+    logger.debug(f"F Statistic: {welch_res.statistic:.4f}, P-value: {p_value:.4f}")
+    logger.debug(f"Observed effect size {eta_squared}")
+    return records
+
+
+def kruskal_h(stats: GroupStats) -> TestResult:
+    """Kruskal-Wallis H test, equivalent to ``scipy.stats.kruskal``."""
+    n = stats.n
+    statistic = 12 / (n * (n + 1)) * (stats.rank_sums ** 2 / stats.sizes).sum() - 3 * (n + 1)
+    statistic /= 1 - stats.tie_sum / (n ** 3 - n)
+    return TestResult(statistic, chi2.sf(statistic, stats.k - 1))
+
+
+def median_test(stats: GroupStats, correction: bool = True) -> TestResult:
+    """Mood's median test, equivalent to ``scipy.stats.median_test`` with ties counted below."""
+    grand_median = np.median(stats.values)
+    above = np.add.reduceat(stats.values > grand_median, stats.offsets)
+    table = np.vstack((above, stats.sizes - above))
+    statistic, p_value, _, _ = chi2_contingency(table, correction=correction)
+    return TestResult(statistic, p_value)
 
 
-def kruskal_wallis_nonparametric_anova(*groups, alpha=0.05, marginal_alpha=0.1) -> bool:
-    res = TestResult._make(kruskal(*groups))
+def kruskal_wallis_nonparametric_anova(
+    *groups,
+    alpha=0.05,
+    marginal_alpha=MARGINAL_ALPHA,
+    stats: GroupStats | None = None,
+) -> TestRecord:
+    """Kruskal-Wallis H test.
+
+    :return: The test's record. The groups differ at least marginally if its p-value is at most
+    ``marginal_alpha``.
+    """
+    if stats is None:
+        stats = GroupStats(groups)
+    res = kruskal_h(stats)
     logger.debug('\nKruskal-Wallis Nonparametric Test for Equality of Means')
     if res.pvalue <= marginal_alpha:
         if res.pvalue <= alpha:
@@ -64,10 +112,16 @@ def kruskal_wallis_nonparametric_anova(*groups, alpha=0.05, marginal_alpha=0.1)
             f"Fail to reject the null hypothesis: The average of all groups assumed to be equal."
         )
     logger.debug(f"H Statistic: {res.statistic:.4f}, P-value: {res.pvalue:.4f}")
-    return res.pvalue <= marginal_alpha
+    return results.create('kruskal_wallis', *res)
 
 
-def pairwise_comparisons_dunn(samples, alpha: float = 0.05, correction='holm') -> bool:
+def pairwise_comparisons_dunn(
+    samples,
+    alpha: float = 0.05,
+    correction='holm',
+    stats: GroupStats | None = None,
+    max_pairs: int | None = MAX_REPORTED_PAIRS,
+) -> list[TestRecord]:
     """Post hoc pairwise test for multiple comparisons of mean rank sums (Dunn’s test).
 
     :param samples: A factor value - observations dictionary.
@@ -75,26 +129,29 @@ def pairwise_comparisons_dunn(samples, alpha: float = 0.05, correction='holm') -
     :param correction: Defaults to Holm-Bonferroni correction as it provides a good balance
     between reducing false positives and maintaining statistical power. Other corrections can be
     e.g. 'bonferroni' for Bonferroni method or 'fdr_bh' for Benjamini-Hochberg.
-    :return: Whether at least one pair is significant
+    :param stats: Precomputed statistics of the samples.
+    :param max_pairs: Number of pairs above which only the most significant ones are logged, see
+    ``goggles.stats.top_pairs``. All pairs are recorded.
+    :return: The records of the pairs. A pair is significant if its p-value is at most ``alpha``.
     """
-    res: pd.DataFrame = sp.posthoc_dunn(
-        [list(values) for values in samples.values()],
-        p_adjust=correction
-    )
-    res.columns = samples.keys()
-    res.index = samples.keys()
-    mask = np.triu(np.ones(res.shape), k=1).astype(bool)
-    df_transformed = res.where(mask).stack().reset_index()
-    df_transformed.columns = ['Group 1', 'Group 2', 'p-value']
+    if stats is None:
+        stats = GroupStats.from_samples(samples)
+    df_transformed = posthoc.dunn(stats, correction)
     df_transformed['Significant'] = interpret_p_values(df_transformed['p-value'], alpha)
     logger.debug('\nPost-hoc Dunn\'s Test for multiple comparisons of mean rank sums')
-    logger.debug(df_transformed)
-    return (df_transformed['p-value'] <= alpha).any()
+    log_pairs(df_transformed, 'p-value', alpha, max_pairs)
+    return results.create_table(
+        'dunn', df_transformed, pvalue='p-value', group1='Group 1', group2='Group 2'
+    )
+
 
+def mann_whitney_u_test(sample1, sample2, alpha: float = 0.05) -> TestRecord:
+    """Mann-Whitney U test of two independent samples.
 
-def mann_whitney_u_test(sample1, sample2, alpha: float = 0.05) -> bool:
+    :return: The test's record. The samples differ if its p-value is at most ``alpha``.
+    """
     res = mannwhitneyu(sample1, sample2)
     logger.debug(
         f"Two independent samples Mann-Whitney U-test: U = {res.statistic}, p = {res.pvalue}"
     )
-    return res.pvalue <= alpha
\ No newline at end of file
+    return results.create('mann_whitney_u', res.statistic, res.pvalue)
\ No newline at end of file
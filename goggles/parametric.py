@@ -1,17 +1,38 @@
 import logging
-from collections.abc import Sequence
 
 import pandas as pd
-from scipy.stats import f_oneway, tukey_hsd, ttest_ind
-from scipy.stats._hypotests import TukeyHSDResult
+from scipy.stats import f, ttest_ind
 
-from goggles.stats import TestResult, interpret_p_values
+from goggles import posthoc, results
+from goggles.group_stats import GroupStats
+from goggles.results import TestRecord
+from goggles.stats import MARGINAL_ALPHA, MAX_REPORTED_PAIRS, TestResult, interpret_p_values
+from goggles.utils import log_pairs
 
 logger = logging.getLogger("colour")
 
 
-def mean_equality_between_groups(*groups, alpha: float = 0.05, marginal_alpha: float = 0.1) -> bool:
-    res = TestResult._make(f_oneway(*groups))
+def one_way_f(stats: GroupStats) -> TestResult:
+    """One-way ANOVA F test, equivalent to ``scipy.stats.f_oneway``."""
+    df_between, df_within = stats.k - 1, stats.n - stats.k
+    statistic = (stats.ss_between / df_between) / (stats.ss_within / df_within)
+    return TestResult(statistic, f.sf(statistic, df_between, df_within))
+
+
+def mean_equality_between_groups(
+    *groups,
+    alpha: float = 0.05,
+    marginal_alpha: float = MARGINAL_ALPHA,
+    stats: GroupStats | None = None,
+) -> TestRecord:
+    """One-way ANOVA F test.
+
+    :return: The test's record. The means differ at least marginally if its p-value is at most
+    ``marginal_alpha``.
+    """
+    if stats is None:
+        stats = GroupStats(groups)
+    res = one_way_f(stats)
     logger.debug('\nANOVA Test for Equality of Means')
     if res.pvalue <= marginal_alpha:
         if res.pvalue <= alpha:
@@ -27,49 +48,43 @@ def mean_equality_between_groups(*groups, alpha: float = 0.05, marginal_alpha: f
             f"Fail to reject the null hypothesis: The average of all groups assumed to be equal."
         )
     logger.debug(f"F Statistic: {res.statistic:.4f}, P-value: {res.pvalue:.4f}")
-    return res.pvalue <= marginal_alpha
+    return results.create('anova_f', *res)
 
 
-def _tukey_hsd_results_info(
-    names: Sequence[str],
-    res: TukeyHSDResult,
-    alpha: float = 0.05,
-) -> pd.DataFrame:
-    confidence_level = res.confidence_interval(confidence_level=1 - alpha)
-
-    rows = []
-
-    for i in range(res.pvalue.shape[0]):
-        for j in range(i + 1, res.pvalue.shape[0]):
-            rows.append(
-                (
-                    names[i],
-                    names[j],
-                    res.statistic[i, j],
-                    res.pvalue[i, j],
-                    confidence_level.low[i, j],
-                    confidence_level.high[i, j],
-                )
-            )
-    result = pd.DataFrame.from_records(
-        rows,
-        columns=['Group 1', 'Group 2', 'Statistic', 'p-value', 'Lower CI', 'Upper CI']
+def _tukey_hsd_records(result: pd.DataFrame) -> list[TestRecord]:
+    return results.create_table(
+        'tukey_hsd',
+        result,
+        statistic='Statistic',
+        pvalue='p-value',
+        group1='Group 1',
+        group2='Group 2',
+        ci_low='Lower CI',
+        ci_high='Upper CI',
     )
-    result['Significant'] = interpret_p_values(result['p-value'], alpha)
 
-    return result
 
+def pairwise_comparisons(
+    samples: dict[str, pd.Series],
+    alpha: float = 0.05,
+    stats: GroupStats | None = None,
+    max_pairs: int | None = MAX_REPORTED_PAIRS,
+) -> list[TestRecord]:
+    """Tukey's HSD test of all pairs of groups.
 
-def pairwise_comparisons(samples: dict[str, pd.Series], alpha: float = 0.05) -> bool:
-    keys = list(samples.keys())
-    res = tukey_hsd(*samples.values())
+    :param max_pairs: Number of pairs above which only the most significant ones are logged, see
+    ``goggles.stats.top_pairs``. All pairs are recorded.
+    :return: The records of the pairs. A pair is significant if its p-value is at most ``alpha``.
+    """
+    if stats is None:
+        stats = GroupStats.from_samples(samples)
     logger.debug(
         f"Tukey's HSD Pairwise Group Comparisons at {(1 - alpha) * 100:.1f}% Confidence Interval)\n"
     )
-    res_df = _tukey_hsd_results_info(keys, res, alpha)
-    logger.debug(res_df)
-
-    return any(res.pvalue.ravel() <= alpha)
+    res_df = posthoc.tukey_hsd(stats, alpha)
+    res_df['Significant'] = interpret_p_values(res_df['p-value'], alpha)
+    log_pairs(res_df, 'p-value', alpha, max_pairs)
+    return _tukey_hsd_records(res_df)
 
 
 def paired_t_test(
@@ -78,7 +93,11 @@ def paired_t_test(
     equal_var: bool,
     nan_policy: str = 'omit',
     alpha: float = 0.05,
-) -> bool:
+) -> TestRecord:
+    """Standard or Welch's t-test of two independent samples.
+
+    :return: The test's record. The means differ if its p-value is at most ``alpha``.
+    """
     res = ttest_ind(sample1, sample2, equal_var=equal_var, nan_policy=nan_policy)
     if equal_var:
         logger.debug(
@@ -88,4 +107,4 @@ def paired_t_test(
         logger.debug(
             f"Two independent samples Welch's t-test: t = {res.statistic}, p = {res.pvalue}"
         )
-    return res.pvalue <= alpha
+    return results.create('t_test' if equal_var else 'welch_t_test', res.statistic, res.pvalue)
@@ -0,0 +1,190 @@
+"""Permutation tests of the one-way layout for the F, Welch F, Kruskal-Wallis H and Mood's median
+statistics.
+
+All four statistics are evaluated on the same permutations of the pooled observations. Each
+permutation is a row of an index matrix, whose consecutive segments are the permuted groups, so
+every statistic reduces to segmented sums over the rows of that matrix.
+"""
+import itertools
+import math
+from collections import namedtuple
+from collections.abc import Iterator, Sequence
+
+import numpy as np
+from scipy.stats import beta
+
+from goggles.bootstrap import DEFAULT_MAX_CHUNK_BYTES
+from goggles.group_stats import GroupStats
+
+PermutationResult = namedtuple(
+    'PermutationResult',
+    ('statistic', 'pvalue', 'n_permutations', 'exact'),
+)
+
+TESTS = ('f', 'welch', 'kruskal', 'median')
+
+
+class _Kernels:
+    """Vectorized statistics of permuted groups, for a matrix of permuted indices."""
+
+    def __init__(self, stats: GroupStats):
+        self.stats = stats
+        self.values = stats.values
+        self.ranks = stats.ranks
+        self.above = (stats.values > np.median(stats.values)).astype(float)
+        self.ss_total = ((stats.values - stats.grand_mean) ** 2).sum()
+        n = stats.n
+        self.tie_correction = 1 - stats.tie_sum / (n ** 3 - n)
+
+    def _sums(self, values: np.ndarray, indices: np.ndarray) -> np.ndarray:
+        return np.add.reduceat(values[indices], self.stats.offsets, axis=1)
+
+    def __call__(self, indices: np.ndarray) -> dict[str, np.ndarray]:
+        stats = self.stats
+        k, n, sizes = stats.k, stats.n, stats.sizes
+
+        sums = self._sums(self.values, indices)
+        means = sums / sizes
+        ss_between = (sizes * (means - stats.grand_mean) ** 2).sum(axis=1)
+        ss_within = self.ss_total - ss_between
+        f_statistic = (ss_between / (k - 1)) / (ss_within / (n - k))
+
+        sums_of_squares = self._sums(self.values ** 2, indices)
+        variances = (sums_of_squares - sizes * means ** 2) / (sizes - 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weights = sizes / variances
+            total_weight = weights.sum(axis=1, keepdims=True)
+            weighted_mean = (weights * means).sum(axis=1, keepdims=True) / total_weight
+            a = (weights * (means - weighted_mean) ** 2).sum(axis=1) / (k - 1)
+            c = ((1 - weights / total_weight) ** 2 / (sizes - 1)).sum(axis=1)
+            welch_statistic = a / (1 + 2 * (k - 2) / (k ** 2 - 1) * c)
+
+        rank_sums = self._sums(self.ranks, indices)
+        h_statistic = 12 / (n * (n + 1)) * (rank_sums ** 2 / sizes).sum(axis=1) - 3 * (n + 1)
+        h_statistic /= self.tie_correction
+
+        # Pearson's chi-squared statistic of the above/below the grand median table.
+        above = self._sums(self.above, indices)
+        expected_above = sizes * self.above.sum() / n
+        expected_below = sizes - expected_above
+        median_statistic = (
+            (above - expected_above) ** 2 / expected_above
+            + (above - expected_above) ** 2 / expected_below
+        ).sum(axis=1)
+
+        return {
+            'f': f_statistic,
+            'welch': welch_statistic,
+            'kruskal': h_statistic,
+            'median': median_statistic,
+        }
+
+
+def count_assignments(sizes) -> int:
+    """Number of distinct assignments of the pooled observations to groups of the given sizes."""
+    count, remaining = 1, int(sum(sizes))
+    for size in sizes:
+        count *= math.comb(remaining, int(size))
+        remaining -= int(size)
+    return count
+
+
+def _assignments(remaining: tuple[int, ...], sizes: tuple[int, ...]) -> Iterator[tuple[int, ...]]:
+    if len(sizes) == 1:
+        yield remaining
+        return
+    for chosen in itertools.combinations(remaining, sizes[0]):
+        chosen_set = set(chosen)
+        rest = tuple(i for i in remaining if i not in chosen_set)
+        for tail in _assignments(rest, sizes[1:]):
+            yield chosen + tail
+
+
+def _exceedances(permuted: dict[str, np.ndarray], thresholds: np.ndarray) -> np.ndarray:
+    return np.array([
+        (permuted[test] >= threshold).sum() for test, threshold in zip(TESTS, thresholds)
+    ])
+
+
+def _clopper_pearson(count: np.ndarray, n: int, risk: float) -> tuple[np.ndarray, np.ndarray]:
+    low = np.where(count > 0, beta.ppf(risk / 2, count, n - count + 1), 0.0)
+    high = np.where(count < n, beta.ppf(1 - risk / 2, count + 1, n - count), 1.0)
+    return low, high
+
+
+def permutation_anova(
+    groups: Sequence[Sequence[float]] | None = None,
+    *,
+    alpha: float = 0.05,
+    max_permutations: int = 10000,
+    max_exact: int = 20000,
+    chunk_size: int = 500,
+    stop_risk: float = 1e-3,
+    seed: int | np.random.Generator | None = None,
+    stats: GroupStats | None = None,
+    max_chunk_bytes: int = DEFAULT_MAX_CHUNK_BYTES,
+) -> dict[str, PermutationResult]:
+    """Permutation p-values of the F, Welch F, Kruskal-Wallis H and Mood's median statistics.
+
+    If the number of distinct assignments of the observations to the groups is at most
+    ``max_exact``, all of them are enumerated and the p-values are exact. Otherwise, random
+    permutations are drawn in chunks. After every chunk, a Clopper-Pearson interval at confidence
+    ``1 - stop_risk`` is computed for every p-value. A test stops once its interval lies entirely
+    on one side of ``alpha``, and sampling stops once every test has stopped or
+    ``max_permutations`` have been drawn.
+
+    :param groups: Observations of every group, unless their ``stats`` are given.
+    :param alpha: Significance level used to stop sampling early.
+    :param max_permutations: Maximum number of random permutations.
+    :param max_exact: Maximum number of assignments that are enumerated exhaustively.
+    :param chunk_size: Number of permutations evaluated at once, fewer for large samples.
+    :param stop_risk: Probability of a wrong early decision of any single interval.
+    :param seed: Seed or generator of the random permutations.
+    :param stats: Precomputed statistics of the groups, instead of the groups.
+    :param max_chunk_bytes: Memory budget of one chunk of random permutations: their int64
+    indices and the float64 values of the observations they gather.
+    :return: A test name - result dictionary, for the tests 'f', 'welch', 'kruskal' and 'median'.
+    Mood's statistic is Pearson's chi-squared without continuity correction.
+    """
+    if stats is None:
+        stats = GroupStats(groups)
+    kernels = _Kernels(stats)
+    observed = {
+        test: statistic[0] for test, statistic in kernels(np.arange(stats.n)[np.newaxis]).items()
+    }
+    # Ties of permuted and observed statistics must not be lost to rounding errors.
+    thresholds = np.array([observed[test] * (1 - 1e-12) - 1e-12 for test in TESTS])
+
+    n_assignments = count_assignments(stats.sizes)
+    if n_assignments <= max_exact:
+        exceedances = np.zeros(len(TESTS))
+        assignments = _assignments(tuple(range(stats.n)), tuple(int(s) for s in stats.sizes))
+        while chunk := list(itertools.islice(assignments, chunk_size)):
+            permuted = kernels(np.array(chunk))
+            exceedances += _exceedances(permuted, thresholds)
+        return {
+            test: PermutationResult(observed[test], count / n_assignments, n_assignments, True)
+            for test, count in zip(TESTS, exceedances)
+        }
+
+    rng = np.random.default_rng(seed)
+    exceedances = np.zeros(len(TESTS))
+    draws = np.zeros(len(TESTS), dtype=int)
+    running = np.ones(len(TESTS), dtype=bool)
+    identity = np.arange(stats.n)
+    chunk_size = max(1, min(chunk_size, max_chunk_bytes // (16 * stats.n)))
+    while running.any() and draws.max() < max_permutations:
+        size = min(chunk_size, max_permutations - draws.max())
+        indices = np.tile(identity, (size, 1))
+        permuted = kernels(rng.permuted(indices, axis=1, out=indices))
+        counts = _exceedances(permuted, thresholds)
+        exceedances[running] += counts[running]
+        draws[running] += size
+
+        low, high = _clopper_pearson(exceedances, draws, stop_risk)
+        running &= (low <= alpha) & (high >= alpha)
+
+    return {
+        test: PermutationResult(observed[test], (1 + count) / (1 + n), int(n), False)
+        for test, count, n in zip(TESTS, exceedances, draws)
+    }
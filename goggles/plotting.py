@@ -0,0 +1,146 @@
+import colorsys
+import os
+from collections import namedtuple
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from goggles import profiling
+
+PlotJob = namedtuple('PlotJob', ('kind', 'path', 'data'))
+
+GROUP_COLUMN = 'Goggles'
+
+# Colors of plotly's qualitative palette kept for the goggles of the original studies.
+GROUP_COLORS = {'Transparent': '#636EFA', 'Yellow': '#FECB52', 'Red': '#EF553B'}
+
+_GOLDEN_RATIO = (1 + 5 ** 0.5) / 2
+
+# Fewest plots rendered in a pool of processes: starting the workers and importing matplotlib and
+# plotly in each of them takes longer than rendering a few plots in this process.
+MIN_POOLED_PLOTS = 4
+
+
+def palette(names) -> dict[str, str]:
+    """Distinct colors of any number of groups.
+
+    Groups of ``GROUP_COLORS`` keep their color. The hues of the others are spaced by the golden
+    ratio, so that consecutive groups differ most, with alternating lightness when there are many.
+    """
+    names = list(names)
+    colors = {}
+    for i, name in enumerate(name for name in names if name not in GROUP_COLORS):
+        hue = (0.6 + i / _GOLDEN_RATIO) % 1
+        lightness = 0.45 if i % 2 == 0 else 0.6
+        red, green, blue = colorsys.hls_to_rgb(hue, lightness, 0.7)
+        colors[name] = f'#{round(red * 255):02X}{round(green * 255):02X}{round(blue * 255):02X}'
+    return {name: GROUP_COLORS[name] if name in GROUP_COLORS else colors[name] for name in names}
+
+
+def _render_probability_plot(path: Path, values: np.ndarray, title: str) -> None:
+    # A figure of its own canvas leaves pyplot and the caller's backend untouched.
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from scipy.stats import probplot
+
+    figure = Figure()
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot()
+    probplot(values, dist="norm", plot=axes)
+    axes.set_title(title)
+    figure.savefig(path, bbox_inches='tight', dpi=300)
+
+
+def _render_distribution_plot(
+    path: Path,
+    groups: dict[str, np.ndarray],
+    factor: str,
+    colors: dict[str, str],
+) -> None:
+    import plotly.express as px
+
+    df = pd.DataFrame({
+        factor: np.concatenate(list(groups.values())),
+        GROUP_COLUMN: np.repeat(list(groups.keys()), [len(group) for group in groups.values()]),
+    })
+    fig = px.histogram(df, x=factor, color=GROUP_COLUMN, marginal='box', color_discrete_map=colors)
+    fig.update_layout(template='plotly_white')
+    fig.write_html(path.with_suffix('.html'))
+    fig.write_image(path.with_suffix('.png'), scale=3)
+
+
+_RENDERERS = {
+    'probability': _render_probability_plot,
+    'distribution': _render_distribution_plot,
+}
+
+
+def render(job: PlotJob) -> Path:
+    with profiling.stage(f'{job.kind}_plot'):
+        _RENDERERS[job.kind](job.path, **job.data)
+    return job.path
+
+
+class PlotQueue:
+    """Plots recorded during the analysis, to be rendered after all statistics are computed.
+
+    Rendering uses non-interactive backends only: matplotlib's Agg canvas, without changing the
+    backend of pyplot, and plotly's HTML export and kaleido for static images.
+
+    :param enabled: If false, plots are neither recorded nor rendered.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.jobs: list[PlotJob] = []
+
+    def add(self, job: PlotJob) -> None:
+        if self.enabled:
+            self.jobs.append(job)
+
+    def extend(self, jobs: list[PlotJob]) -> None:
+        for job in jobs:
+            self.add(job)
+
+    def render(self, workers: int | None = None, executor: Executor | None = None) -> list[Path]:
+        """Render and clear the queued plots in a pool of processes.
+
+        The plots are rendered in this process when ``workers`` is 0 or 1, or when fewer than
+        ``MIN_POOLED_PLOTS`` are queued.
+
+        :param workers: Number of processes, defaults to the number of processors.
+        :param executor: Executor to render the plots in, instead of a new pool of processes.
+        :return: Paths of the rendered plots.
+        """
+        jobs, self.jobs = self.jobs, []
+        if not jobs:
+            return []
+        if executor is None and (workers in (0, 1) or len(jobs) < MIN_POOLED_PLOTS):
+            return [render(job) for job in jobs]
+        pool = nullcontext(executor)
+        if executor is None:
+            pool = ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(jobs)))
+        with pool as executor:
+            futures = [profiling.submit(executor, render, job) for job in jobs]
+            return [future.result() for future in futures]
+
+
+def probability_plot(path: Path, values, title: str) -> PlotJob:
+    return PlotJob('probability', path, {'values': np.asarray(values, dtype=float), 'title': title})
+
+
+def distribution_plot(
+    path: Path,
+    groups: dict[str, pd.Series],
+    factor: str,
+    colors: dict[str, str],
+) -> PlotJob:
+    data = {
+        'groups': {name: np.asarray(group, dtype=float) for name, group in groups.items()},
+        'factor': factor,
+        'colors': colors,
+    }
+    return PlotJob('distribution', path, data)
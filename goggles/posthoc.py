@@ -0,0 +1,253 @@
+"""Pairwise post hoc tests of a one-way layout, computed from ``GroupStats``.
+
+Every test evaluates all pairs of groups at once, as vectors indexed by the upper triangle of the
+k x k pair matrix, from the group sizes, means, variances and rank sums.
+
+The p-values of the studentized range of many pairs are integrated for all pairs at once: scipy
+integrates every value separately, which takes seconds for the ~1000 pairs of 50 groups.
+"""
+import functools
+
+import numpy as np
+import pandas as pd
+from scipy.special import gammaln, log_ndtr, logsumexp, ndtr, polygamma
+from scipy.stats import f, norm, studentized_range, t
+
+from goggles.group_stats import GroupStats
+from goggles.stats import TestResult, adjust_p_values
+
+
+# Up to this many values, scipy's studentized range is faster than tabulating the range's tail.
+SCIPY_STUDENTIZED_RANGE_VALUES = 16
+
+# Range of the k standard normals tabulated, beyond which its tail is below 1e-150.
+_RANGE_MAX = 40
+_RANGE_STEP = 0.01
+
+# Newton's method converges to the quantiles of the studentized maximum modulus in a few steps, and
+# bisection of its bracket in about 50.
+_NEWTON_ITERATIONS = 100
+
+
+def _gauss_legendre(panels: int, order: int) -> tuple[np.ndarray, np.ndarray]:
+    """Nodes and weights of the composite Gauss-Legendre rule of the unit interval."""
+    x, weights = np.polynomial.legendre.leggauss(order)
+    edges = np.linspace(0, 1, panels + 1)
+    half = np.diff(edges) / 2
+    nodes = (edges[:-1] + half)[:, None] + half[:, None] * x
+    return nodes.ravel(), (half[:, None] * weights).ravel()
+
+
+@functools.cache
+def _log_range_sf(k: int):
+    """Spline of the log of the probability that the range of k standard normals exceeds w.
+
+    The probability is integrated over the minimum z of the normals, as
+    ``k * phi(z) * (Phi(-z) ** (k - 1) - (Phi(-z) - Phi(-z - w)) ** (k - 1))``, in logs.
+    """
+    from scipy.interpolate import CubicSpline
+
+    w = np.arange(0, _RANGE_MAX + _RANGE_STEP, _RANGE_STEP)[:, None]
+    x, weights = _gauss_legendre(16, 16)
+    lower = np.minimum(-9, -w / 2 - 9)
+    z = lower + (9 - lower) * x
+    log_above_min = log_ndtr(-z)
+    ratio = np.exp(log_ndtr(-z - w) - log_above_min)
+    with np.errstate(divide='ignore'):
+        log_difference = np.log(-np.expm1((k - 1) * np.log1p(-ratio)))
+    log_density = np.log(k) - z ** 2 / 2 - np.log(2 * np.pi) / 2 + (k - 1) * log_above_min
+    log_sf = logsumexp(log_density + log_difference, b=weights * (9 - lower), axis=1)
+    return CubicSpline(w.ravel(), log_sf)
+
+
+def _chi_quadrature(df: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Nodes and log weights of the chi distribution of the standard deviation of df degrees of
+    freedom, a chi variable divided by the square root of df, along a new last axis.
+
+    The nodes are uniform in the log of the variable, which is about normal around 0, with a long
+    left tail for small df.
+    """
+    x, weights = _gauss_legendre(48, 16)
+    nu = df[..., None]
+    spread = np.sqrt(polygamma(1, nu / 2)) / 2
+    lower = np.minimum(-14 * spread, -40 / nu)
+    width = 8 * spread - lower
+    log_s = lower + width * x
+    log_density = np.log(2) + nu / 2 * np.log(nu / 2) - gammaln(nu / 2)
+    log_density = log_density + nu * (log_s - np.exp(2 * log_s) / 2)
+    return np.exp(log_s), log_density + np.log(weights * width)
+
+
+def studentized_range_sf(q, k: int, df) -> np.ndarray:
+    """Survival function of the studentized range, equivalent to ``scipy.stats.studentized_range``.
+
+    Few values are passed to scipy. Otherwise, the tail of the range of k standard normals is
+    tabulated once per k, and integrated over the chi distribution of the standard deviation, in
+    terms of its log, with a fixed Gauss-Legendre rule. The absolute error is below 1e-10. Above
+    1e5 degrees of freedom, scipy evaluates the limit of infinite degrees of freedom instead, from
+    which the distribution differs by the order of 1 / df.
+
+    :param q: Studentized ranges.
+    :param k: Number of groups.
+    :param df: Degrees of freedom, broadcast with ``q``.
+    """
+    q, df = np.broadcast_arrays(np.asarray(q, dtype=float), np.asarray(df, dtype=float))
+    if q.size <= SCIPY_STUDENTIZED_RANGE_VALUES:
+        return studentized_range.sf(q, k, df)
+    s, log_weights = _chi_quadrature(df)
+    w = q[..., None] * s
+    log_tail = np.where(w >= _RANGE_MAX, -np.inf, _log_range_sf(k)(np.minimum(w, _RANGE_MAX)))
+    return np.exp(log_weights + log_tail).sum(axis=-1)
+
+
+def studentized_maximum_modulus_ppf(p, c: int, df) -> np.ndarray:
+    """Quantile of the studentized maximum modulus, the largest absolute value of c independent
+    standard normals divided by a common standard deviation of df degrees of freedom.
+
+    The distribution function ``E[(2 * Phi(q * s) - 1) ** c]`` is integrated over the standard
+    deviation s with the quadrature of ``studentized_range_sf``, and solved for q with Newton's
+    method, safeguarded by bisection.
+
+    :param p: Probabilities.
+    :param c: Number of normals, e.g. of contrasts.
+    :param df: Degrees of freedom, broadcast with ``p``.
+    """
+    p, df = np.broadcast_arrays(np.asarray(p, dtype=float), np.asarray(df, dtype=float))
+    s, log_weights = _chi_quadrature(df)
+    # Sidak's inequality bounds the quantile from above, close to it.
+    low, high = np.zeros_like(p), t.ppf((1 + p ** (1 / c)) / 2, df)
+    q = high
+    for _ in range(_NEWTON_ITERATIONS):
+        z = q[..., None] * s
+        with np.errstate(divide='ignore'):
+            log_within = np.log1p(-2 * ndtr(-z))
+        terms = np.exp(log_weights + (c - 1) * log_within)
+        cdf = (terms * np.exp(log_within)).sum(axis=-1)
+        density = (terms * s * np.exp(-z ** 2 / 2)).sum(axis=-1) * c * np.sqrt(2 / np.pi)
+        low, high = np.where(cdf < p, q, low), np.where(cdf < p, high, q)
+        # Steps out of the bracket of the quantile, where the distribution function is flat, are
+        # replaced by bisection.
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = q - (cdf - p) / density
+        step = np.where((newton >= low) & (newton <= high), newton, (low + high) / 2) - q
+        q = q + step
+        if np.all(np.abs(step) <= 1e-12 * q):
+            break
+    return q
+
+
+def pairs(k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Indices of the first and second group of every pair, in row-major order."""
+    return np.triu_indices(k, k=1)
+
+
+def _names(stats: GroupStats, indices: np.ndarray) -> np.ndarray:
+    return np.asarray(stats.names, dtype=object)[indices]
+
+
+def welch_anova(stats: GroupStats) -> tuple[TestResult, float]:
+    """Welch's heteroscedastic F test.
+
+    :return: The test's result, and the eta squared of the groups.
+    """
+    k, sizes = stats.k, stats.sizes
+    weights = sizes / stats.variances
+    total_weight = weights.sum()
+    weighted_mean = (weights * stats.means).sum() / total_weight
+    a = (weights * (stats.means - weighted_mean) ** 2).sum() / (k - 1)
+    c = ((1 - weights / total_weight) ** 2 / (sizes - 1)).sum()
+    statistic = a / (1 + 2 * (k - 2) / (k ** 2 - 1) * c)
+    p_value = f.sf(statistic, k - 1, (k ** 2 - 1) / (3 * c))
+    return TestResult(statistic, p_value), stats.ss_between / stats.ss_total
+
+
+def tukey_hsd(stats: GroupStats, alpha: float = 0.05) -> pd.DataFrame:
+    """Tukey's honestly significant differences, equivalent to ``scipy.stats.tukey_hsd``.
+
+    :return: A table of the pairs, with the difference of means as 'Statistic', its p-value and
+    its confidence interval at level ``1 - alpha``.
+    """
+    first, second = pairs(stats.k)
+    df = stats.n - stats.k
+    mse = stats.ss_within / df
+    difference = stats.means[first] - stats.means[second]
+    se = np.sqrt(mse / 2 * (1 / stats.sizes[first] + 1 / stats.sizes[second]))
+    p_values = studentized_range_sf(np.abs(difference) / se, stats.k, df)
+    critical = studentized_range.ppf(1 - alpha, stats.k, df) * se
+    return pd.DataFrame({
+        'Group 1': _names(stats, first),
+        'Group 2': _names(stats, second),
+        'Statistic': difference,
+        'p-value': p_values,
+        'Lower CI': difference - critical,
+        'Upper CI': difference + critical,
+    })
+
+
+def games_howell(stats: GroupStats) -> pd.DataFrame:
+    """Games-Howell test, with the columns of ``pingouin.pairwise_gameshowell``."""
+    first, second = pairs(stats.k)
+    n1, n2 = stats.sizes[first], stats.sizes[second]
+    v1, v2 = stats.variances[first], stats.variances[second]
+    m1, m2 = stats.means[first], stats.means[second]
+    difference = m1 - m2
+    se = np.sqrt(v1 / n1 + v2 / n2)
+    statistic = difference / se
+    df = (v1 / n1 + v2 / n2) ** 2 / ((v1 / n1) ** 2 / (n1 - 1) + (v2 / n2) ** 2 / (n2 - 1))
+    p_values = np.clip(studentized_range_sf(np.sqrt(2) * np.abs(statistic), stats.k, df), 0, 1)
+    pooled_sd = np.sqrt(((n1 - 1) * v1 + (n2 - 1) * v2) / (n1 + n2 - 2))
+    hedges = difference / pooled_sd * (1 - 3 / (4 * (n1 + n2) - 9))
+    return pd.DataFrame({
+        'A': _names(stats, first),
+        'B': _names(stats, second),
+        'mean(A)': m1,
+        'mean(B)': m2,
+        'diff': difference,
+        'se': se,
+        'T': statistic,
+        'df': df,
+        'pval': p_values,
+        'hedges': hedges,
+    })
+
+
+def dunn(stats: GroupStats, correction: str = 'holm') -> pd.DataFrame:
+    """Dunn's test of mean ranks, equivalent to ``scikit_posthocs.posthoc_dunn``.
+
+    :param correction: Adjustment of the p-values, see ``goggles.stats.adjust_p_values``.
+    :return: A table of the pairs and their adjusted p-values.
+    """
+    first, second = pairs(stats.k)
+    n = stats.n
+    mean_ranks = stats.rank_sums / stats.sizes
+    variance = n * (n + 1) / 12 - stats.tie_sum / (12 * (n - 1))
+    z = (mean_ranks[first] - mean_ranks[second]) / np.sqrt(
+        variance * (1 / stats.sizes[first] + 1 / stats.sizes[second])
+    )
+    return pd.DataFrame({
+        'Group 1': _names(stats, first),
+        'Group 2': _names(stats, second),
+        'p-value': adjust_p_values(2 * norm.sf(np.abs(z)), correction),
+    })
+
+
+def conover(stats: GroupStats, correction: str = 'holm') -> pd.DataFrame:
+    """Conover-Iman test of mean ranks, equivalent to ``scikit_posthocs.posthoc_conover``.
+
+    :param correction: Adjustment of the p-values, see ``goggles.stats.adjust_p_values``.
+    :return: A table of the pairs and their adjusted p-values.
+    """
+    first, second = pairs(stats.k)
+    n, k = stats.n, stats.k
+    mean_ranks = stats.rank_sums / stats.sizes
+    h_statistic = 12 / (n * (n + 1)) * (stats.rank_sums ** 2 / stats.sizes).sum() - 3 * (n + 1)
+    h_statistic /= 1 - stats.tie_sum / (n ** 3 - n)
+    s2 = ((stats.ranks ** 2).sum() - n * (n + 1) ** 2 / 4) / (n - 1)
+    statistic = (mean_ranks[first] - mean_ranks[second]) / np.sqrt(
+        s2 * (n - 1 - h_statistic) / (n - k) * (1 / stats.sizes[first] + 1 / stats.sizes[second])
+    )
+    return pd.DataFrame({
+        'Group 1': _names(stats, first),
+        'Group 2': _names(stats, second),
+        'p-value': adjust_p_values(2 * t.sf(np.abs(statistic), n - k), correction),
+    })
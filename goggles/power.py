@@ -1,7 +1,28 @@
-from statsmodels.stats.power import FTestAnovaPower
+"""Power of the one-way tests, analytic for the F test and simulated for all tests.
+
+The simulation draws many synthetic datasets at once, as the rows of a matrix whose consecutive
+column segments are the groups, and computes the p-values of the F, Welch F, Kruskal-Wallis and
+trimmed means tests of all rows with segmented reductions. Unlike ``FTestAnovaPower``, the errors
+may be skewed, heteroscedastic or resampled from observed data.
+"""
+import functools
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.stats import chi2, f, rankdata
+
+from goggles.trimmed_means import trimmed_mean, winsorized_variance
+
+TESTS = ('f', 'welch', 'kruskal', 'trimmed')
+
+DISTRIBUTIONS = ('normal', 'lognormal')
 
 
 def calculate_anova_power(effect_size, *groups):
+    from statsmodels.stats.power import FTestAnovaPower
+
     alpha = 0.05
     num_groups = len(groups)
     nobs = sum([len(group) for group in groups])
@@ -13,3 +34,241 @@ def calculate_anova_power(effect_size, *groups):
         power=None,
         k_groups=num_groups,
     )
+
+
+@functools.cache
+def achieved_power(effect_size: float, nobs: int, alpha: float = 0.05, k_groups: int = 3) -> float:
+    """Power of the F test for Cohen's f and the total number of observations, memoized."""
+    from statsmodels.stats.power import FTestAnovaPower
+
+    return FTestAnovaPower().power(
+        effect_size=effect_size,
+        nobs=nobs,
+        alpha=alpha,
+        k_groups=k_groups,
+    )
+
+
+@functools.cache
+def required_nobs(
+    effect_size: float,
+    alpha: float = 0.05,
+    power: float = 0.8,
+    k_groups: int = 3,
+) -> float:
+    """Total number of observations for the F test to reach the power, memoized."""
+    from statsmodels.stats.power import FTestAnovaPower
+
+    return FTestAnovaPower().solve_power(
+        effect_size=effect_size,
+        nobs=None,
+        alpha=alpha,
+        power=power,
+        k_groups=k_groups,
+    )
+
+
+def _f_test(x: np.ndarray, sizes: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    k, n = len(sizes), sizes.sum()
+    means = np.add.reduceat(x, offsets, axis=1) / sizes
+    grand_mean = x.mean(axis=1, keepdims=True)
+    ss_between = (sizes * (means - grand_mean) ** 2).sum(axis=1)
+    ss_within = ((x - grand_mean) ** 2).sum(axis=1) - ss_between
+    return f.sf(ss_between / (k - 1) / (ss_within / (n - k)), k - 1, n - k)
+
+
+def _welch_test(x: np.ndarray, sizes: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    k = len(sizes)
+    means = np.add.reduceat(x, offsets, axis=1) / sizes
+    labels = np.repeat(np.arange(k), sizes)
+    variances = np.add.reduceat((x - means[:, labels]) ** 2, offsets, axis=1) / (sizes - 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weights = sizes / variances
+        total_weight = weights.sum(axis=1, keepdims=True)
+        weighted_mean = (weights * means).sum(axis=1, keepdims=True) / total_weight
+        a = (weights * (means - weighted_mean) ** 2).sum(axis=1) / (k - 1)
+        c = ((1 - weights / total_weight) ** 2 / (sizes - 1)).sum(axis=1)
+        statistic = a / (1 + 2 * (k - 2) / (k ** 2 - 1) * c)
+        return f.sf(statistic, k - 1, (k ** 2 - 1) / (3 * c))
+
+
+def _tie_sums(x: np.ndarray) -> np.ndarray:
+    """Sum of ``t ** 3 - t`` over the runs of t tied values of every row."""
+    s = np.sort(x, axis=1)
+    starts = np.ones(s.shape, dtype=bool)
+    starts[:, 1:] = s[:, 1:] != s[:, :-1]
+    run_lengths = np.diff(np.append(np.flatnonzero(starts), s.size))
+    rows = np.flatnonzero(starts) // s.shape[1]
+    return np.bincount(rows, weights=run_lengths ** 3 - run_lengths, minlength=len(s))
+
+
+def _kruskal_test(x: np.ndarray, sizes: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    k, n = len(sizes), sizes.sum()
+    rank_sums = np.add.reduceat(rankdata(x, axis=1), offsets, axis=1)
+    h = 12 / (n * (n + 1)) * (rank_sums ** 2 / sizes).sum(axis=1) - 3 * (n + 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        h /= 1 - _tie_sums(x) / (n ** 3 - n)
+    return chi2.sf(h, k - 1)
+
+
+def _trimmed_means_test(
+    x: np.ndarray,
+    sizes: np.ndarray,
+    offsets: np.ndarray,
+    tr: float = 0.2,
+) -> np.ndarray:
+    """p-values of Wilcox's heteroscedastic test of trimmed means, see ``trimmed_means.t1way``."""
+    k = len(sizes)
+    groups = [x[:, start:start + size] for start, size in zip(offsets, sizes)]
+    means = np.stack([trimmed_mean(group, tr) for group in groups], axis=1)
+    winvar = np.stack([winsorized_variance(group, tr) for group in groups], axis=1)
+    h = sizes - 2 * np.floor(tr * sizes)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weights = h * (h - 1) / ((sizes - 1) * winvar)
+        u = weights.sum(axis=1, keepdims=True)
+        grand_mean = (weights * means).sum(axis=1, keepdims=True) / u
+        a = (weights * (means - grand_mean) ** 2).sum(axis=1) / (k - 1)
+        c = ((1 - weights / u) ** 2 / (h - 1)).sum(axis=1) / (k ** 2 - 1)
+        return f.sf(a / (1 + 2 * (k - 2) * c), k - 1, 1 / (3 * c))
+
+
+def p_values(x: np.ndarray, sizes: Sequence[int], tr: float = 0.2) -> dict[str, np.ndarray]:
+    """p-values of the F, Welch F, Kruskal-Wallis and trimmed means tests of every dataset.
+
+    :param x: One dataset per row, with the groups laid out one after the other.
+    :param sizes: Sizes of the groups.
+    :param tr: Trimming fraction of the trimmed means test, on each side.
+    :return: A test name - p-values dictionary.
+    """
+    sizes = np.asarray(sizes)
+    offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    return {
+        'f': _f_test(x, sizes, offsets),
+        'welch': _welch_test(x, sizes, offsets),
+        'kruskal': _kruskal_test(x, sizes, offsets),
+        'trimmed': _trimmed_means_test(x, sizes, offsets, tr),
+    }
+
+
+def _errors(
+    rng: np.random.Generator,
+    shape: tuple[int, int],
+    distribution: str | np.ndarray,
+    sigma: float,
+) -> np.ndarray:
+    """Errors with mean 0 and variance 1."""
+    if not isinstance(distribution, str):
+        return rng.choice(distribution, size=shape)
+    z = rng.standard_normal(shape)
+    if distribution == 'normal':
+        return z
+    variance = (np.exp(sigma ** 2) - 1) * np.exp(sigma ** 2)
+    return (np.exp(sigma * z) - np.exp(sigma ** 2 / 2)) / np.sqrt(variance)
+
+
+def group_means(effect_size: float, sizes: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    """Group means equally spaced around 0, whose Cohen's f is the effect size.
+
+    The standard deviation of the effect size is the pooled standard deviation of the groups.
+    """
+    weights = sizes / sizes.sum()
+    pattern = np.linspace(-1, 1, len(sizes))
+    pattern -= (weights * pattern).sum()
+    sigma = np.sqrt((weights * scales ** 2).sum())
+    return effect_size * sigma * pattern / np.sqrt((weights * pattern ** 2).sum())
+
+
+def simulated_power(
+    n_per_group: int | Sequence[int],
+    effect_size: float,
+    n_groups: int = 3,
+    scales: Sequence[float] | None = None,
+    distribution: str | Sequence[float] = 'normal',
+    sigma: float = 0.5,
+    n_simulations: int = 2000,
+    alpha: float = 0.05,
+    tr: float = 0.2,
+    chunk_size: int = 1000,
+    seed: int | np.random.SeedSequence | np.random.Generator | None = None,
+) -> dict[str, float]:
+    """Simulated power of the F, Welch F, Kruskal-Wallis and trimmed means tests.
+
+    :param n_per_group: Size of every group, or the sizes of the groups.
+    :param effect_size: Cohen's f of the group means, see ``group_means``.
+    :param n_groups: Number of groups, if ``n_per_group`` is a single size.
+    :param scales: Standard deviations of the groups, by default all 1.
+    :param distribution: 'normal', 'lognormal', or observations whose standardized residuals are
+    resampled as errors.
+    :param sigma: Shape of the lognormal distribution; the larger, the more skewed.
+    :param n_simulations: Number of synthetic datasets.
+    :param alpha: Significance level of the tests.
+    :param tr: Trimming fraction of the trimmed means test, on each side.
+    :param chunk_size: Number of datasets drawn and tested at once.
+    :param seed: Seed or generator of the synthetic datasets.
+    :return: A test name - power dictionary.
+    """
+    sizes = np.atleast_1d(np.asarray(n_per_group, dtype=int))
+    if len(sizes) == 1:
+        sizes = np.repeat(sizes, n_groups)
+    scales = np.ones(len(sizes)) if scales is None else np.asarray(scales, dtype=float)
+    if not isinstance(distribution, str):
+        residuals = np.asarray(distribution, dtype=float)
+        distribution = (residuals - residuals.mean()) / residuals.std()
+    elif distribution not in DISTRIBUTIONS:
+        raise ValueError(f'Unknown distribution {distribution}, expected one of {DISTRIBUTIONS}')
+    labels = np.repeat(np.arange(len(sizes)), sizes)
+    locations = group_means(effect_size, sizes, scales)[labels]
+
+    rng = np.random.default_rng(seed)
+    rejections = dict.fromkeys(TESTS, 0)
+    for start in range(0, n_simulations, chunk_size):
+        rows = min(chunk_size, n_simulations - start)
+        x = locations + scales[labels] * _errors(rng, (rows, sizes.sum()), distribution, sigma)
+        for test, p in p_values(x, sizes, tr).items():
+            rejections[test] += int((p < alpha).sum())
+    return {test: count / n_simulations for test, count in rejections.items()}
+
+
+def _simulated_power(args) -> dict[str, float]:
+    n_per_group, effect_size, seed, options = args
+    return simulated_power(n_per_group, effect_size, seed=seed, **options)
+
+
+def power_curves(
+    sizes: Sequence[int],
+    effect_sizes: Sequence[float],
+    workers: int | None = None,
+    seed: int | None = None,
+    **options,
+) -> pd.DataFrame:
+    """Simulated power of the tests over grids of group sizes and effect sizes.
+
+    Every point of the grid is simulated in a pool of processes, with an independent stream of
+    random numbers spawned from the seed.
+
+    :param sizes: Grid of group sizes.
+    :param effect_sizes: Grid of Cohen's f.
+    :param workers: Number of processes, defaults to the number of processors. With 0, the grid is
+    simulated in this process.
+    :param seed: Seed of the whole grid.
+    :param options: Keyword arguments of ``simulated_power``.
+    :return: A table with 'n', 'effect_size', 'test', 'power' and 'standard_error' columns, the
+    latter being the Monte Carlo standard error of the power.
+    """
+    grid = [(n, effect_size) for n in sizes for effect_size in effect_sizes]
+    seeds = np.random.SeedSequence(seed).spawn(len(grid))
+    tasks = [(n, effect_size, s, options) for (n, effect_size), s in zip(grid, seeds)]
+    if workers == 0:
+        powers = list(map(_simulated_power, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            powers = list(executor.map(_simulated_power, tasks))
+
+    n_simulations = options.get('n_simulations', 2000)
+    curves = pd.DataFrame([
+        (n, effect_size, test, power)
+        for (n, effect_size), point in zip(grid, powers)
+        for test, power in point.items()
+    ], columns=['n', 'effect_size', 'test', 'power'])
+    curves['standard_error'] = np.sqrt(curves['power'] * (1 - curves['power']) / n_simulations)
+    return curves
@@ -0,0 +1,119 @@
+"""Trimming and winsorizing of the samples of all columns, before their analysis.
+
+The quantile limits of every group of every column are computed with one quantile call per group
+on the whole sample matrix, or with a single call if the groups are pooled. Trimming is then a
+boolean mask and winsorizing a clip of the column buffers.
+"""
+import numpy as np
+import pandas as pd
+
+from goggles.samples import SampleMatrix
+
+METHODS = ('trim', 'winsorize')
+
+
+def quantile_limits(values: np.ndarray, fraction: float) -> np.ndarray:
+    """Lower and upper quantiles that cut off ``fraction / 2`` on either side, ignoring NaN.
+
+    :param values: Observations along the last axis.
+    :return: Array of the lower and the upper limits, stacked along the first axis.
+    """
+    return np.nanquantile(values, [fraction / 2, 1 - fraction / 2], axis=-1)
+
+
+class Preprocessing:
+    """Trimming or winsorizing of every group of every column of a sample matrix.
+
+    :param matrix: Collated samples.
+    :param fraction: Fraction of observations cut off, half on either side. Outside of (0, 1), the
+    samples are left as they are.
+    :param method: 'trim' to remove observations outside of the limits, 'winsorize' to clip them
+    to the limits.
+    :param pooled: Whether the limits are computed from the pooled groups of a column instead of
+    every group separately.
+    """
+
+    def __init__(
+        self,
+        matrix: SampleMatrix,
+        fraction: float,
+        method: str = 'trim',
+        pooled: bool = False,
+    ):
+        if method not in METHODS:
+            raise ValueError(f'Unknown preprocessing {method}, expected one of {METHODS}')
+        self.matrix = matrix
+        self.fraction = fraction
+        self.method = method
+        self.pooled = pooled
+        self.enabled = 0 < fraction < 1
+
+        shape = (len(matrix.columns), len(matrix.names))
+        self.lower = np.full(shape, -np.inf)
+        self.upper = np.full(shape, np.inf)
+        if self.enabled:
+            values = np.where(matrix.valid, matrix.buffer, np.nan)
+            if pooled:
+                self.lower[:], self.upper[:] = quantile_limits(values, fraction)[..., np.newaxis]
+            else:
+                for g, (start, stop) in enumerate(zip(matrix.offsets[:-1], matrix.offsets[1:])):
+                    self.lower[:, g], self.upper[:, g] = quantile_limits(
+                        values[:, start:stop], fraction
+                    )
+
+        labels = np.repeat(np.arange(len(matrix.names)), matrix.sizes)
+        with np.errstate(invalid='ignore'):
+            self.outside = matrix.valid & (
+                (matrix.buffer < self.lower[:, labels]) | (matrix.buffer > self.upper[:, labels])
+            )
+
+    @property
+    def description(self) -> str:
+        low, high = self.fraction / 2, 1 - self.fraction / 2
+        action = 'Trimming' if self.method == 'trim' else 'Winsorizing'
+        of = ' of the pooled groups' if self.pooled else ''
+        return f"{action} data to [{low}, {high}] quantiles{of}"
+
+    def counts(self, col: str) -> dict[str, int]:
+        """Number of observations of every group of the column outside of the limits."""
+        outside = self.outside[self.matrix.columns.index(col)]
+        counts = np.add.reduceat(outside.astype(int), self.matrix.offsets[:-1])
+        return dict(zip(self.matrix.names, counts.tolist()))
+
+    def masks(self, col: str) -> dict[str, np.ndarray]:
+        """Masks of the observations of the column's samples that are within the limits."""
+        i = self.matrix.columns.index(col)
+        valid, outside = self.matrix.valid[i], self.outside[i]
+        return {
+            name: ~outside[start:stop][valid[start:stop]]
+            for name, start, stop in zip(
+                self.matrix.names, self.matrix.offsets[:-1], self.matrix.offsets[1:]
+            )
+        }
+
+    def winsorized(self, col: str) -> dict[str, pd.Series]:
+        """Samples of the column, with the observations outside of the limits clipped to them."""
+        i = self.matrix.columns.index(col)
+        samples = self.matrix.samples(col)
+        if not self.outside[i].any():
+            return samples
+        return {
+            name: sample.clip(self.lower[i, g], self.upper[i, g])
+            for g, (name, sample) in enumerate(samples.items())
+        }
+
+    def report(self) -> pd.DataFrame:
+        """Number of observations of every group of every column, of which were missing or
+        excluded during collation, and of which were trimmed or winsorized.
+        """
+        matrix = self.matrix
+        starts = matrix.offsets[:-1]
+        invalid = np.add.reduceat((~matrix.valid).astype(int), starts, axis=1)
+        outside = np.add.reduceat(self.outside.astype(int), starts, axis=1)
+        return pd.DataFrame({
+            'column': np.repeat(matrix.columns, len(matrix.names)),
+            'group': np.tile(matrix.names, len(matrix.columns)),
+            'observations': np.tile(matrix.sizes, len(matrix.columns)),
+            'excluded': invalid.ravel(),
+            'trimmed' if self.method == 'trim' else 'winsorized': outside.ravel(),
+        })
@@ -0,0 +1,269 @@
+"""Timing and memory of the stages of the analysis.
+
+The stages of the pipeline are marked with ``stage`` blocks or the ``profiled`` decorator. Within
+a ``profiling`` block, every stage records a ``StageRecord`` of its wall and CPU time, and
+optionally its peak memory, in the active ``Profile``, keyed by the factor and the column of the
+enclosing ``goggles.results.scope``. Outside of a ``profiling`` block, stages do nothing but look
+up the active profile. Calls submitted to a pool of processes with ``submit`` are profiled in the
+worker, and their records added to the profile of the caller.
+
+A profile is exported as JSON or CSV records, or as a Chrome trace-event file to be opened in
+``chrome://tracing`` or Perfetto::
+
+    with profiling.profiling() as profile:
+        evaluate_differences_in_means(...)
+    profile.write(Path('results/profile.trace.json'))
+"""
+import contextvars
+import dataclasses
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from concurrent.futures import Executor, Future
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+
+import pandas as pd
+
+from goggles import results
+
+
+@dataclass(frozen=True)
+class StageRecord:
+    stage: str
+    start: float
+    wall: float
+    cpu: float
+    peak_memory: int | None = None
+    depth: int = 0
+    factor: str | None = None
+    column: str | None = None
+    pid: int = 0
+    thread: int = 0
+
+
+class Profile:
+    """Stage records of one run.
+
+    :param memory: Whether to trace the peak memory allocated by every stage, with
+    ``tracemalloc``, which slows down allocations.
+    """
+
+    def __init__(self, memory: bool = False):
+        self.memory = memory
+        self.records: list[StageRecord] = []
+        self._depth = 0
+        # Memory traced at the start of the open stages, and their peak before their children
+        # reset the peak of tracemalloc.
+        self._memory: list[list[int]] = []
+
+    def to_frame(self) -> pd.DataFrame:
+        """Stage records in the order the stages finished.
+
+        Times are in seconds, the start since the epoch, and the peak memory is the most memory
+        allocated during the stage beyond that allocated at its start, in bytes.
+        """
+        columns = [field.name for field in dataclasses.fields(StageRecord)]
+        return pd.DataFrame(
+            [dataclasses.astuple(record) for record in self.records], columns=columns
+        )
+
+    def summary(self) -> pd.DataFrame:
+        """Number of calls, total wall and CPU time and, if traced, highest peak memory of every
+        stage, the slowest first.
+        """
+        aggregations = {'calls': ('wall', 'size'), 'wall': ('wall', 'sum'), 'cpu': ('cpu', 'sum')}
+        if self.memory:
+            aggregations['peak_memory'] = ('peak_memory', 'max')
+        return self.to_frame().groupby('stage', sort=False).agg(**aggregations).sort_values(
+            'wall', ascending=False
+        )
+
+    def write_json(self, path: Path) -> None:
+        path.write_text(json.dumps([dataclasses.asdict(record) for record in self.records]))
+
+    def write_csv(self, path: Path) -> None:
+        self.to_frame().to_csv(path, index=False)
+
+    def write_chrome_trace(self, path: Path) -> None:
+        """Stages as complete events of the trace-event format, one track per process."""
+        events = [
+            {
+                'name': record.stage,
+                'cat': record.factor or 'goggles',
+                'ph': 'X',
+                'ts': record.start * 1e6,
+                'dur': record.wall * 1e6,
+                'pid': record.pid,
+                'tid': record.thread,
+                'args': {
+                    'column': record.column,
+                    'cpu': record.cpu,
+                    'peak_memory': record.peak_memory,
+                },
+            }
+            for record in self.records
+        ]
+        path.write_text(json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'}))
+
+    def write(self, path: Path) -> Path:
+        """Write the records in the format of the path's suffix: '.csv', '.trace.json' for a
+        Chrome trace, or '.json'.
+        """
+        path.parent.mkdir(exist_ok=True, parents=True)
+        if path.suffix == '.csv':
+            self.write_csv(path)
+        elif path.name.endswith('.trace.json'):
+            self.write_chrome_trace(path)
+        elif path.suffix == '.json':
+            self.write_json(path)
+        else:
+            raise ValueError(f'Unknown profile format {path.suffix}, expected .csv or .json')
+        return path
+
+    def _enter(self) -> tuple[float, float, float, int]:
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._memory:
+                self._memory[-1][1] = max(self._memory[-1][1], peak)
+            self._memory.append([current, current])
+            tracemalloc.reset_peak()
+        self._depth += 1
+        return time.time(), time.perf_counter(), time.process_time(), self._depth - 1
+
+    def _exit(self, name: str, started: tuple[float, float, float, int]) -> None:
+        start, wall, cpu, depth = started
+        wall = time.perf_counter() - wall
+        cpu = time.process_time() - cpu
+        self._depth -= 1
+        peak_memory = None
+        if self.memory:
+            start_memory, peak = self._memory.pop()
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            if self._memory:
+                self._memory[-1][1] = max(self._memory[-1][1], peak)
+            peak_memory = peak - start_memory
+        keys = results.current_keys()
+        self.records.append(StageRecord(
+            name,
+            start,
+            wall,
+            cpu,
+            peak_memory,
+            depth,
+            keys.get('factor'),
+            keys.get('column'),
+            os.getpid(),
+            threading.get_ident(),
+        ))
+
+
+_profile: contextvars.ContextVar[Profile | None] = contextvars.ContextVar(
+    'profile', default=None
+)
+
+
+def active() -> Profile | None:
+    """The profile of the enclosing ``profiling`` block, if any."""
+    return _profile.get()
+
+
+@contextmanager
+def profiling(profile: Profile | None = None, memory: bool = False):
+    """Record the stages run within the block in the profile, by default a new one.
+
+    :param memory: Whether a new profile traces the peak memory of the stages.
+    """
+    if profile is None:
+        profile = Profile(memory)
+    started_tracing = profile.memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    token = _profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _profile.reset(token)
+        if started_tracing:
+            tracemalloc.stop()
+
+
+class _Stage:
+    __slots__ = ('profile', 'name', 'started')
+
+    def __init__(self, profile: Profile, name: str):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.started = self.profile._enter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profile._exit(self.name, self.started)
+        return False
+
+
+_DISABLED = nullcontext()
+
+
+def stage(name: str):
+    """Block of a stage of the analysis, recorded in the active profile."""
+    profile = _profile.get()
+    if profile is None:
+        return _DISABLED
+    return _Stage(profile, name)
+
+
+def profiled(name: str | None = None):
+    """Decorate a function to record its calls as a stage, by default named after the function."""
+
+    def decorator(function):
+        stage_name = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            profile = _profile.get()
+            if profile is None:
+                return function(*args, **kwargs)
+            with _Stage(profile, stage_name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _call_profiled(memory: bool, function, *args, **kwargs):
+    with profiling(memory=memory) as profile:
+        return function(*args, **kwargs), profile.records
+
+
+def _merge(profile: Profile, future: Future, profiled: Future) -> None:
+    try:
+        result, stage_records = profiled.result()
+    except BaseException as error:
+        future.set_exception(error)
+        return
+    profile.records.extend(stage_records)
+    future.set_result(result)
+
+
+def submit(executor: Executor, function, *args, **kwargs) -> Future:
+    """Submit the call to the pool, recording the stages it runs in the active profile.
+
+    :return: Future of the function's result, as ``executor.submit``.
+    """
+    profile = _profile.get()
+    if profile is None:
+        return executor.submit(function, *args, **kwargs)
+    future = Future()
+    future.set_running_or_notify_cancel()
+    executor.submit(_call_profiled, profile.memory, function, *args, **kwargs).add_done_callback(
+        functools.partial(_merge, profile, future)
+    )
+    return future
@@ -0,0 +1,387 @@
+"""Repeated measures and mixed ANOVA of all columns of a study in one model.
+
+The columns, e.g. the AOIs, are the levels of a within-participant factor. The groups, e.g. the
+goggles, are a between-participant factor when every participant is in one group, as in the
+studies so far, and a second within-participant factor when participants are in all groups.
+
+Every effect is a linear hypothesis on the design matrix of the groups and orthonormal contrasts
+of the within-participant cells: the participants' contrasts ``Z = Y K`` are regressed on
+the group indicators ``X``, and the hypothesis ``L B = 0`` on the coefficients ``B`` is tested
+against the residuals, with the sums of squares of Type III, i.e. of unweighted group means. The
+tests of within-participant effects come with Mauchly's test of sphericity and the
+Greenhouse-Geisser correction of their degrees of freedom.
+"""
+import itertools
+import logging
+from collections import namedtuple
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy.stats import chi2, f, rankdata
+
+from goggles import COLUMN_SEPARATOR, collate_matrix, results
+from goggles.stats import TestResult
+
+logger = logging.getLogger("colour")
+
+# Layout of the participants' observations, one row per participant and one column per cell of
+# the within-participant factors, the levels of the last factor varying fastest, and the IDs of the
+# participants left out for missing observations.
+RepeatedLayout = namedtuple(
+    'RepeatedLayout',
+    ('values', 'within', 'groups', 'between', 'subjects', 'dropped'),
+)
+
+ANOVA_COLUMNS = ['Source', 'SS', 'DF1', 'DF2', 'F', 'p-value', 'np2', 'eps', 'p-GG']
+
+
+def layout(
+    frames: Mapping[str, pd.DataFrame],
+    columns: Sequence[str],
+    factor: str,
+    group_factor: str = 'Goggles',
+    column_factor: str = 'AOI',
+    subject_column: str | None = None,
+) -> RepeatedLayout:
+    """Observations of the participants observed in every cell, with the factor's exclusions.
+
+    :param frames: A group name - data frame dictionary, with a column of the participants.
+    :param factor: Measure of the columns, e.g. 'TTFF', see ``goggles.collate_matrix``.
+    :param group_factor: Name of the factor of the groups.
+    :param column_factor: Name of the factor of the columns.
+    :param subject_column: Column of the participants, by default the first column of the frames.
+    Whitespace around the participants' IDs is ignored.
+    """
+    matrix = collate_matrix(frames, columns, factor)
+    values = np.where(matrix.valid, matrix.buffer, np.nan).T
+    subjects = np.concatenate([_subject_ids(frame, subject_column) for frame in frames.values()])
+    labels = np.repeat(np.arange(len(frames)), matrix.sizes)
+    names = list(frames)
+
+    if len(np.unique(subjects)) == len(subjects):
+        within = {column_factor: list(columns)}
+        between = {group_factor: names}
+    else:
+        # Every participant has a row in the frame of every group they were observed in.
+        cells = pd.DataFrame(values, columns=columns).assign(subject=subjects, group=labels)
+        wide = cells.pivot(index='subject', columns='group', values=list(columns))
+        wide = wide.reorder_levels([1, 0], axis=1).reindex(
+            columns=pd.MultiIndex.from_product([range(len(names)), columns])
+        )
+        values, subjects = wide.to_numpy(), wide.index.to_numpy()
+        labels = np.zeros(len(values), dtype=int)
+        within = {group_factor: names, column_factor: list(columns)}
+        between = {}
+
+    complete = ~np.isnan(values).any(axis=1)
+    return RepeatedLayout(
+        values[complete],
+        within,
+        labels[complete],
+        between,
+        subjects[complete],
+        subjects[~complete],
+    )
+
+
+def _subject_ids(frame: pd.DataFrame, subject_column: str | None) -> np.ndarray:
+    """IDs of the participants of a frame, without the whitespace around the textual ones, so that
+    e.g. 'P089 ' and 'P089' are the same participant.
+    """
+    ids = frame.iloc[:, 0] if subject_column is None else frame[subject_column]
+    stripped = ids.map(lambda subject: subject.strip() if isinstance(subject, str) else subject)
+    return stripped.to_numpy()
+
+
+def _contrasts(levels: int) -> np.ndarray:
+    """Orthonormal contrasts of the levels, as the columns of a matrix."""
+    _, _, vt = np.linalg.svd(np.ones((1, levels)))
+    return vt[1:].T
+
+
+def _effect_contrasts(sizes: Sequence[int], effect: Sequence[int]) -> np.ndarray:
+    """Orthonormal contrasts of the cells of the within factors, of the factors of the effect."""
+    contrasts = np.ones((1, 1))
+    for i, size in enumerate(sizes):
+        factor = _contrasts(size) if i in effect else np.full((size, 1), 1 / np.sqrt(size))
+        contrasts = np.kron(contrasts, factor)
+    return contrasts
+
+
+def _between_contrasts(k: int) -> np.ndarray:
+    return np.hstack((np.eye(k - 1), -np.ones((k - 1, 1))))
+
+
+def _hypothesis(coefficients, inverse_gram, hypothesis) -> np.ndarray:
+    """Hypothesis SSCP matrix of ``L B = 0``."""
+    lb = hypothesis @ coefficients
+    return lb.T @ np.linalg.solve(hypothesis @ inverse_gram @ hypothesis.T, lb)
+
+
+def greenhouse_geisser(covariance: np.ndarray) -> float:
+    """Greenhouse-Geisser epsilon of the covariance matrix of orthonormal contrasts."""
+    return np.trace(covariance) ** 2 / (len(covariance) * np.trace(covariance @ covariance))
+
+
+def mauchly(covariance: np.ndarray, df: int, cells: int) -> TestResult:
+    """Mauchly's test of sphericity of the covariance matrix of orthonormal contrasts.
+
+    The p-value is the chi-squared approximation with the second order term of R's
+    ``mauchly.test``, which, as R does, counts the cells of all within-participant factors in
+    that term, also for an effect of fewer of them.
+
+    :param df: Degrees of freedom of the covariance matrix.
+    :param cells: Number of cells of all within-participant factors.
+    :return: Mauchly's W and its p-value.
+    """
+    p = len(covariance)
+    sign, log_det = np.linalg.slogdet(covariance)
+    log_w = log_det - p * np.log(np.trace(covariance) / p) if sign > 0 else -np.inf
+    rho = 1 - (2 * p ** 2 + p + 2) / (6 * p * df)
+    w2 = (
+        (p + 2) * (p - 1) * (p - 2) * (2 * p ** 3 + 6 * p ** 2 + 3 * cells + 2)
+        / (288 * (df * p * rho) ** 2)
+    )
+    statistic = -df * rho * log_w
+    dof = p * (p + 1) / 2 - 1
+    p1, p2 = chi2.sf(statistic, dof), chi2.sf(statistic, dof + 4)
+    return TestResult(np.exp(log_w), p1 + w2 * (p2 - p1))
+
+
+def _effects(within: Mapping[str, Sequence], between: Mapping[str, Sequence]):
+    """Name, within factors and whether it involves the groups, of every effect."""
+    names = list(within)
+    for between_factor in between:
+        yield between_factor, (), True
+    for r in range(1, len(names) + 1):
+        for effect in itertools.combinations(range(len(names)), r):
+            name = ' * '.join(names[i] for i in effect)
+            yield name, effect, False
+            for between_factor in between:
+                yield f'{between_factor} * {name}', effect, True
+
+
+def anova(
+    values: np.ndarray,
+    within: Mapping[str, Sequence],
+    groups: np.ndarray | None = None,
+    between: Mapping[str, Sequence] | None = None,
+) -> pd.DataFrame:
+    """Repeated measures ANOVA, or mixed ANOVA if there are groups of participants.
+
+    The within-participant effects of groups of unequal sizes are tested on the unweighted means
+    of the groups, with Type III sums of squares, whereas ``pingouin.mixed_anova`` weights the
+    groups by their sizes, so that its within-participant main effects differ.
+
+    :param values: Observations, one row per participant and one column per cell of the within
+    factors, the levels of the last factor varying fastest.
+    :param within: Factor name - levels dictionary of the within-participant factors.
+    :param groups: Index of the group of every participant.
+    :param between: Factor name - group names dictionary of at most one between factor.
+    :return: A table of the effects with their sums of squares, degrees of freedom, F
+    statistics, p-values, partial eta squared, and the Greenhouse-Geisser epsilon and corrected
+    p-values of the within-participant effects.
+    """
+    between = between or {}
+    n = len(values)
+    if groups is None or not between:
+        groups = np.zeros(n, dtype=int)
+    k = groups.max() + 1
+    sizes = [len(levels) for levels in within.values()]
+    x = np.eye(k)[groups]
+    inverse_gram = np.diag(1 / x.sum(axis=0))
+    grand_mean = np.full((1, k), 1 / k)
+
+    rows = []
+    for name, effect, with_groups in _effects(within, between):
+        contrasts = _effect_contrasts(sizes, effect)
+        z = values @ contrasts
+        coefficients = inverse_gram @ x.T @ z
+        residuals = z - x @ coefficients
+        error = residuals.T @ residuals
+        hypothesis = _between_contrasts(k) if with_groups else grand_mean
+        ss = np.trace(_hypothesis(coefficients, inverse_gram, hypothesis))
+        ss_error = np.trace(error)
+        q = contrasts.shape[1]
+        df1, df2 = len(hypothesis) * q, (n - k) * q
+        statistic = (ss / df1) / (ss_error / df2)
+        p_value = f.sf(statistic, df1, df2)
+        eps = greenhouse_geisser(error) if q > 1 else 1.0
+        rows.append((
+            name, ss, df1, df2, statistic, p_value, ss / (ss + ss_error),
+            eps if effect else np.nan, f.sf(statistic, df1 * eps, df2 * eps) if effect else np.nan,
+        ))
+    return pd.DataFrame(rows, columns=ANOVA_COLUMNS)
+
+
+def sphericity(
+    values: np.ndarray,
+    within: Mapping[str, Sequence],
+    groups: np.ndarray | None = None,
+) -> pd.DataFrame:
+    """Mauchly's test of sphericity of every within-participant effect with more than 1 df.
+
+    The covariance of the contrasts is pooled over the groups of participants.
+    """
+    n = len(values)
+    groups = np.zeros(n, dtype=int) if groups is None else groups
+    k = groups.max() + 1
+    sizes = [len(levels) for levels in within.values()]
+    x = np.eye(k)[groups]
+    rows = []
+    for name, effect, _ in _effects(within, {}):
+        contrasts = _effect_contrasts(sizes, effect)
+        if contrasts.shape[1] < 2:
+            continue
+        z = values @ contrasts
+        residuals = z - x @ np.linalg.lstsq(x, z, rcond=None)[0]
+        covariance = residuals.T @ residuals / (n - k)
+        w, p_value = mauchly(covariance, n - k, values.shape[1])
+        rows.append((name, w, p_value, greenhouse_geisser(covariance)))
+    return pd.DataFrame(rows, columns=['Source', 'W', 'p-value', 'eps'])
+
+
+def friedman(values: np.ndarray) -> tuple[TestResult, float]:
+    """Friedman's test of the columns, equivalent to ``scipy.stats.friedmanchisquare``.
+
+    :param values: Observations, one row per participant and one column per condition.
+    :return: The test's result, and Kendall's W.
+    """
+    n, m = values.shape
+    ranks = rankdata(values, axis=1)
+    rank_sums = ranks.sum(axis=0)
+    statistic = 12 / (n * m * (m + 1)) * (rank_sums ** 2).sum() - 3 * n * (m + 1)
+    sorted_values = np.sort(values, axis=1)
+    starts = np.ones(values.shape, dtype=bool)
+    starts[:, 1:] = sorted_values[:, 1:] != sorted_values[:, :-1]
+    run_lengths = np.diff(np.append(np.flatnonzero(starts), values.size))
+    statistic /= 1 - (run_lengths ** 3 - run_lengths).sum() / (n * m * (m ** 2 - 1))
+    return TestResult(statistic, chi2.sf(statistic, m - 1)), statistic / (n * (m - 1))
+
+
+def _cell_effects(cell_means: np.ndarray, axes: Sequence[int]) -> np.ndarray:
+    """Estimated effect of the factors on the axes, from the unweighted means of the cells.
+
+    The effect is the inclusion-exclusion sum of the marginal means of the factors' subsets, e.g.
+    ``m_ab - m_a - m_b + m`` for an interaction, broadcast to the shape of the cells.
+    """
+    effect = np.zeros_like(cell_means)
+    for r in range(len(axes) + 1):
+        for subset in itertools.combinations(axes, r):
+            others = tuple(i for i in range(cell_means.ndim) if i not in subset)
+            sign = (-1) ** (len(axes) - r)
+            effect = effect + sign * cell_means.mean(axis=others, keepdims=True)
+    return effect
+
+
+def aligned_rank_anova(
+    values: np.ndarray,
+    within: Mapping[str, Sequence],
+    groups: np.ndarray | None = None,
+    between: Mapping[str, Sequence] | None = None,
+) -> pd.DataFrame:
+    """ANOVA of aligned ranks (Wobbrock's aligned rank transform) of every effect.
+
+    For every effect, the residuals from the cell means are aligned by adding the effect's
+    estimate, ranked over all observations, and analysed by ``anova``, of which only the row of
+    the effect is kept.
+
+    :return: A table of the effects, with the columns of ``anova``.
+    """
+    between = between or {}
+    n = len(values)
+    if groups is None or not between:
+        groups = np.zeros(n, dtype=int)
+    k = groups.max() + 1
+    sizes = [len(levels) for levels in within.values()]
+    cells = values.reshape(n, *sizes)
+    counts = np.bincount(groups, minlength=k).reshape(-1, *[1] * len(sizes))
+    cell_means = np.zeros((k, *sizes))
+    np.add.at(cell_means, groups, cells)
+    cell_means /= counts
+    residuals = cells - cell_means[groups]
+
+    rows = []
+    for name, effect, with_groups in _effects(within, between):
+        axes = ((0,) if with_groups else ()) + tuple(i + 1 for i in effect)
+        aligned = residuals + _cell_effects(cell_means, axes)[groups]
+        ranks = rankdata(aligned.reshape(n, -1), axis=None).reshape(n, -1)
+        table = anova(ranks, within, groups, between)
+        rows.append(table[table['Source'] == name])
+    return pd.concat(rows, ignore_index=True)
+
+
+def evaluate(
+    frames: Mapping[str, pd.DataFrame],
+    columns: Sequence[str],
+    factor: str,
+    group_factor: str = 'Goggles',
+    column_factor: str = 'AOI',
+    subject_column: str | None = None,
+    alpha: float = 0.05,
+) -> pd.DataFrame:
+    """Analyse all columns of the groups in one repeated measures or mixed ANOVA.
+
+    Logs and records the ANOVA, the tests of sphericity, the Friedman test of every within
+    factor and the ANOVA of aligned ranks.
+
+    :param frames: A group name - data frame dictionary, with a column of the participants.
+    :param factor: Measure of the columns, e.g. 'TFD'.
+    :param group_factor: Name of the factor of the groups.
+    :param column_factor: Name of the factor of the columns.
+    :param subject_column: Column of the participants, by default the first column of the frames.
+    :param alpha: Significance level of Mauchly's test, below which the Greenhouse-Geisser
+    corrected p-values are the ones to read.
+    :return: The ANOVA table.
+    """
+    data = layout(frames, columns, factor, group_factor, column_factor, subject_column)
+    design = ' x '.join(
+        [f'{name} (between)' for name in data.between]
+        + [f'{name} (within)' for name in data.within]
+    )
+    with results.scope(factor=factor):
+        logger.debug(f'Repeated measures ANOVA of {factor}: {design}')
+        logger.debug(
+            f'{len(data.values)} participants observed in all cells, '
+            f'{len(data.dropped)} participants with missing observations left out'
+        )
+        if len(data.dropped):
+            logger.debug(f'Left out: {", ".join(map(str, data.dropped))}')
+        table = anova(data.values, data.within, data.groups, data.between)
+        logger.debug(table.to_markdown(index=False))
+        for row in table.itertuples(index=False):
+            results.record('rm_anova', row.F, row[5], group1=row.Source, effect_size=row.np2)
+            if not np.isnan(row.eps):
+                results.record('rm_anova_gg', row.F, row[8], group1=row.Source)
+
+        logger.debug('\nMauchly\'s test of sphericity')
+        mauchly_table = sphericity(data.values, data.within, data.groups)
+        logger.debug(mauchly_table.to_markdown(index=False))
+        for row in mauchly_table.itertuples(index=False):
+            results.record('mauchly', row.W, row[2], group1=row.Source)
+            if row[2] <= alpha:
+                logger.debug(
+                    f'Sphericity of {row.Source} rejected, '
+                    f'read the Greenhouse-Geisser corrected p-value (epsilon={row.eps:.4f})'
+                )
+
+        logger.debug('\nFriedman tests')
+        sizes = [len(levels) for levels in data.within.values()]
+        cells = data.values.reshape(len(data.values), *sizes)
+        for i, name in enumerate(data.within):
+            others = tuple(j + 1 for j in range(len(sizes)) if j != i)
+            res, kendall_w = friedman(cells.mean(axis=others) if others else cells)
+            results.record('friedman', *res, group1=name, effect_size=kendall_w)
+            logger.debug(
+                f"{name}: chi-squared statistic: {res.statistic:.4f}, P-value: {res.pvalue:.4f}, "
+                f"Kendall's W: {kendall_w:.4f}"
+            )
+
+        logger.debug('\nANOVA of aligned rank transformed data')
+        art = aligned_rank_anova(data.values, data.within, data.groups, data.between)
+        logger.debug(art.to_markdown(index=False))
+        for row in art.itertuples(index=False):
+            results.record('art_anova', row.F, row[5], group1=row.Source, effect_size=row.np2)
+        logger.debug(COLUMN_SEPARATOR)
+    return table
@@ -0,0 +1,164 @@
+"""Structured results of the statistical tests.
+
+The tests of ``assumptions``, ``parametric`` and ``nonparametric`` return their outcomes as
+``TestRecord``s, made by ``create`` and ``create_table``, and their callers ``add`` them to the
+active ``ResultsStore``. The other analyses ``record`` their outcomes in the store directly, much
+like they log to the "colour" logger. The identifying keys of a record, e.g. the factor and the
+column, are taken from the enclosing ``scope`` blocks. Without an active store, added records are
+discarded.
+"""
+import contextvars
+import dataclasses
+import logging
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+logger = logging.getLogger("colour")
+
+
+@dataclass(frozen=True)
+class TestRecord:
+    test: str
+    statistic: float | None = None
+    pvalue: float | None = None
+    group1: str | None = None
+    group2: str | None = None
+    effect_size: float | None = None
+    ci_low: float | None = None
+    ci_high: float | None = None
+    factor: str | None = None
+    column: str | None = None
+
+
+class ResultsStore:
+    """Records of the tests of one run."""
+
+    def __init__(self, run_id: str | None = None):
+        self.run_id = run_id or f'{datetime.now():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:8]}'
+        self.records: list[TestRecord] = []
+
+    def to_frame(self) -> pd.DataFrame:
+        columns = [field.name for field in dataclasses.fields(TestRecord)]
+        df = pd.DataFrame([dataclasses.astuple(record) for record in self.records], columns=columns)
+        df.insert(0, 'run_id', self.run_id)
+        return df
+
+    def write(self, folder: Path) -> Path | None:
+        """Append the run's records to a Parquet dataset.
+
+        Every run is stored as its own file in the dataset's folder, so the folder can be read as
+        a single table, e.g. by ``pd.read_parquet(folder)``.
+
+        :return: Path of the written file, None if pyarrow is not installed.
+        """
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            logger.debug('pyarrow is not installed, not writing the results')
+            return None
+        folder.mkdir(exist_ok=True, parents=True)
+        path = folder.joinpath(f'{self.run_id}.parquet')
+        self.to_frame().to_parquet(path, index=False)
+        return path
+
+
+_store: contextvars.ContextVar[ResultsStore | None] = contextvars.ContextVar(
+    'results_store', default=None
+)
+_keys: contextvars.ContextVar[dict] = contextvars.ContextVar('results_keys', default={})
+
+
+@contextmanager
+def collecting(store: ResultsStore):
+    """Make the store collect the records of the tests run within the block."""
+    token = _store.set(store)
+    try:
+        yield store
+    finally:
+        _store.reset(token)
+
+
+@contextmanager
+def scope(**keys):
+    """Set identifying keys, e.g. ``factor`` or ``column``, of the records made within the block."""
+    token = _keys.set({**_keys.get(), **keys})
+    try:
+        yield
+    finally:
+        _keys.reset(token)
+
+
+def current_keys() -> dict:
+    """Identifying keys of the enclosing ``scope`` blocks."""
+    return _keys.get()
+
+
+def _scalar(value):
+    return None if value is None else value.item() if hasattr(value, 'item') else value
+
+
+def create(test: str, statistic=None, pvalue=None, **values) -> TestRecord:
+    """Record of the outcome of a test, keyed by the enclosing ``scope`` blocks.
+
+    :param test: Name of the test.
+    :param values: Other fields of ``TestRecord``.
+    """
+    fields = {**_keys.get(), 'statistic': statistic, 'pvalue': pvalue, **values}
+    return TestRecord(test, **{
+        name: str(value) if name in ('group1', 'group2') and value is not None else _scalar(value)
+        for name, value in fields.items()
+    })
+
+
+def create_table(test: str, table: pd.DataFrame, **columns) -> list[TestRecord]:
+    """Records of the outcome of a test of every row of a table, e.g. of the pairs of a post hoc
+    test.
+
+    The fields are converted column by column, so the cost per row is that of creating its record.
+
+    :param test: Name of the test.
+    :param columns: ``TestRecord`` field - column name of the table.
+    :return: The records, in the order of the rows.
+    """
+    values = {}
+    for name, column in columns.items():
+        values[name] = table[column].tolist()
+        if name in ('group1', 'group2'):
+            values[name] = [None if value is None else str(value) for value in values[name]]
+    keys = _keys.get()
+    return [
+        TestRecord(test, **{**keys, **dict(zip(values, row))}) for row in zip(*values.values())
+    ]
+
+
+def add(*records: TestRecord) -> None:
+    """Add records to the active store, if any."""
+    store = _store.get()
+    if store is not None:
+        store.records.extend(records)
+
+
+def record(test: str, statistic=None, pvalue=None, **values) -> TestRecord:
+    """Record the outcome of a test in the active store, see ``create``.
+
+    :return: The record.
+    """
+    result = create(test, statistic, pvalue, **values)
+    add(result)
+    return result
+
+
+def record_table(test: str, table: pd.DataFrame, **columns) -> list[TestRecord]:
+    """Record the outcome of a test of every row of a table in the active store, see
+    ``create_table``.
+
+    :return: The records, in the order of the rows.
+    """
+    records = create_table(test, table, **columns)
+    add(*records)
+    return records
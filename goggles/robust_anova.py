@@ -1,40 +1,158 @@
+import functools
+import logging
+from collections import namedtuple
+
+import numpy as np
 import pandas as pd
-from rpy2 import robjects
-from rpy2.robjects import pandas2ri
 
-import logging
+from goggles import profiling, results, trimmed_means
+from goggles.stats import MAX_REPORTED_PAIRS
+from goggles.utils import log_pairs
 
 logger = logging.getLogger('colour')
 
-def _one_way_anova(formula, data, iterations=3000):
-    r_code = """
-    library(WRS2)
-    f <- function(formula, data, iter){
-        return(t1way(formula = formula, data = data, tr=0, alpha=0.05, nboot = iter))
-    }
-    g <- function(formula, data){
-        return(lincon(formula=formula, data=data, tr=0, alpha=0.05, method="hochberg"))
-    }
+RobustAnovaResult = namedtuple(
+    'RobustAnovaResult',
+    ('statistic', 'pvalue', 'df1', 'df2', 'effect_size', 'comparisons'),
+)
+
+_T1WAY = """
+function(values, group, tr, alpha, nboot) {
+    t1way(values ~ group, data = data.frame(values = values, group = group),
+          tr = tr, alpha = alpha, nboot = nboot)
+}
+"""
+
+_LINCON = """
+function(values, group, tr, alpha) {
+    lincon(values ~ group, data = data.frame(values = values, group = group),
+           tr = tr, alpha = alpha, method = "hochberg")
+}
+"""
+
+
+@functools.cache
+def _wrs2_functions():
+    """Load WRS2 into the embedded R session and compile the wrappers, once per process."""
+    from rpy2 import robjects
+
+    robjects.r('suppressPackageStartupMessages(library(WRS2))')
+    return robjects.r(_T1WAY), robjects.r(_LINCON)
+
+
+def _r_vectors(samples: dict[str, pd.Series]):
+    from rpy2 import robjects
+
+    values = robjects.FloatVector(
+        np.concatenate([np.asarray(sample, dtype=float) for sample in samples.values()])
+    )
+    labels = [
+        sample_name for sample_name, sample in samples.items() for _ in range(len(sample))
+    ]
+    # Levels are sorted, as R does when it converts a character column of a data frame.
+    group = robjects.FactorVector(robjects.StrVector(labels))
+    return values, group
+
+
+def _comparisons(lincon_result) -> pd.DataFrame:
+    comp = lincon_result.rx2('comp')
+    names = list(lincon_result.rx2('fnames'))
+    table = np.array(list(comp)).reshape(comp.nrow, comp.ncol, order='F')
+    return pd.DataFrame({
+        'Group 1': [names[int(i) - 1] for i in table[:, 0]],
+        'Group 2': [names[int(i) - 1] for i in table[:, 1]],
+        'psihat': table[:, 2],
+        'Lower CI': table[:, 3],
+        'Upper CI': table[:, 4],
+        'p-value': table[:, 5],
+    })
+
+
+def _wrs2_available() -> bool:
+    try:
+        import rpy2.robjects  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _one_way_anova_r(samples, tr, nboot, alpha) -> RobustAnovaResult:
+    t1way, lincon = _wrs2_functions()
+    values, group = _r_vectors(samples)
+
+    with profiling.stage('wrs2_t1way'):
+        t1way_result = t1way(values, group, tr, alpha, nboot)
+    logger.debug(t1way_result)
+    with profiling.stage('wrs2_lincon'):
+        lincon_result = lincon(values, group, tr, alpha)
+    logger.debug(lincon_result)
+
+    return RobustAnovaResult(
+        statistic=t1way_result.rx2('test')[0],
+        pvalue=t1way_result.rx2('p.value')[0],
+        df1=t1way_result.rx2('df1')[0],
+        df2=t1way_result.rx2('df2')[0],
+        effect_size=t1way_result.rx2('effsize')[0],
+        comparisons=_comparisons(lincon_result),
+    )
+
+
+def _one_way_anova_python(samples, tr, nboot, alpha, seed, max_pairs) -> RobustAnovaResult:
+    with profiling.stage('t1way'):
+        res = trimmed_means.t1way(samples, tr=tr, nboot=nboot, seed=seed)
+    logger.debug(f'Heteroscedastic one-way ANOVA for trimmed means (tr={tr})')
+    logger.debug(
+        f"F({res.df1}, {res.df2:.2f}) = {res.statistic:.4f}, P-value: {res.pvalue:.4f}, "
+        f"explanatory effect size: {res.effect_size:.4f}"
+    )
+    with profiling.stage('lincon'):
+        comparisons = trimmed_means.lincon(samples, tr=tr, alpha=alpha)
+    logger.debug('Linear contrasts of trimmed means, Hochberg correction')
+    log_pairs(comparisons, 'p-value', alpha, max_pairs)
+    return RobustAnovaResult(*res, comparisons)
+
+
+def one_way_anova(
+    samples: dict[str, pd.Series],
+    tr: float = 0.0,
+    nboot: int = 3000,
+    alpha: float = 0.05,
+    backend: str = 'auto',
+    seed: int | None = None,
+    max_pairs: int | None = MAX_REPORTED_PAIRS,
+) -> RobustAnovaResult:
+    """One-way ANOVA of trimmed means with Hochberg-corrected post hoc contrasts.
+
+    :param samples: A factor value - observations dictionary.
+    :param tr: Trimming fraction on each side.
+    :param nboot: Number of bootstrap samples of the explanatory effect size.
+    :param alpha: Significance level.
+    :param backend: 'r' to run WRS2's ``t1way`` and ``lincon`` in the embedded R session,
+    'python' for their NumPy implementations in ``goggles.trimmed_means``, or 'auto' to use R
+    whenever rpy2 is installed.
+    :param seed: Seed of the effect size's subsamples of the Python backend.
+    :param max_pairs: Number of contrasts above which the Python backend logs only the most
+    significant ones, see ``goggles.stats.top_pairs``. All contrasts are recorded.
+    :return: Test statistic, p-value, degrees of freedom, effect size and pairwise contrasts.
     """
-    robjects.r(r_code)
-    func = robjects.r['f']
-    results = func(formula, data, iterations)
-    logger.debug(results)
-
-    func = robjects.r['g']
-    results = func(formula, data)
-    logger.debug(results)
-
-
-
-def one_way_anova(samples):
-    df = pd.concat([
-        pd.DataFrame(data = {
-            'group': data_name,
-            'values': values
-        })
-        for data_name, values in samples.items()
-    ], ignore_index=True)
-    with (robjects.default_converter + pandas2ri.converter).context():
-        r_df = robjects.conversion.get_conversion().py2rpy(df)
-    _one_way_anova('values ~ group', r_df)
\ No newline at end of file
+    if backend == 'auto':
+        backend = 'r' if _wrs2_available() else 'python'
+    if backend == 'r':
+        res = _one_way_anova_r(samples, tr, nboot, alpha)
+    elif backend == 'python':
+        res = _one_way_anova_python(samples, tr, nboot, alpha, seed, max_pairs)
+    else:
+        raise ValueError(f'Unknown robust ANOVA backend {backend}')
+
+    results.record('t1way', res.statistic, res.pvalue, effect_size=res.effect_size)
+    results.record_table(
+        'lincon',
+        res.comparisons,
+        pvalue='p-value',
+        effect_size='psihat',
+        group1='Group 1',
+        group2='Group 2',
+        ci_low='Lower CI',
+        ci_high='Upper CI',
+    )
+    return res
@@ -0,0 +1,55 @@
+from collections.abc import Sequence
+
+import numpy as np
+import pandas as pd
+
+
+class SampleMatrix:
+    """Observations of many columns for every group, without copies of the source frames.
+
+    Every column is one contiguous float64 buffer, in which the groups are laid out one after the
+    other at ``offsets``. Missing observations and filtered ones, e.g. by ``exclude``, are marked
+    in a validity mask of the same shape, so the buffers are never modified.
+
+    :param frames: A group name - data frame dictionary.
+    :param columns: Columns of the frames to collate.
+    """
+
+    def __init__(self, frames: dict[str, pd.DataFrame], columns: Sequence[str]):
+        self.names = list(frames)
+        self.columns = list(columns)
+        self.sizes = np.array([len(frame) for frame in frames.values()])
+        self.offsets = np.concatenate(([0], np.cumsum(self.sizes)))
+        self.index = [frame.index for frame in frames.values()]
+
+        self.buffer = np.empty((len(self.columns), self.offsets[-1]))
+        for row, col in zip(self.buffer, self.columns):
+            for frame, start, stop in zip(frames.values(), self.offsets[:-1], self.offsets[1:]):
+                row[start:stop] = frame[col].to_numpy(dtype=float)
+        self.valid = ~np.isnan(self.buffer)
+
+    def column(self, col: str) -> np.ndarray:
+        """Observations of all groups of the column, missing ones included, as a view."""
+        return self.buffer[self.columns.index(col)]
+
+    def exclude(self, col: str, mask: np.ndarray) -> None:
+        """Mark the observations of the column selected by the mask as invalid."""
+        self.valid[self.columns.index(col)] &= ~mask
+
+    def samples(self, col: str) -> dict[str, pd.Series]:
+        """Valid observations of every group of the column.
+
+        The samples keep the index of their frames. A sample without invalid observations is a
+        view of the column's buffer.
+        """
+        i = self.columns.index(col)
+        samples = {}
+        for name, index, start, stop in zip(
+            self.names, self.index, self.offsets[:-1], self.offsets[1:]
+        ):
+            values, valid = self.buffer[i, start:stop], self.valid[i, start:stop]
+            if valid.all():
+                samples[name] = pd.Series(values, index=index, name=col, copy=False)
+            else:
+                samples[name] = pd.Series(values[valid], index=index[valid], name=col)
+        return samples
@@ -1,10 +1,17 @@
 from collections import namedtuple
 from enum import StrEnum, auto
 
+import numpy as np
 import pandas as pd
 
 TestResult = namedtuple('TestResult', ('statistic', 'pvalue'))
 
+# All pairs of up to 10 groups are reported, beyond that only the most significant ones.
+MAX_REPORTED_PAIRS = 45
+
+# Omnibus tests at most this significant are followed by their pairwise comparisons.
+MARGINAL_ALPHA = 0.1
+
 
 class StatisticalSignificance(StrEnum):
     Yes = auto()
@@ -15,9 +22,55 @@ class StatisticalSignificance(StrEnum):
 def interpret_p_values(
     p_values: pd.Series,
     alpha: float = 0.05,
-    marginal_significance: float = 0.1,
+    marginal_significance: float = MARGINAL_ALPHA,
 ) -> pd.Series:
     result = pd.Series(data=StatisticalSignificance.No.value, index=p_values.index)
     result.loc[p_values <= marginal_significance] = StatisticalSignificance.Marginally.value
     result.loc[p_values <= alpha] = StatisticalSignificance.Yes.value
     return result
+
+
+def top_pairs(
+    table: pd.DataFrame,
+    p_column: str = 'p-value',
+    alpha: float = 0.05,
+    max_pairs: int | None = MAX_REPORTED_PAIRS,
+) -> pd.DataFrame:
+    """Pairs of a post hoc table worth reporting.
+
+    :param max_pairs: If the table has more pairs, only the at most ``max_pairs`` significant
+    pairs with the smallest p-values are kept. None keeps all pairs.
+    :return: The table, or its most significant rows in increasing order of their p-values.
+    """
+    if max_pairs is None or len(table) <= max_pairs:
+        return table
+    return table[table[p_column] <= alpha].nsmallest(max_pairs, p_column)
+
+
+def adjust_p_values(p_values, method: str = 'holm') -> np.ndarray:
+    """Adjust p-values for multiple comparisons.
+
+    :param p_values: Unadjusted p-values.
+    :param method: One of 'bonferroni', 'holm', 'hochberg' or 'fdr_bh' (Benjamini-Hochberg).
+    :return: Adjusted p-values, in the order of the input.
+    """
+    p_values = np.asarray(p_values, dtype=float)
+    m = len(p_values)
+    if method == 'bonferroni':
+        return np.minimum(1, m * p_values)
+
+    if method == 'holm':
+        order = np.argsort(p_values)
+        adjusted = np.maximum.accumulate((m - np.arange(m)) * p_values[order])
+    elif method == 'hochberg':
+        order = np.argsort(p_values)[::-1]
+        adjusted = np.minimum.accumulate((np.arange(m) + 1) * p_values[order])
+    elif method == 'fdr_bh':
+        order = np.argsort(p_values)[::-1]
+        adjusted = np.minimum.accumulate(m / (m - np.arange(m)) * p_values[order])
+    else:
+        raise ValueError(f'Unknown p-value adjustment method {method}')
+
+    result = np.empty(m)
+    result[order] = np.minimum(1, adjusted)
+    return result
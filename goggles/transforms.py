@@ -0,0 +1,230 @@
+"""Power and rank transformations of the samples of a column.
+
+A column is transformed as a whole: the groups of the column are pooled, a transformation is fitted
+to the pooled observations and every group is transformed with the same parameter. The lambdas of
+many columns are estimated at once, on a matrix of the pooled observations padded with NaN.
+"""
+from collections import namedtuple
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy.stats import boxcox_normmax, norm, rankdata, yeojohnson_normmax
+
+from goggles.bootstrap import DEFAULT_MAX_CHUNK_BYTES
+
+METHODS = ('yeo-johnson', 'box-cox', 'rank-inverse-normal')
+
+TITLES = {
+    'yeo-johnson': 'Yeo-Johnson',
+    'box-cox': 'Box-Cox',
+    'rank-inverse-normal': 'rank-based inverse normal',
+}
+
+Transformed = namedtuple('Transformed', ('method', 'lmbda', 'raw', 'samples'))
+
+# Lambdas are searched on a grid first, and the best grid point is refined by golden-section search.
+LAMBDA_GRID = np.linspace(-10, 10, 81)
+_GOLDEN = (np.sqrt(5) - 1) / 2
+
+
+def yeo_johnson(x, lmbda) -> np.ndarray:
+    """Yeo-Johnson transformation, broadcasting the observations against the lambdas."""
+    x, lmbda = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(lmbda, dtype=float))
+    with np.errstate(all='ignore'):
+        positive = np.where(
+            np.abs(lmbda) < 1e-12,
+            np.log1p(x),
+            np.expm1(lmbda * np.log1p(x)) / lmbda,
+        )
+        negative = np.where(
+            np.abs(lmbda - 2) < 1e-12,
+            -np.log1p(-x),
+            -np.expm1((2 - lmbda) * np.log1p(-x)) / (2 - lmbda),
+        )
+    return np.where(x >= 0, positive, negative)
+
+
+def box_cox(x, lmbda) -> np.ndarray:
+    """Box-Cox transformation of positive observations, broadcasting them against the lambdas."""
+    x, lmbda = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(lmbda, dtype=float))
+    with np.errstate(all='ignore'):
+        return np.where(np.abs(lmbda) < 1e-12, np.log(x), np.expm1(lmbda * np.log(x)) / lmbda)
+
+
+def rank_inverse_normal(x, c: float = 3 / 8) -> np.ndarray:
+    """Rank-based inverse normal transformation, with Blom's offset by default."""
+    ranks = rankdata(x)
+    return norm.ppf((ranks - c) / (len(ranks) - 2 * c + 1))
+
+
+def _log_likelihood(method: str, padded: np.ndarray, lambdas: np.ndarray) -> np.ndarray:
+    """Profile log-likelihoods of normality of the transformed columns.
+
+    :param padded: Columns' observations, one row per column, padded with NaN.
+    :param lambdas: One row of lambdas per column.
+    :return: Log-likelihood of every lambda of every column.
+    """
+    n = (~np.isnan(padded)).sum(axis=1, keepdims=True)
+    x = padded[:, np.newaxis, :]
+    if method == 'yeo-johnson':
+        transformed = yeo_johnson(x, lambdas[:, :, np.newaxis])
+        jacobian = np.nansum(np.sign(padded) * np.log1p(np.abs(padded)), axis=1, keepdims=True)
+    else:
+        transformed = box_cox(x, lambdas[:, :, np.newaxis])
+        jacobian = np.nansum(np.log(padded), axis=1, keepdims=True)
+    with np.errstate(all='ignore'):
+        llf = (lambdas - 1) * jacobian - n / 2 * np.log(np.nanvar(transformed, axis=2))
+    return np.where(np.isfinite(llf), llf, -np.inf)
+
+
+def _golden_section(
+    method: str,
+    padded: np.ndarray,
+    low: np.ndarray,
+    high: np.ndarray,
+    tolerance: float,
+) -> np.ndarray:
+    """Narrow the intervals of the lambdas of every column to the maximum of its likelihood."""
+
+    def llf(lambdas):
+        return _log_likelihood(method, padded, lambdas[:, np.newaxis])[:, 0]
+
+    left, right = high - _GOLDEN * (high - low), low + _GOLDEN * (high - low)
+    llf_left, llf_right = llf(left), llf(right)
+    while (high - low).max() > tolerance:
+        move_right = llf_left < llf_right
+        low = np.where(move_right, left, low)
+        high = np.where(move_right, high, right)
+        left, right = high - _GOLDEN * (high - low), low + _GOLDEN * (high - low)
+        llf_left, llf_right = llf(left), llf(right)
+    return (low + high) / 2
+
+
+def fit_lambdas(
+    columns: Sequence[Sequence[float]],
+    method: str = 'yeo-johnson',
+    tolerance: float = 1e-10,
+    max_chunk_bytes: int = DEFAULT_MAX_CHUNK_BYTES,
+) -> np.ndarray:
+    """Maximum likelihood lambdas of many columns, estimated together.
+
+    The log-likelihood of every column is evaluated on ``LAMBDA_GRID``, and the interval around
+    the best grid point is narrowed by a golden-section search, run on all columns at once. The
+    lambdas of columns whose best grid point is an end of the grid lie outside of it, and are
+    found by scipy's unbounded search instead.
+
+    :param columns: Observations of every column.
+    :param method: 'yeo-johnson' or 'box-cox'.
+    :param tolerance: Width of the final interval of the search.
+    :param max_chunk_bytes: Memory budget of the transformed observations of one chunk of columns
+    and lambdas, see ``goggles.bootstrap.bootstrap_anova``.
+    :return: The lambda of every column.
+    """
+    if method not in ('yeo-johnson', 'box-cox'):
+        raise ValueError(f'Method {method} has no lambda to fit')
+    arrays = [np.asarray(column, dtype=float) for column in columns]
+    if method == 'box-cox' and any((array <= 0).any() for array in arrays):
+        raise ValueError('Box-Cox transformation requires positive data')
+    padded = np.full((len(arrays), max(len(array) for array in arrays)), np.nan)
+    for row, array in zip(padded, arrays):
+        row[:len(array)] = array
+
+    # The transformation of one lambda of one column holds about six arrays of its observations.
+    point_bytes = 8 * 6 * padded.shape[1]
+    rows = max(1, min(len(arrays), max_chunk_bytes // (point_bytes * len(LAMBDA_GRID))))
+    points = len(LAMBDA_GRID) if rows > 1 else max(1, max_chunk_bytes // point_bytes)
+    step = LAMBDA_GRID[1] - LAMBDA_GRID[0]
+    lambdas = np.empty(len(arrays))
+    for start in range(0, len(arrays), rows):
+        chunk = padded[start:start + rows]
+        llf = np.empty((len(chunk), len(LAMBDA_GRID)))
+        for first in range(0, len(LAMBDA_GRID), points):
+            grid_points = LAMBDA_GRID[first:first + points]
+            grid = np.broadcast_to(grid_points, (len(chunk), len(grid_points)))
+            llf[:, first:first + len(grid_points)] = _log_likelihood(method, chunk, grid)
+        best = llf.argmax(axis=1)
+        low, high = LAMBDA_GRID[best] - step, LAMBDA_GRID[best] + step
+        lambdas[start:start + rows] = _golden_section(method, chunk, low, high, tolerance)
+
+        on_edge = ((best == 0) | (best == len(LAMBDA_GRID) - 1)) & np.isfinite(llf.max(axis=1))
+        for row in np.flatnonzero(on_edge) + start:
+            if method == 'yeo-johnson':
+                lambdas[row] = yeojohnson_normmax(arrays[row])
+            else:
+                lambdas[row] = boxcox_normmax(arrays[row], method='mle')
+    return lambdas
+
+
+class TransformCache:
+    """Fitted lambdas and transformed samples of the columns of one run.
+
+    Every column is fitted and transformed once. The transformed samples keep the index of the
+    raw samples, so subsets of the raw samples, e.g. trimmed ones, are transformed by selection,
+    except by the rank-based transformation, whose scores depend on all observations.
+
+    :param method: One of ``METHODS``.
+    """
+
+    def __init__(self, method: str = 'yeo-johnson'):
+        if method not in METHODS:
+            raise ValueError(f'Unknown transformation {method}, expected one of {METHODS}')
+        self.method = method
+        self._columns: dict[str, Transformed] = {}
+
+    @property
+    def title(self) -> str:
+        return TITLES[self.method]
+
+    def fit(self, columns: Mapping[str, dict[str, pd.Series]]) -> list[float | None]:
+        """Fit the transformation to every column, and store the transformed samples.
+
+        :param columns: A column - samples dictionary.
+        :return: The lambdas of the columns, None for the rank-based transformation.
+        """
+        if self.method == 'rank-inverse-normal':
+            lambdas = [None] * len(columns)
+        else:
+            pooled = [pd.concat(samples.values()) for samples in columns.values()]
+            lambdas = fit_lambdas(pooled, self.method).tolist()
+        for (col, samples), lmbda in zip(columns.items(), lambdas):
+            self._store(col, samples, lmbda)
+        return lambdas
+
+    def transform(
+        self,
+        col: str,
+        samples: dict[str, pd.Series],
+        lmbda: float | None = None,
+    ) -> dict[str, pd.Series]:
+        """Transformed samples of a column, reused if the column was transformed before.
+
+        :param samples: Raw samples of the column.
+        :param lmbda: Lambda of the transformation, ignored by the rank-based transformation.
+        """
+        cached = self._columns.get(col)
+        if cached is None or cached.lmbda != lmbda or not _same_samples(cached.raw, samples):
+            cached = self._store(col, samples, lmbda)
+        return cached.samples
+
+    def _store(self, col: str, samples: dict[str, pd.Series], lmbda: float | None) -> Transformed:
+        pooled = np.concatenate([np.asarray(sample, dtype=float) for sample in samples.values()])
+        if self.method == 'yeo-johnson':
+            values = yeo_johnson(pooled, lmbda)
+        elif self.method == 'box-cox':
+            values = box_cox(pooled, lmbda)
+        else:
+            values = rank_inverse_normal(pooled)
+        bounds = np.cumsum([0] + [len(sample) for sample in samples.values()])
+        transformed = {
+            name: pd.Series(values[start:stop], index=sample.index, name=sample.name)
+            for (name, sample), start, stop in zip(samples.items(), bounds[:-1], bounds[1:])
+        }
+        self._columns[col] = Transformed(self.method, lmbda, samples, transformed)
+        return self._columns[col]
+
+
+def _same_samples(cached: dict[str, pd.Series], samples: dict[str, pd.Series]) -> bool:
+    return cached.keys() == samples.keys() and all(
+        cached[name].equals(sample) for name, sample in samples.items()
+    )
@@ -0,0 +1,162 @@
+"""Wilcox's heteroscedastic one-way ANOVA of trimmed means and its pairwise contrasts.
+
+NumPy implementations of WRS2's ``t1way`` and ``lincon``, usable without R.
+"""
+import math
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from scipy.stats import f, norm, t
+
+from goggles.bootstrap import DEFAULT_MAX_CHUNK_BYTES
+from goggles.posthoc import studentized_maximum_modulus_ppf
+from goggles.stats import adjust_p_values
+
+T1wayResult = namedtuple('T1wayResult', ('statistic', 'pvalue', 'df1', 'df2', 'effect_size'))
+
+# Consistency constants of the Winsorized variance under normality, as hard-coded in WRS2.
+_WINVAR_CONSTANTS = {0.0: 1.0, 0.1: 0.6786546, 0.2: 0.4208083}
+
+
+def trimmed_mean(x: np.ndarray, tr: float = 0.2, axis: int = -1) -> np.ndarray:
+    x = np.sort(x, axis=axis)
+    n = x.shape[axis]
+    g = math.floor(tr * n)
+    return np.take(x, np.arange(g, n - g), axis=axis).mean(axis=axis)
+
+
+def winsorized_variance(x: np.ndarray, tr: float = 0.2, axis: int = -1) -> np.ndarray:
+    x = np.sort(x, axis=axis)
+    n = x.shape[axis]
+    g = math.floor(tr * n)
+    low = np.take(x, [g], axis=axis)
+    high = np.take(x, [n - g - 1], axis=axis)
+    return np.clip(x, low, high).var(axis=axis, ddof=1)
+
+
+def _normalised_winsorized_variance(x: np.ndarray, tr: float, axis: int = -1) -> np.ndarray:
+    constant = _WINVAR_CONSTANTS.get(tr)
+    if constant is None:
+        z = norm.ppf(tr)
+        constant = 2 * norm.cdf(-z) - 1 + 2 * z * norm.pdf(z) + 2 * z ** 2 * tr
+    return winsorized_variance(x, tr, axis) / constant
+
+
+def _squared_standard_errors(groups: list[np.ndarray], tr: float):
+    n = np.array([len(group) for group in groups])
+    h = n - 2 * np.floor(tr * n)
+    winvar = np.array([winsorized_variance(group, tr) for group in groups])
+    if np.any(winvar == 0):
+        raise ValueError('Winsorized variance of a group is zero, the test cannot be computed')
+    means = np.array([trimmed_mean(group, tr) for group in groups])
+    return means, (n - 1) * winvar / (h * (h - 1)), h
+
+
+def _explanatory_power(groups: list[np.ndarray], tr: float) -> np.ndarray:
+    """Explanatory measure of effect size of equally sized groups, along the last axis.
+
+    :param groups: Arrays of shape (..., n), one per group.
+    """
+    means = np.stack([trimmed_mean(group, tr) for group in groups], axis=-1)
+    pooled = np.concatenate(groups, axis=-1)
+    return means.var(axis=-1, ddof=1) / _normalised_winsorized_variance(pooled, tr)
+
+
+def _subsample(rng: np.random.Generator, group: np.ndarray, n: int, rows: int) -> np.ndarray:
+    """Rows of n observations of the group drawn without replacement, in any order.
+
+    The trimmed mean and the Winsorized variance do not depend on the order of the observations,
+    so the indices of the n smallest of uniform random keys, partitioned but not sorted, are a
+    uniform subsample of every row.
+    """
+    size = len(group)
+    if n == size:
+        return np.broadcast_to(group, (rows, n))
+    indices = rng.random((rows, size)).argpartition(n - 1, axis=1)[:, :n]
+    return group[indices]
+
+
+def t1way(
+    samples: dict[str, pd.Series],
+    tr: float = 0.2,
+    nboot: int = 100,
+    seed: int | np.random.Generator | None = None,
+    max_chunk_bytes: int = DEFAULT_MAX_CHUNK_BYTES,
+) -> T1wayResult:
+    """Heteroscedastic one-way ANOVA of trimmed means.
+
+    :param samples: A factor value - observations dictionary.
+    :param tr: Trimming fraction on each side.
+    :param nboot: Number of subsamples used to estimate the effect size of unequal groups.
+    :param seed: Seed or generator of the subsamples.
+    :param max_chunk_bytes: Memory budget of one chunk of subsamples, see ``bootstrap_anova``.
+    :return: Test statistic, p-value, degrees of freedom and explanatory effect size.
+    """
+    groups = [np.asarray(sample, dtype=float) for sample in samples.values()]
+    k = len(groups)
+    means, squared_se, h = _squared_standard_errors(groups, tr)
+
+    weights = 1 / squared_se
+    u = weights.sum()
+    grand_mean = (weights * means).sum() / u
+    a = (weights * (means - grand_mean) ** 2).sum() / (k - 1)
+    c = ((1 - weights / u) ** 2 / (h - 1)).sum() / (k ** 2 - 1)
+    statistic = a / (1 + 2 * (k - 2) * c)
+    df1, df2 = k - 1, 1 / (3 * c)
+    p_value = f.sf(statistic, df1, df2)
+
+    sizes = [len(group) for group in groups]
+    if len(set(sizes)) == 1:
+        power = _explanatory_power(groups, tr)
+    else:
+        # Unequal groups: average over random subsamples of the size of the smallest group.
+        rng = np.random.default_rng(seed)
+        n = min(sizes)
+        # A row of a chunk holds the random keys of one group at a time and their partitioned
+        # indices, and the subsamples of all groups with about four working copies of them.
+        row_bytes = 8 * (2 * max(sizes) + 5 * k * n)
+        chunk_size = max(1, min(nboot, max_chunk_bytes // row_bytes))
+        power = 0.0
+        for start in range(0, nboot, chunk_size):
+            rows = min(chunk_size, nboot - start)
+            subsamples = [_subsample(rng, group, n, rows) for group in groups]
+            power += _explanatory_power(subsamples, tr).sum()
+        power /= nboot
+
+    return T1wayResult(statistic, p_value, df1, df2, np.sqrt(power))
+
+
+def lincon(samples: dict[str, pd.Series], tr: float = 0.2, alpha: float = 0.05) -> pd.DataFrame:
+    """Pairwise contrasts of trimmed means with Hochberg-corrected p-values.
+
+    Confidence intervals use the critical values of the studentized maximum modulus distribution
+    of all contrasts, at the Welch degrees of freedom of each contrast, as WRS2 does, which reads
+    them from a table of rounded values instead of computing them.
+
+    :param samples: A factor value - observations dictionary.
+    :param tr: Trimming fraction on each side.
+    :param alpha: Family-wise significance level of the confidence intervals.
+    :return: A table of the contrasts, one row per pair of groups.
+    """
+    names = np.asarray(list(samples.keys()), dtype=object)
+    groups = [np.asarray(sample, dtype=float) for sample in samples.values()]
+    means, squared_se, h = _squared_standard_errors(groups, tr)
+
+    first, second = np.triu_indices(len(groups), k=1)
+    psihat = means[first] - means[second]
+    se = np.sqrt(squared_se[first] + squared_se[second])
+    df = (squared_se[first] + squared_se[second]) ** 2 / (
+        squared_se[first] ** 2 / (h[first] - 1) + squared_se[second] ** 2 / (h[second] - 1)
+    )
+    p_values = 2 * t.sf(np.abs(psihat) / se, df)
+    crit = studentized_maximum_modulus_ppf(1 - alpha, len(psihat), df)
+
+    return pd.DataFrame({
+        'Group 1': names[first],
+        'Group 2': names[second],
+        'psihat': psihat,
+        'Lower CI': psihat - crit * se,
+        'Upper CI': psihat + crit * se,
+        'p-value': adjust_p_values(p_values, 'hochberg'),
+    })
@@ -1,10 +1,84 @@
+import logging
+from contextlib import contextmanager
+
 import numpy as np
 import pandas as pd
 
+from goggles.stats import MAX_REPORTED_PAIRS, top_pairs
+
+logger = logging.getLogger("colour")
+
 
 def trim_data(data: pd.Series, trim_fraction: float = 0.1):
-    trim_one_side = 100 * trim_fraction / 2
-    lower_limit = np.percentile(data, trim_one_side)
-    upper_limit = np.percentile(data, 100 - trim_one_side)
-    output = pd.Series([x for x in data if lower_limit <= x <= upper_limit], name=data.name)
-    return output
+    values = np.asarray(data, dtype=float)
+    return pd.Series(values[trim_mask(values, trim_fraction)], name=data.name)
+
+
+def trim_mask(data, trim_fraction: float = 0.1) -> np.ndarray:
+    """Mask of the observations within the ``trim_fraction / 2`` and ``1 - trim_fraction / 2``
+    quantiles.
+    """
+    values = np.asarray(data, dtype=float)
+    lower_limit, upper_limit = np.quantile(values, [trim_fraction / 2, 1 - trim_fraction / 2])
+    return (lower_limit <= values) & (values <= upper_limit)
+
+
+def log_pairs(
+    table: pd.DataFrame,
+    p_column: str = 'p-value',
+    alpha: float = 0.05,
+    max_pairs: int | None = MAX_REPORTED_PAIRS,
+    markdown: bool = False,
+) -> None:
+    """Log a post hoc table, only its most significant pairs if it is large, see ``top_pairs``."""
+    shown = top_pairs(table, p_column, alpha, max_pairs)
+    if len(shown) < len(table):
+        significant = (table[p_column] <= alpha).sum()
+        logger.debug(f'{significant} of {len(table)} pairs are significant')
+        if shown.empty:
+            return
+        logger.debug(f'The {len(shown)} with the smallest p-values:')
+    logger.debug(shown.to_markdown() if markdown else shown)
+
+
+class _RecordBuffer(logging.Handler):
+    def __init__(self, records: list[logging.LogRecord]):
+        super().__init__(logging.DEBUG)
+        self.records = records
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # Messages are rendered eagerly, so that records can be pickled and re-emitted later.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        self.records.append(record)
+
+
+@contextmanager
+def capture_log_records(logger: logging.Logger):
+    """Divert the logger's records into a list instead of its handlers.
+
+    Records of every level are captured, whatever the level of the logger, so that they can be
+    cached or returned from a worker process whose logger is not configured. Replay them with
+    ``replay_log_records``, which applies the logger's level.
+    """
+    records = []
+    handlers, level, propagate = logger.handlers, logger.level, logger.propagate
+    logger.handlers = [_RecordBuffer(records)]
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    try:
+        yield records
+    finally:
+        logger.handlers = handlers
+        logger.setLevel(level)
+        logger.propagate = propagate
+
+
+def replay_log_records(logger: logging.Logger, records: list[logging.LogRecord]) -> None:
+    """Pass captured records to the logger's handlers, skipping those below its level."""
+    for record in records:
+        if logger.isEnabledFor(record.levelno):
+            logger.handle(record)
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import logging
+import os
+from collections.abc import Iterable
+from pathlib import Path
+
+import pandas as pd
+
+# Not the "colour" logger of the analysis, whose records make up the results logs.
+logger = logging.getLogger(__name__)
+
+PERSIST_FORMATS = ('feather', 'parquet')
+
+# Key of the schema metadata of a persisted sheet that identifies the workbook it was parsed from.
+_STAMP_KEY = b'goggles.workbook'
+
+# Parsed sheets of every workbook and reading options, with the stamp of the parsed workbook.
+_cache: dict[tuple[str, str], tuple[str, dict[str, pd.DataFrame]]] = {}
+
+
+def _workbook_stamp(file_path: Path, options: str) -> str:
+    """Modification time and size of the workbook, and the reading options of its sheets."""
+    stat = file_path.stat()
+    return json.dumps({'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'options': options})
+
+
+def _persisted_path(file_path: Path, sheet_name: str, options: str, fmt: str) -> Path:
+    """File of a sheet read with the given options, so that reading the sheet with other options
+    does not replace it.
+    """
+    digest = hashlib.sha256(json.dumps([sheet_name, options]).encode()).hexdigest()[:32]
+    return file_path.parent.joinpath(f'.{file_path.name}.cache', f'{digest}.{fmt}')
+
+
+def _load_persisted(path: Path, fmt: str, stamp: str) -> pd.DataFrame | None:
+    """The persisted sheet, None if it was parsed from another version of the workbook or cannot
+    be read, e.g. a file truncated by a crash before its writes were atomic.
+    """
+    try:
+        import pyarrow
+        from pyarrow import feather, parquet
+    except ImportError:
+        return None
+    try:
+        if fmt == 'feather':
+            # Uncompressed Feather files are memory-mapped instead of being read into memory.
+            table = feather.read_table(path, memory_map=True)
+        else:
+            table = parquet.read_table(path)
+    except (pyarrow.ArrowInvalid, OSError) as e:
+        logger.debug(f'Could not read {path.name}, parsing its sheet again: {e}')
+        return None
+    if (table.schema.metadata or {}).get(_STAMP_KEY) != stamp.encode():
+        return None
+    return table.to_pandas()
+
+
+def _persist(df: pd.DataFrame, path: Path, fmt: str, stamp: str) -> None:
+    """Write the sheet to a temporary file of this process, and move it into place atomically, so
+    that a reader never sees a partial file.
+    """
+    try:
+        import pyarrow
+        from pyarrow import feather, parquet
+    except ImportError:
+        logger.debug(f'pyarrow is not installed, not persisting {path.name}')
+        return
+
+    path.parent.mkdir(exist_ok=True)
+    temporary_path = path.with_suffix(f'.{os.getpid()}.tmp')
+    try:
+        table = pyarrow.Table.from_pandas(df)
+        table = table.replace_schema_metadata({**table.schema.metadata, _STAMP_KEY: stamp})
+        if fmt == 'feather':
+            feather.write_feather(table, temporary_path, compression='uncompressed')
+        else:
+            parquet.write_table(table, temporary_path)
+    except (pyarrow.ArrowException, ValueError, OSError) as e:
+        logger.debug(f'Could not persist {path.name}: {e}')
+        temporary_path.unlink(missing_ok=True)
+        return
+    os.replace(temporary_path, path)
+
+
+def read_sheets(
+    file_path: Path,
+    sheet_names: Iterable[str],
+    persist: str | None = None,
+    **read_kwargs,
+) -> dict[str, pd.DataFrame]:
+    """Read sheets of an ODS workbook, parsing the workbook at most once.
+
+    Parsed sheets are cached by the workbook's path and the reading options, so any later request
+    for them is served from memory until the workbook's modification time or size changes.
+
+    The frames share their data with the cache, so callers must not modify their values in place,
+    which none of the analyses does. Adding, removing or renaming columns only changes the
+    caller's frame, and with pandas' copy-on-write, so does any modification.
+
+    :param file_path: Path to the workbook.
+    :param sheet_names: Names of the sheets to read.
+    :param persist: Either 'feather' or 'parquet' to also store the parsed sheets in that format
+    in a hidden folder next to the workbook, from which later runs load them instead of parsing
+    the workbook. Every sheet has one file per set of reading options, which is replaced when the
+    sheet is parsed from another version of the workbook. Defaults to keeping the sheets in
+    memory only.
+    :param read_kwargs: Keyword arguments of ``pd.read_excel``.
+    :return: A sheet name - data frame dictionary.
+    """
+    if persist is not None and persist not in PERSIST_FORMATS:
+        raise ValueError(f'Unknown persistence format {persist}, expected one of {PERSIST_FORMATS}')
+    file_path = Path(file_path)
+    sheet_names = list(sheet_names)
+    options = repr(sorted(read_kwargs.items()))
+    stamp = _workbook_stamp(file_path, options)
+    key = str(file_path.resolve()), options
+    cached_stamp, sheets = _cache.get(key, (None, {}))
+    if cached_stamp != stamp:
+        sheets = {}
+        _cache[key] = stamp, sheets
+
+    if persist is not None:
+        for sheet_name in sheet_names:
+            path = _persisted_path(file_path, sheet_name, options, persist)
+            if sheet_name not in sheets and path.exists():
+                df = _load_persisted(path, persist, stamp)
+                if df is not None:
+                    sheets[sheet_name] = df
+
+    missing = [sheet_name for sheet_name in sheet_names if sheet_name not in sheets]
+    if missing:
+        logger.debug(f'Parsing sheets {missing} of {file_path.name}')
+        parsed = pd.read_excel(file_path, sheet_name=missing, engine='odf', **read_kwargs)
+        sheets.update(parsed)
+        if persist is not None:
+            for sheet_name in missing:
+                path = _persisted_path(file_path, sheet_name, options, persist)
+                _persist(parsed[sheet_name], path, persist, stamp)
+
+    return {sheet_name: sheets[sheet_name].copy(deep=False) for sheet_name in sheet_names}
+
+
+def clear_cache() -> None:
+    _cache.clear()
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import levene, shapiro
+
+from goggles.assumptions import check_assumptions, long_format
+
+COLUMNS = {
+    'R jacket': {
+        'a': pd.Series([2.1, 3.4, np.nan, 1.9, 5.6, 4.2, 3.3]),
+        'b': pd.Series([4.8, 6.1, 5.5, 7.2, 6.6]),
+        'c': pd.Series([1.2, 2.4, 2.4, 3.0, np.nan, 1.8, 2.2, 2.9]),
+    },
+    'R bucket': {
+        'a': pd.Series([0.5, 0.9, 1.4, 0.7, 2.2]),
+        'b': pd.Series([1.1, np.nan, np.nan, 3.9, 0.4, 2.8]),
+        'c': pd.Series([1.6, 1.5, 1.9, 1.7, 1.4, 1.8]),
+    },
+}
+
+
+def test_check_assumptions_matches_scipy():
+    table = check_assumptions(long_format(COLUMNS)).set_index(['column', 'group', 'test'])
+    for col, samples in COLUMNS.items():
+        groups = [sample.dropna() for sample in samples.values()]
+        for group_name, group in zip(samples, groups):
+            expected = shapiro(group)
+            assert table.loc[(col, group_name, 'shapiro')].tolist() == pytest.approx(
+                [expected.statistic, expected.pvalue]
+            )
+        for test, center in [('levene', 'mean'), ('brown_forsythe', 'median')]:
+            expected = levene(*groups, center=center)
+            assert table.loc[(col, None, test)].tolist() == pytest.approx(
+                [expected.statistic, expected.pvalue]
+            )
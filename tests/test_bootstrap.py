@@ -0,0 +1,33 @@
+import numpy as np
+
+from goggles.bootstrap import bootstrap_anova
+
+GROUPS = [
+    [2.1, 3.4, 1.9, 5.6, 4.2, 3.3],
+    [4.8, 6.1, 5.5, 7.2, 6.6],
+    [1.2, 2.4, 2.4, 3.0, 1.8, 2.2, 2.9],
+]
+
+
+def test_bootstrap_anova_is_reproducible():
+    first = bootstrap_anova(GROUPS, n_bootstrap=2000, seed=7)
+    second = bootstrap_anova(GROUPS, n_bootstrap=2000, seed=7)
+    assert first == second
+    assert bootstrap_anova(GROUPS, n_bootstrap=2000, seed=8) != first
+
+
+def test_bootstrap_anova_does_not_depend_on_the_chunks():
+    expected = bootstrap_anova(GROUPS, n_bootstrap=2000, seed=7)
+    # One row of resamples per chunk, and chunks of 37 rows that do not divide the resamples.
+    row_bytes = 8 * (3 * sum(map(len, GROUPS)) + len(GROUPS))
+    for max_chunk_bytes in (1, 37 * row_bytes):
+        result = bootstrap_anova(GROUPS, n_bootstrap=2000, seed=7, max_chunk_bytes=max_chunk_bytes)
+        assert result == expected
+
+
+def test_bootstrap_anova_detects_different_means():
+    result = bootstrap_anova(GROUPS, n_bootstrap=2000, seed=7)
+    np.testing.assert_allclose(result.statistic, np.var([np.mean(group) for group in GROUPS]))
+    assert result.pvalue < 0.01
+    low, high = result.confidence_interval
+    assert low < result.statistic < high
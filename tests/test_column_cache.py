@@ -0,0 +1,46 @@
+import logging
+import shutil
+
+import pandas as pd
+
+from goggles import column_cache
+from goggles.column_cache import ColumnOutcome
+
+
+def test_changing_the_code_invalidates_the_stored_outcome(tmp_path, monkeypatch):
+    package = tmp_path.joinpath('goggles')
+    shutil.copytree(
+        column_cache.PACKAGE_FOLDER, package, ignore=shutil.ignore_patterns('__pycache__')
+    )
+    monkeypatch.setattr(column_cache, 'PACKAGE_FOLDER', package)
+    samples = {'a': pd.Series([1.0, 2.0, 3.0]), 'b': pd.Series([4.0, 5.0])}
+    outcome = ColumnOutcome([logging.makeLogRecord({'msg': 'F = 1.0'})], [], [])
+    output_folder = tmp_path.joinpath('results')
+    output_folder.mkdir()
+
+    key = column_cache.column_key(samples, alpha=0.05)
+    column_cache.save(output_folder, key, outcome)
+    assert column_cache.load(output_folder, column_cache.column_key(samples, alpha=0.05))
+
+    with package.joinpath('stats.py').open('a') as f:
+        f.write('\n# A change of the code.\n')
+    column_cache.source_digest.cache_clear()
+    changed_key = column_cache.column_key(samples, alpha=0.05)
+    assert changed_key != key
+    assert column_cache.load(output_folder, changed_key) is None
+
+
+def test_unreadable_stored_outcome_is_not_reused(tmp_path):
+    outcome = ColumnOutcome([logging.makeLogRecord({'msg': 'F = 1.0'})], [], [])
+    column_cache.save(tmp_path, 'old', outcome)
+    column_cache.save(tmp_path, 'key', outcome)
+    folder = tmp_path.joinpath(column_cache.CACHE_FOLDER)
+    # The outcome replaces the one of another key, and leaves no temporary file.
+    assert [path.name for path in folder.iterdir()] == ['key.pickle']
+    assert column_cache.load(tmp_path, 'key').log_records[0].msg == 'F = 1.0'
+
+    path = folder.joinpath('key.pickle')
+    path.write_bytes(path.read_bytes()[:-10])
+    assert column_cache.load(tmp_path, 'key') is None
+    path.write_bytes(b'not a pickle')
+    assert column_cache.load(tmp_path, 'key') is None
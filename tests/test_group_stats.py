@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from goggles.group_stats import GroupStats
+
+
+def test_statistics_match_the_groups():
+    groups = [[1.0, 2.0, 4.0], [3.0], [5.0, 7.0]]
+    stats = GroupStats(groups, ['a', 'b', 'c'])
+    np.testing.assert_allclose(stats.sums, [7.0, 3.0, 12.0])
+    np.testing.assert_allclose(stats.means, [7 / 3, 3.0, 6.0])
+    np.testing.assert_allclose(stats.medians, [2.0, 3.0, 6.0])
+    np.testing.assert_allclose(stats.variances[[0, 2]], [np.var(groups[0], ddof=1), 2.0])
+
+
+@pytest.mark.parametrize('groups', [
+    [[1.0, 2.0], [], [3.0, 4.0]],
+    [[1.0, 2.0], [3.0, 4.0], []],
+    [[], [1.0, 2.0]],
+])
+def test_empty_group_is_rejected(groups):
+    with pytest.raises(ValueError, match='no observations'):
+        GroupStats(groups)
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from goggles.ingest import aggregate_fixations, frames
+
+RNG = np.random.default_rng(0)
+# Runs of 12 fixations per participant and condition, across chunks of 5 rows. Participant p3
+# never fixates the bucket in Y, and some fixations are outside of all AOIs.
+EXPORT = pd.DataFrame([
+    {
+        'Participant': participant,
+        'Goggles': condition,
+        'AOI': RNG.choice(aois),
+        'Start': start,
+        'Duration': RNG.integers(50, 500),
+        'Event': RNG.choice(['Fixation', 'Saccade'], p=[0.8, 0.2]),
+    }
+    for condition in ['T', 'Y']
+    for participant in ['p1', 'p2', 'p3']
+    for aois in [
+        ['jacket', None] if (condition, participant) == ('Y', 'p3') else ['jacket', 'bucket', None]
+    ]
+    for start in np.sort(RNG.integers(0, 10_000, 12))
+])
+ONSETS = pd.Series(
+    [100, 200, 300, 150, 250, 350],
+    index=pd.MultiIndex.from_product([['T', 'Y'], ['p1', 'p2', 'p3']]),
+)
+
+
+@pytest.fixture
+def export(tmp_path):
+    path = tmp_path.joinpath('export.csv')
+    EXPORT.to_csv(path, index=False)
+    return path
+
+
+def _expected():
+    fixations = EXPORT[EXPORT['Event'] == 'Fixation']
+    expected = fixations.groupby(['Goggles', 'Participant', 'AOI'], dropna=False).agg(
+        tfd=('Duration', 'sum'), ttff=('Start', 'min')
+    )
+    expected['ttff'] -= ONSETS.reindex(expected.index.droplevel('AOI')).to_numpy()
+    expected.index.names = ['condition', 'participant', 'aoi']
+    return expected.astype(float) * 1e-3
+
+
+def test_chunks_are_aggregated_as_the_whole_export(export):
+    aggregates = aggregate_fixations(
+        export, chunk_size=5, time_scale=1e-3, onsets=ONSETS, event_column='Event'
+    )
+    pd.testing.assert_frame_equal(aggregates.sort_index(), _expected().sort_index())
+
+
+def test_frames_fill_the_missing_aois(export):
+    aggregates = aggregate_fixations(
+        export, chunk_size=5, time_scale=1e-3, onsets=ONSETS, event_column='Event'
+    )
+    expected = _expected()
+    tfd, ttff = frames(aggregates, 'TFD'), frames(aggregates, 'TTFF')
+    assert list(tfd) == ['T', 'Y']
+    assert tfd['Y'].loc['p3', 'bucket'] == 0
+    assert np.isnan(ttff['Y'].loc['p3', 'bucket'])
+    for metric, tables in [('tfd', tfd), ('ttff', ttff)]:
+        for condition, table in tables.items():
+            assert sorted(table.columns) == ['bucket', 'jacket']
+            for (participant, aoi), value in table.stack(future_stack=True).items():
+                key = (condition, participant, aoi)
+                if key in expected.index:
+                    assert value == pytest.approx(expected.loc[key, metric])
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from scipy.stats import f_oneway, kruskal, permutation_test
+
+from goggles.permutation import count_assignments, permutation_anova
+
+# 10! / (4! 3! 3!) = 4200 assignments, few enough to be enumerated, with ties for the ranks.
+GROUPS = [
+    [2.1, 3.4, 1.9, 5.6],
+    [4.8, 6.1, 3.4],
+    [1.2, 2.4, 3.0],
+]
+
+
+@pytest.mark.parametrize(('test', 'statistic'), [
+    ('f', lambda *samples, axis: f_oneway(*samples, axis=axis).statistic),
+    ('kruskal', lambda *samples, axis: kruskal(*samples, axis=axis).statistic),
+])
+def test_exact_p_values_match_scipy(test, statistic):
+    assert count_assignments([4, 3, 3]) == 4200
+    result = permutation_anova(GROUPS)[test]
+    expected = permutation_test(
+        GROUPS,
+        statistic,
+        permutation_type='independent',
+        vectorized=True,
+        n_resamples=np.inf,
+        alternative='greater',
+    )
+    assert result.exact
+    assert result.n_permutations == 4200
+    np.testing.assert_allclose(result.statistic, expected.statistic)
+    np.testing.assert_allclose(result.pvalue, expected.pvalue)
+
+
+def test_sampling_stops_early_on_clear_decisions():
+    rng = np.random.default_rng(0)
+    # Every group of the null column holds the same values, so its statistics are the smallest.
+    null = [rng.normal(size=15)] * 3
+    significant = [rng.normal(loc, size=15) for loc in (0, 3, 6)]
+    for groups, decision in [(null, False), (significant, True)]:
+        results = permutation_anova(groups, max_permutations=10000, chunk_size=500, seed=1)
+        for result in results.values():
+            assert not result.exact
+            assert result.n_permutations < 10000
+            assert (result.pvalue <= 0.05) == decision
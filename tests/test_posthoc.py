@@ -0,0 +1,142 @@
+import numpy as np
+import pytest
+from scipy.stats import norm, studentized_range, t
+
+from goggles import posthoc
+from goggles.group_stats import GroupStats
+
+# Reference values of scipy 1.15, pingouin 0.6 and scikit-posthocs 0.17 for these samples.
+GROUPS = {
+    'a': [2.1, 3.4, 1.9, 5.6, 4.2, 3.3],
+    'b': [4.8, 6.1, 5.5, 7.2, 6.6],
+    'c': [1.2, 2.4, 2.4, 3.0, 1.8, 2.2, 2.9],
+}
+
+
+@pytest.fixture
+def stats():
+    return GroupStats(list(GROUPS.values()), list(GROUPS))
+
+
+def test_welch_anova_matches_pingouin(stats):
+    result, eta_squared = posthoc.welch_anova(stats)
+    np.testing.assert_allclose(result.statistic, 28.579773025821346, rtol=1e-12)
+    np.testing.assert_allclose(result.pvalue, 0.00021201599149320494, rtol=1e-10)
+    np.testing.assert_allclose(eta_squared, 0.7342400862784139, rtol=1e-12)
+
+
+def test_tukey_hsd_matches_scipy(stats):
+    result = posthoc.tukey_hsd(stats)
+    assert result[['Group 1', 'Group 2']].values.tolist() == [['a', 'b'], ['a', 'c'], ['b', 'c']]
+    np.testing.assert_allclose(
+        result['Statistic'], [-2.6233333333333335, 1.1452380952380952, 3.7685714285714287]
+    )
+    np.testing.assert_allclose(
+        result['p-value'],
+        [1.7336864042174494e-03, 1.3653646629962179e-01, 3.4708020945628526e-05],
+        rtol=1e-10,
+    )
+    np.testing.assert_allclose(
+        result['Lower CI'], [-4.209472726874836, -0.31207432802770896, 2.2347943716181877]
+    )
+    np.testing.assert_allclose(
+        result['Upper CI'], [-1.0371939397918295, 2.6025505185038993, 5.302348485524668]
+    )
+
+
+def test_games_howell_matches_pingouin(stats):
+    result = posthoc.games_howell(stats)
+    np.testing.assert_allclose(
+        result['T'], [-3.7519179243546139, 1.8831262895783833, 7.8549717398927221]
+    )
+    np.testing.assert_allclose(
+        result['df'], [8.7305219717586002, 6.7489247586515448, 6.5119567801363605]
+    )
+    np.testing.assert_allclose(
+        result['pval'],
+        [1.1959998812405392e-02, 2.1546816394138557e-01, 3.7180649258750087e-04],
+        rtol=1e-10,
+    )
+    np.testing.assert_allclose(
+        result['hedges'], [-2.0017959544247779, 1.0302239654049095, 4.5574168728579334]
+    )
+
+
+def test_dunn_matches_scikit_posthocs(stats):
+    result = posthoc.dunn(stats)
+    np.testing.assert_allclose(
+        result['p-value'], [0.09293067147552869, 0.20794721717167175, 0.00339494140105923]
+    )
+
+
+def test_conover_matches_scikit_posthocs(stats):
+    result = posthoc.conover(stats)
+    np.testing.assert_allclose(
+        result['p-value'],
+        [1.5996812732753985e-02, 7.2351837999185223e-02, 4.7760726559403690e-04],
+    )
+
+
+# Enough values that the quadrature is used instead of scipy, into the far tail.
+STUDENTIZED_RANGES = np.array(
+    [0.1, 0.5, 1, 2, 3, 4, 5, 6, 7, 8, 10, 12, 15, 20, 25, 30, 40, 60, 200]
+)
+
+
+@pytest.mark.parametrize('k', [7, 10, 20, 50])
+@pytest.mark.parametrize('df', [2, 5, 30, 1e3, 1e4])
+def test_studentized_range_sf_matches_scipy(k, df):
+    assert len(STUDENTIZED_RANGES) > posthoc.SCIPY_STUDENTIZED_RANGE_VALUES
+    np.testing.assert_allclose(
+        posthoc.studentized_range_sf(STUDENTIZED_RANGES, k, df),
+        studentized_range.sf(STUDENTIZED_RANGES, k, df),
+        rtol=0,
+        atol=1e-10,
+    )
+
+
+@pytest.mark.parametrize('k', [7, 50])
+def test_studentized_range_sf_of_many_degrees_of_freedom(k):
+    # Above 1e5 degrees of freedom, scipy evaluates the limit of infinite degrees of freedom, from
+    # which the distribution at 1e6 differs by about 1e-6. The difference decreases as 1 / df, so
+    # the distribution at 1e6 is extrapolated from the one at 1e4, up to terms in 1 / df ** 2.
+    limit = studentized_range.sf(STUDENTIZED_RANGES, k, np.inf)
+    extrapolated = limit + (studentized_range.sf(STUDENTIZED_RANGES, k, 1e4) - limit) / 100
+    np.testing.assert_allclose(
+        posthoc.studentized_range_sf(STUDENTIZED_RANGES, k, 1e6), extrapolated, rtol=0, atol=1e-8
+    )
+
+
+# Quantiles at 0.95 integrated with scipy's adaptive quadrature, and solved by brentq to 1e-13.
+@pytest.mark.parametrize(('c', 'df', 'expected'), [
+    (2, 2, 5.571394909600363),
+    (2, 4, 3.381994185277171),
+    (3, 1.5, 9.305292610456242),
+    (3, 4, 3.7445770041611657),
+    (3, 1e3, 2.391609407085263),
+    (10, 30, 3.004962665277751),
+    (45, 1.5, 16.723588087262325),
+    (45, 4, 6.065462428793846),
+    (45, 9.5, 4.280507486143941),
+    (300, 2, 13.736532360613355),
+    (300, 9.5, 5.1707705915919115),
+    (1225, 4, 8.365492580345324),
+])
+def test_studentized_maximum_modulus_ppf_matches_quadrature(c, df, expected):
+    np.testing.assert_allclose(
+        posthoc.studentized_maximum_modulus_ppf(0.95, c, df), expected, rtol=1e-10
+    )
+
+
+def test_studentized_maximum_modulus_ppf_limits():
+    df = np.array([2, 4, 9.5, 30, 1e3])
+    # The maximum modulus of one t variable is its absolute value.
+    np.testing.assert_allclose(
+        posthoc.studentized_maximum_modulus_ppf(0.99, 1, df), t.ppf(0.995, df), rtol=1e-9
+    )
+    # Without error in the standard deviation, the normals are independent.
+    np.testing.assert_allclose(
+        posthoc.studentized_maximum_modulus_ppf(0.95, 10, 1e8),
+        norm.ppf((1 + 0.95 ** (1 / 10)) / 2),
+        rtol=1e-6,
+    )
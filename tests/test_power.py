@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import f_oneway, kruskal
+
+from goggles.power import TESTS, p_values, simulated_power
+from goggles.trimmed_means import t1way
+
+SIZES = [6, 5, 7]
+RNG = np.random.default_rng(0)
+# Rows of unequal groups, rounded to one decimal so that the ranks are tied.
+ROWS = np.round(RNG.normal(np.repeat([0.0, 0.5, 1.0], SIZES), 1, (4, sum(SIZES))), 1)
+
+
+def _groups(row):
+    return np.split(row, np.cumsum(SIZES)[:-1])
+
+
+def test_p_values_match_the_single_tests():
+    p = p_values(ROWS, SIZES)
+    for i, row in enumerate(ROWS):
+        groups = _groups(row)
+        assert len(np.unique(row)) < len(row)
+        np.testing.assert_allclose(p['f'][i], f_oneway(*groups).pvalue)
+        np.testing.assert_allclose(p['kruskal'][i], kruskal(*groups).pvalue)
+        samples = dict(zip('abc', map(pd.Series, groups)))
+        np.testing.assert_allclose(p['trimmed'][i], t1way(samples).pvalue)
+
+
+def test_welch_p_values_match_pingouin():
+    pingouin = pytest.importorskip('pingouin')
+    p = p_values(ROWS, SIZES)
+    for i, row in enumerate(ROWS):
+        data = pd.DataFrame({'value': row, 'group': np.repeat(['a', 'b', 'c'], SIZES)})
+        expected = pingouin.welch_anova(data, dv='value', between='group')['p_unc'][0]
+        np.testing.assert_allclose(p['welch'][i], expected)
+
+
+@pytest.mark.parametrize('n_per_group', [15, [8, 12, 20]])
+def test_simulated_power_without_effect_is_the_significance_level(n_per_group):
+    power = simulated_power(n_per_group, 0.0, n_simulations=4000, seed=0)
+    assert list(power) == list(TESTS)
+    # Within four Monte Carlo standard errors of the level.
+    standard_error = np.sqrt(0.05 * 0.95 / 4000)
+    for test, rejected in power.items():
+        assert rejected == pytest.approx(0.05, abs=4 * standard_error), test
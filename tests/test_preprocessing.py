@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats.mstats import winsorize
+
+from goggles.preprocessing import Preprocessing
+from goggles.samples import SampleMatrix
+
+RNG = np.random.default_rng(0)
+# Groups of 11, 21 and 31 observations, at 0.1 and 0.9 quantiles that are order statistics, so
+# that winsorizing to the quantiles clips as many observations as scipy's winsorize.
+FRAMES = {
+    name: pd.DataFrame({'R jacket': RNG.lognormal(0, 1, size), 'R bucket': RNG.normal(0, 1, size)})
+    for name, size in [('T', 11), ('Y', 21), ('R', 31)]
+}
+FRAMES['Y'].loc[[3, 7], 'R bucket'] = np.nan
+COLUMNS = ['R jacket', 'R bucket']
+
+
+@pytest.fixture
+def matrix():
+    matrix = SampleMatrix(FRAMES, COLUMNS)
+    matrix.exclude('R jacket', matrix.column('R jacket') > 6)
+    return matrix
+
+
+@pytest.mark.parametrize('pooled', [False, True])
+def test_limits_are_quantiles_of_the_valid_observations(matrix, pooled):
+    preprocessing = Preprocessing(matrix, 0.2, pooled=pooled)
+    for i, col in enumerate(COLUMNS):
+        samples = matrix.samples(col)
+        for g, sample in enumerate(samples.values()):
+            values = pd.concat(samples.values()) if pooled else sample
+            np.testing.assert_allclose(
+                [preprocessing.lower[i, g], preprocessing.upper[i, g]],
+                np.quantile(values, [0.1, 0.9]),
+            )
+            mask = preprocessing.masks(col)[list(samples)[g]]
+            low, high = np.quantile(values, [0.1, 0.9])
+            np.testing.assert_array_equal(mask, (sample >= low) & (sample <= high))
+
+
+def test_winsorized_samples_match_scipy():
+    matrix = SampleMatrix(FRAMES, COLUMNS)
+    preprocessing = Preprocessing(matrix, 0.2, method='winsorize')
+    for col in COLUMNS:
+        for name, sample in preprocessing.winsorized(col).items():
+            values = FRAMES[name][col].to_numpy()
+            if np.isnan(values).any():
+                continue
+            np.testing.assert_allclose(sample, winsorize(values, limits=(0.1, 0.1)))
+
+
+def test_report_counts_the_observations(matrix):
+    report = Preprocessing(matrix, 0.2).report().set_index(['column', 'group'])
+    excluded = {
+        'R jacket': {name: int((frame['R jacket'] > 6).sum()) for name, frame in FRAMES.items()},
+        'R bucket': {'T': 0, 'Y': 2, 'R': 0},
+    }
+    for col in COLUMNS:
+        for name, frame in FRAMES.items():
+            row = report.loc[(col, name)]
+            assert row['observations'] == len(frame)
+            assert row['excluded'] == excluded[col][name]
+            sample = matrix.samples(col)[name]
+            low, high = np.quantile(sample, [0.1, 0.9])
+            assert row['trimmed'] == ((sample < low) | (sample > high)).sum()
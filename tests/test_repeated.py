@@ -0,0 +1,144 @@
+import numpy as np
+import pytest
+from scipy.stats import friedmanchisquare
+
+from goggles import repeated
+from goggles.repeated import _effect_contrasts
+
+# Reference values of pingouin 0.6 and scipy 1.15 for these observations, one row per participant.
+MIXED = np.array([
+    [3.1, 4.2, 5.0],
+    [2.8, 3.9, 4.1],
+    [3.5, 3.6, 5.9],
+    [2.2, 3.0, 4.4],
+    [4.0, 4.1, 4.3],
+    [5.1, 4.6, 5.5],
+    [3.9, 4.8, 4.2],
+    [4.4, 5.2, 6.1],
+])
+MIXED_GROUPS = np.array([0, 0, 0, 0, 1, 1, 1, 1])
+AOIS = {'AOI': ['a', 'b', 'c']}
+GOGGLES = {'Goggles': ['x', 'y']}
+
+# Two within factors, Goggles x AOI, the AOIs varying fastest.
+TWO_WITHIN = np.array([
+    [7.0, 2.9, 6.4, 4.6, 5.4, 6.6],
+    [3.0, 5.3, 5.1, 8.5, 6.1, 6.4],
+    [4.7, 4.8, 4.9, 4.8, 6.4, 6.6],
+    [6.0, 5.3, 6.0, 6.7, 6.4, 6.3],
+    [4.8, 6.0, 7.9, 4.9, 5.7, 7.8],
+    [4.1, 5.2, 6.9, 5.8, 6.0, 7.5],
+    [2.2, 6.5, 5.0, 3.5, 6.2, 7.5],
+])
+
+
+def test_mixed_anova_matches_pingouin():
+    table = repeated.anova(MIXED, AOIS, MIXED_GROUPS, GOGGLES)
+    assert table['Source'].tolist() == ['Goggles', 'AOI', 'Goggles * AOI']
+    np.testing.assert_allclose(table['SS'], [4.59375, 6.950833333333334, 1.6724999999999994])
+    np.testing.assert_allclose(table['DF1'], [1, 2, 2])
+    np.testing.assert_allclose(table['DF2'], [6, 12, 12])
+    np.testing.assert_allclose(
+        table['F'], [5.491449443798777, 15.658948685857297, 3.7678347934918572]
+    )
+    np.testing.assert_allclose(
+        table['p-value'], [0.057576856910251994, 0.00045194258784265605, 0.05371773203794621]
+    )
+    np.testing.assert_allclose(
+        table['np2'], [0.4778726539811888, 0.722978243910895, 0.38573899673265377]
+    )
+
+
+def test_unbalanced_mixed_anova_tests_unweighted_group_means():
+    # pingouin weights the groups by their sizes in the within effect, with an SS of 5.5358 and F
+    # of 11.712. The Type III SS of the unweighted group means is 3.8032.
+    values = np.vstack((MIXED[:4], [[3.3, 3.1, 3.8]], MIXED[4:7]))
+    groups = np.array([0, 0, 0, 0, 0, 1, 1, 1])
+    table = repeated.anova(values, AOIS, groups, GOGGLES).set_index('Source')
+    np.testing.assert_allclose(table.loc['AOI', 'SS'], 3.803166666666667)
+    # The between effect and the interaction are the same as pingouin's.
+    np.testing.assert_allclose(table.loc['Goggles', 'F'], 4.795058599937)
+    np.testing.assert_allclose(table.loc['Goggles * AOI', 'F'], 3.656205923836)
+
+
+def test_repeated_measures_anova_matches_pingouin():
+    table = repeated.anova(MIXED, AOIS)
+    np.testing.assert_allclose(table['F'], [11.221795118201028])
+    np.testing.assert_allclose(table['p-value'], [0.0012346622381816446])
+    np.testing.assert_allclose(table['eps'], [0.828016382185749])
+    np.testing.assert_allclose(table['p-GG'], [0.0026943857978546427])
+
+    sphericity = repeated.sphericity(MIXED, AOIS)
+    np.testing.assert_allclose(sphericity['W'], [0.7922944261558471])
+    np.testing.assert_allclose(sphericity['p-value'], [0.49734734277793125])
+
+
+def test_two_within_factors_match_pingouin():
+    table = repeated.anova(TWO_WITHIN, {**GOGGLES, **AOIS})
+    assert table['Source'].tolist() == ['Goggles', 'AOI', 'Goggles * AOI']
+    np.testing.assert_allclose(
+        table['SS'], [9.240238095238082, 15.02714285714286, 0.023333333333352968], rtol=1e-9
+    )
+    np.testing.assert_allclose(
+        table['F'], [8.248459086078615, 3.9557505484174262, 0.008766437069512713], rtol=1e-9
+    )
+    np.testing.assert_allclose(
+        table['p-value'], [0.028352317251885428, 0.04791411424278504, 0.991278218249935]
+    )
+    np.testing.assert_allclose(table['eps'], [1.0, 0.8266005981274962, 0.679008710417811])
+    np.testing.assert_allclose(
+        table['p-GG'], [0.028352317251885428, 0.06038283801378211, 0.9669026843506601]
+    )
+
+
+def test_mauchly_uses_the_number_of_all_cells_as_r():
+    # R's mauchly.test passes the number of columns of the whole design, not of the effect's
+    # contrasts, to the second order term. For the AOI effect of a 2 x 4 within design, the p-value
+    # would be 0.22081721097916002 with the 4 cells of the effect instead of all 8.
+    values = np.array([
+        [4.2, 4.1, 5.8, 5.6, 6.6, 6.0, 6.0, 4.9],
+        [5.7, 7.0, 6.3, 4.0, 4.5, 7.5, 6.8, 4.0],
+        [4.9, 4.2, 5.4, 4.7, 4.8, 6.5, 6.5, 5.1],
+        [5.4, 6.2, 4.4, 4.9, 4.5, 5.7, 5.3, 5.7],
+        [5.0, 5.1, 5.0, 4.8, 4.4, 4.5, 6.8, 4.6],
+        [6.2, 6.1, 4.0, 5.5, 4.4, 5.9, 6.6, 3.7],
+        [4.8, 5.1, 7.0, 4.0, 6.2, 4.8, 6.3, 4.9],
+        [6.4, 6.0, 8.4, 5.8, 6.3, 6.7, 6.0, 5.6],
+    ])
+    sphericity = repeated.sphericity(values, {**GOGGLES, 'AOI': ['a', 'b', 'c', 'd']})
+    assert sphericity['Source'].tolist() == ['AOI', 'Goggles * AOI']
+    np.testing.assert_allclose(sphericity['W'], [0.2902464196945204, 0.4868873279713903])
+    np.testing.assert_allclose(sphericity['p-value'], [0.2214026737083322, 0.5383533693027065])
+
+    z = values @ _effect_contrasts([2, 4], (1,))
+    residuals = z - z.mean(axis=0)
+    covariance = residuals.T @ residuals / 7
+    assert repeated.mauchly(covariance, 7, 4).pvalue == pytest.approx(0.22081721097916002)
+
+
+def test_friedman_matches_scipy():
+    result, kendall_w = repeated.friedman(MIXED)
+    expected = friedmanchisquare(*MIXED.T)
+    np.testing.assert_allclose(result.statistic, expected.statistic)
+    np.testing.assert_allclose(result.pvalue, expected.pvalue)
+    np.testing.assert_allclose(kendall_w, expected.statistic / (len(MIXED) * 2))
+
+
+def test_friedman_corrects_for_ties():
+    values = np.array([[1.0, 1.0, 2.0], [2.0, 3.0, 3.0], [1.0, 2.0, 3.0], [4.0, 4.0, 4.0]])
+    result, _ = repeated.friedman(values)
+    expected = friedmanchisquare(*values.T)
+    np.testing.assert_allclose(result.statistic, expected.statistic)
+    np.testing.assert_allclose(result.pvalue, expected.pvalue)
+
+
+def test_aligned_rank_anova():
+    # Regression values of this implementation, no reference implementation being available.
+    table = repeated.aligned_rank_anova(MIXED, AOIS, MIXED_GROUPS, GOGGLES)
+    assert table['Source'].tolist() == ['Goggles', 'AOI', 'Goggles * AOI']
+    np.testing.assert_allclose(
+        table['F'], [5.001447178002891, 8.983758700696058, 2.159712230215827]
+    )
+    np.testing.assert_allclose(
+        table['p-value'], [0.06667712248939044, 0.004122710877913851, 0.15807327315234976]
+    )
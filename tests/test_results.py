@@ -0,0 +1,35 @@
+import pandas as pd
+
+from goggles import parametric, results
+from goggles.results import ResultsStore
+
+SAMPLES = {
+    'a': pd.Series([2.1, 3.4, 1.9, 5.6, 4.2, 3.3]),
+    'b': pd.Series([4.8, 6.1, 5.5, 7.2, 6.6]),
+    'c': pd.Series([1.2, 2.4, 2.4, 3.0, 1.8, 2.2, 2.9]),
+}
+
+
+def test_tests_return_their_records_to_the_caller():
+    store = ResultsStore()
+    with results.collecting(store), results.scope(factor='TFD', column='R jacket'):
+        anova = parametric.mean_equality_between_groups(*SAMPLES.values())
+        pairs = parametric.pairwise_comparisons(SAMPLES)
+        assert store.records == []
+        results.add(anova, *pairs)
+
+    assert (anova.test, anova.factor, anova.column) == ('anova_f', 'TFD', 'R jacket')
+    assert anova.pvalue < 0.05
+    assert [(record.group1, record.group2) for record in pairs] == [
+        ('a', 'b'), ('a', 'c'), ('b', 'c')
+    ]
+    assert store.records == [anova, *pairs]
+
+
+def test_record_adds_to_the_active_store():
+    store = ResultsStore()
+    outside = results.record('median_test', 1.0, 0.5)
+    with results.collecting(store):
+        inside = results.record('median_test', 2.0, 0.25)
+    assert store.records == [inside]
+    assert outside.statistic == 1.0
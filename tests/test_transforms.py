@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import boxcox_normmax, yeojohnson, yeojohnson_normmax
+
+from goggles import transforms
+from goggles.transforms import TransformCache, fit_lambdas
+
+RNG = np.random.default_rng(0)
+COLUMNS = [
+    RNG.lognormal(0, 1, 40),
+    RNG.normal(5, 1, 35),
+    RNG.gamma(2, 1, 28),
+    # An outlier below a narrow column, whose Yeo-Johnson lambda is above the grid.
+    np.r_[RNG.normal(20, 0.1, 25), 1.0],
+]
+
+
+@pytest.mark.parametrize(('method', 'normmax'), [
+    ('yeo-johnson', yeojohnson_normmax),
+    ('box-cox', lambda x: boxcox_normmax(x, method='mle')),
+])
+def test_fit_lambdas_matches_scipy(method, normmax):
+    np.testing.assert_allclose(
+        fit_lambdas(COLUMNS, method), [normmax(column) for column in COLUMNS], rtol=1e-6
+    )
+
+
+def test_lambdas_beyond_the_grid_are_found_by_scipy(monkeypatch):
+    fallbacks = []
+
+    def normmax(x):
+        fallbacks.append(len(x))
+        return yeojohnson_normmax(x)
+
+    monkeypatch.setattr(transforms, 'yeojohnson_normmax', normmax)
+    lambdas = fit_lambdas(COLUMNS)
+    assert lambdas[3] > transforms.LAMBDA_GRID[-1]
+    assert fallbacks == [len(COLUMNS[3])]
+    # Chunks of one column and of a few grid points find the same lambdas.
+    np.testing.assert_allclose(fit_lambdas(COLUMNS, max_chunk_bytes=1), lambdas)
+
+
+def test_transform_cache_fits_and_transforms_every_column_once(monkeypatch):
+    columns = {
+        f'col {i}': {
+            'a': pd.Series(column[:10], index=range(3, 13)),
+            'b': pd.Series(column[10:]),
+        }
+        for i, column in enumerate(COLUMNS)
+    }
+    fits, stores = [], []
+    store = TransformCache._store
+
+    def counted_fit(*args):
+        fits.append(args)
+        return fit_lambdas(*args)
+
+    def counted_store(self, col, *args):
+        stores.append(col)
+        return store(self, col, *args)
+
+    monkeypatch.setattr(transforms, 'fit_lambdas', counted_fit)
+    monkeypatch.setattr(TransformCache, '_store', counted_store)
+
+    cache = TransformCache()
+    lambdas = cache.fit(columns)
+    for (col, samples), lmbda in zip(columns.items(), lambdas):
+        transformed = cache.transform(col, samples, lmbda)
+        expected = yeojohnson(np.concatenate([samples['a'], samples['b']]), lmbda)
+        np.testing.assert_allclose(
+            np.concatenate([transformed['a'], transformed['b']]), expected, rtol=1e-10
+        )
+        assert transformed['a'].index.equals(samples['a'].index)
+    assert len(fits) == 1
+    assert stores == list(columns)
+
+    # Other samples or another lambda are transformed again.
+    cache.transform('col 0', columns['col 1'], lambdas[1])
+    assert stores[-1] == 'col 0' and len(stores) == len(columns) + 1
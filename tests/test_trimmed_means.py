@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import ttest_ind
+
+from goggles.posthoc import studentized_maximum_modulus_ppf
+from goggles.stats import adjust_p_values
+from goggles.trimmed_means import lincon, t1way
+
+# The viagra data of Field et al., the example of WRS2's t1way and lincon.
+VIAGRA = {
+    'placebo': pd.Series([3, 2, 1, 1, 4]),
+    'low': pd.Series([5, 2, 4, 2, 3]),
+    'high': pd.Series([7, 4, 5, 3, 6]),
+}
+
+
+def test_t1way_matches_wrs2():
+    # WRS2: F = 3, df1 = 2, df2 = 4, p-value = 0.16.
+    result = t1way(VIAGRA)
+    assert result.statistic == pytest.approx(3)
+    assert (result.df1, result.df2) == (2, pytest.approx(4))
+    assert result.pvalue == pytest.approx(0.16)
+
+
+def test_lincon_contrasts_yuen_tests():
+    result = lincon(VIAGRA)
+    assert result[['Group 1', 'Group 2']].values.tolist() == [
+        ['placebo', 'low'], ['placebo', 'high'], ['low', 'high']
+    ]
+    # WRS2's differences of the 20% trimmed means.
+    np.testing.assert_allclose(result['psihat'], [-1, -3, -2])
+
+    # Every contrast is Yuen's test, with a Welch standard error of 2 / sqrt(3) and 4 df here.
+    tests = [
+        ttest_ind(VIAGRA[first], VIAGRA[second], equal_var=False, trim=0.2)
+        for first, second in result[['Group 1', 'Group 2']].values
+    ]
+    np.testing.assert_allclose(
+        result['p-value'], adjust_p_values(np.array([test.pvalue for test in tests]), 'hochberg')
+    )
+    np.testing.assert_allclose([test.df for test in tests], 4)
+    crit = studentized_maximum_modulus_ppf(0.95, 3, 4)
+    np.testing.assert_allclose(result['Upper CI'] - result['psihat'], crit * 2 / np.sqrt(3))
+    np.testing.assert_allclose(result['psihat'] - result['Lower CI'], crit * 2 / np.sqrt(3))
@@ -0,0 +1,19 @@
+import logging
+
+from goggles.utils import capture_log_records, replay_log_records
+
+
+def test_replayed_records_respect_the_level_of_the_logger(caplog):
+    logger = logging.getLogger('colour.test_utils')
+    logger.setLevel(logging.INFO)
+    with capture_log_records(logger) as records:
+        logger.debug('debug')
+        logger.info('info %d', 1)
+    # Every level is captured, so that cached records can be replayed at any level.
+    assert [record.getMessage() for record in records] == ['debug', 'info 1']
+    assert logger.level == logging.INFO
+
+    with caplog.at_level(logging.DEBUG, logger='colour.test_utils'):
+        logger.setLevel(logging.INFO)
+        replay_log_records(logger, records)
+    assert [record.getMessage() for record in caplog.records] == ['info 1']
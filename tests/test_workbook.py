@@ -0,0 +1,27 @@
+import pandas as pd
+import pytest
+
+from goggles.workbook import _load_persisted, _persist
+
+pytest.importorskip('pyarrow')
+
+
+@pytest.mark.parametrize('fmt', ['feather', 'parquet'])
+def test_persisted_sheet_round_trips(tmp_path, fmt):
+    df = pd.DataFrame({'R jacket': [1.5, 2.0, None], 'Participant': ['a', 'b', 'c']})
+    path = tmp_path.joinpath('cache', f'sheet.{fmt}')
+    _persist(df, path, fmt, 'stamp')
+    assert [file.name for file in path.parent.iterdir()] == [path.name]
+    pd.testing.assert_frame_equal(_load_persisted(path, fmt, 'stamp'), df)
+    assert _load_persisted(path, fmt, 'other stamp') is None
+
+
+@pytest.mark.parametrize('fmt', ['feather', 'parquet'])
+def test_unreadable_persisted_sheet_is_stale(tmp_path, fmt):
+    df = pd.DataFrame({'R jacket': [1.5, 2.0, 3.0]})
+    path = tmp_path.joinpath('cache', f'sheet.{fmt}')
+    _persist(df, path, fmt, 'stamp')
+    path.write_bytes(path.read_bytes()[: path.stat().st_size // 2])
+    assert _load_persisted(path, fmt, 'stamp') is None
+    path.write_bytes(b'')
+    assert _load_persisted(path, fmt, 'stamp') is None
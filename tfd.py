@@ -1,40 +1,8 @@
-import logging
-from datetime import datetime
+import sys
 from pathlib import Path
 
-from goggles import evaluate_differences_in_means
-
-now = datetime.now().strftime("%Y%m%d_%H%M%S")
-
-logger = logging.getLogger("colour")
-logger.setLevel(logging.DEBUG)
-fh = logging.FileHandler(f'results/tfd_{now}.log')
-fh.setLevel(logging.DEBUG)
-logger.addHandler(fh)
+from goggles.cli import main
 
 if __name__ == '__main__':
-    red_bucket_column = "R bucket"
-    red_helmet_column = "R helmet + face"
-    red_jacket_column = "R jacket"
-    yellow_bucket_column = "Y bucket"
-    yellow_helmet_column = "Y helmet + face"
-    yellow_bag_column = "Y bag"
-
-    columns = [
-        red_jacket_column,
-        red_helmet_column,
-        red_bucket_column,
-        yellow_bucket_column,
-        yellow_bag_column,
-        yellow_helmet_column,
-    ]
-    data_file_path = Path(__file__).parent.joinpath('data', '20241217', 'data.ods')
-    factor = 'TFD'
-
-    sheets = {
-        'Transparent': "TFD_T_Total_Fixation_Duration",
-        'Yellow': "TFD_Y_Total_Fixation_Duration",
-        'Red': "TFD_R_Total_Fixation_Duration",
-    }
-
-    evaluate_differences_in_means(data_file_path, columns, factor, sheets, trim_fraction=0.2)
+    manifest = Path(__file__).parent.joinpath('studies.toml')
+    sys.exit(main([str(manifest), '--study', 'tfd', *sys.argv[1:]]))